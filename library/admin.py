@@ -1,4 +1,4 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
 from library.models import Author, Book
 
@@ -8,10 +8,89 @@ admin.site.register(Book)
 # Register your models here.
 # library/admin.py
 from django.contrib import admin
-from .models import Author, Book, Order
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .invoices import EXPORTERS
+from .models import Author, Book, Campaign, CampaignDelivery, ImportJob, Job, Order
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ("id", "book", "name", "quantity", "status", "created_at")
     list_filter = ("status", "created_at")
     search_fields = ("name", "email", "phone", "book__title")
+    date_hierarchy = "created_at"   # din/mahina chuno -> "select all" -> export
+    ordering = ("-created_at",)     # order_created_idx / order_status_created_idx se, bina sort
+    actions = ["export_invoices_pdf", "export_invoices_zip"]
+
+    def _export(self, queryset, fmt):
+        export, content_type = EXPORTERS[fmt]
+        response = StreamingHttpResponse(export(queryset), content_type=content_type)
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        response["Content-Disposition"] = f'attachment; filename="invoices-{stamp}.{fmt}"'
+        return response
+
+    @admin.action(description="Download invoices (one merged PDF)")
+    def export_invoices_pdf(self, request, queryset):
+        return self._export(queryset, "pdf")
+
+    @admin.action(description="Download invoices (ZIP of PDFs)")
+    def export_invoices_zip(self, request, queryset):
+        return self._export(queryset, "zip")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "created_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("last_error",)
+    actions = ["retry_now"]
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_now(self, request, queryset):
+        # Running job ko chhedo mat - woh abhi chal raha ho sakta hai (do baar chalega)
+        # attempts=0: manual retry = poore max_attempts phir se
+        queryset.filter(status__in=[Job.FAILED, Job.PENDING]).update(
+            status=Job.PENDING, run_at=timezone.now(), locked_at=None, attempts=0)
+        running = queryset.filter(status=Job.RUNNING).count()
+        if running:
+            self.message_user(request, f"{running} running job(s) skipped", messages.WARNING)
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "original_name", "status", "rows_done", "created_count", "error_count", "created_at")
+    list_filter = ("status",)
+    readonly_fields = ("errors", "last_error")
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ("id", "subject", "status", "sent_count", "failed_count", "created_at", "finished_at")
+    list_filter = ("status",)
+    readonly_fields = ("status", "cursor", "sent_count", "failed_count", "last_error",
+                       "started_at", "finished_at", "locked_at", "lock_token")
+    actions = ["send_now"]
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Send selected campaigns to all subscribers")
+    def send_now(self, request, queryset):
+        from .newsletter import start_campaign
+
+        for campaign in queryset.filter(status=Campaign.DRAFT):
+            start_campaign(campaign)
+        busy = queryset.filter(status=Campaign.SENDING).count()
+        if busy:
+            self.message_user(request, f"{busy} campaign(s) already sending, skipped "
+                                       f"(resume a stalled one with manage.py send_campaign <id>)", messages.WARNING)
+
+
+@admin.register(CampaignDelivery)
+class CampaignDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("id", "campaign", "email", "status", "created_at")
+    list_filter = ("status", "campaign")
+    search_fields = ("email",)
+    raw_id_fields = ("subscriber",)
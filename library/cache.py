@@ -0,0 +1,157 @@
+# library/cache.py
+"""
+Catalogue (and users) version for cache keys and HTTP validators, plus
+tag versions and the `cache_view` decorator built on them.
+
+Book/Author ke har save/delete par version badhta hai (models.py signals).
+Cache keys me version daal do to purani entries apne aap bekaar ho jaati
+hain - alag se delete karne ki zaroorat nahi. Version millisecond timestamp
+hai, isliye woh Last-Modified bhi ban jaata hai, aur cache khaali hone par
+(restart) naya version purane ETags se kabhi match nahi karta.
+"""
+import asyncio
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+
+CATALOGUE_VERSION_KEY = "library:catalogue:version"
+USERS_VERSION_KEY = "library:users:version"   # User add/delete/activate (site counters)
+
+# cache_view tags -> version keys. "catalogue"/"users" wahi purane keys hain;
+# baaki tags ("authors", "author:7", "book:42") ka apna key banta hai.
+TAG_KEYS = {"catalogue": CATALOGUE_VERSION_KEY, "users": USERS_VERSION_KEY}
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    return cache.get_or_set(key, _now_ms, timeout=None)
+
+
+async def aget_version(key):
+    """get_version for async views (TieredCache local hit = no thread hop)."""
+    return await cache.aget_or_set(key, _now_ms, timeout=None)
+
+
+# (event loop, key) -> task jo abhi woh cache miss bhar raha hai
+_filling = {}
+
+
+async def aget_or_compute(key, compute, timeout):
+    """
+    cache.aget, and on a miss `await compute()` + aset - but only once per
+    process: concurrent requests for the same key await the same task
+    instead of all running the query (1k type-ahead clients, ek hi prefix).
+    """
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+    slot = (asyncio.get_running_loop(), key)
+    task = _filling.get(slot)
+    if task is None:
+        async def fill():
+            try:
+                value = await compute()
+                await cache.aset(key, value, timeout)
+                return value
+            finally:
+                del _filling[slot]
+        task = _filling[slot] = asyncio.ensure_future(fill())
+    # Ek client ka disconnect (cancel) baaki waiters ka task na maare
+    return await asyncio.shield(task)
+
+
+def bump_version(key):
+    version = max(_now_ms(), (cache.get(key) or 0) + 1)
+    cache.set(key, version, timeout=None)
+    return version
+
+
+def catalogue_version():
+    return get_version(CATALOGUE_VERSION_KEY)
+
+
+async def acatalogue_version():
+    return await aget_version(CATALOGUE_VERSION_KEY)
+
+
+def bump_catalogue_version():
+    return bump_version(CATALOGUE_VERSION_KEY)
+
+
+# ---------- Tags + view cache ----------
+
+def tag_key(tag):
+    return TAG_KEYS.get(tag) or f"library:tag:{tag}"
+
+
+def tag_versions(tags):
+    """Current version of every tag (one get_many; missing tags start now)."""
+    keys = [tag_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    return [found[key] if key in found else get_version(key) for key in keys]
+
+
+def bump_tags(*tags):
+    for tag in tags:
+        bump_version(tag_key(tag))
+
+
+def _role(user):
+    if not user.is_authenticated:
+        return "anon"
+    return "superuser" if user.is_superuser else "staff" if user.is_staff else "user"
+
+
+def cache_view(*tags, timeout=None, vary="user"):
+    """
+    Cache a GET view's 200 response until one of `tags` is bumped.
+
+    Tags me view kwargs ke placeholders chal sakte hain ("author:{author_id}").
+    Key = view + query params (sorted) + tag versions + `vary`:
+      "user": user + session + CSRF cookie - HTML pages (username, csrf_token
+              ke saath), kisi doosre ko kabhi nahi milta;
+      "role": anon/user/staff/superuser - jin responses me user-specific kuch nahi.
+    Flash messages pending hon, ya response cookie set kare, to cache skip.
+    """
+    def decorator(view):
+        name = f"{view.__module__}.{view.__qualname__}"
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+
+            if vary == "user":
+                who = [str(request.user.pk), request.session.session_key or "",
+                       request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")]
+            else:
+                who = [_role(request.user)]
+            versions = tag_versions([tag.format(**kwargs) for tag in tags])
+            params = sorted(request.GET.lists())
+            raw = f"{name}|{args}|{sorted(kwargs.items())}|{params}|{who}|{versions}"
+            key = f"library:view:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response["X-Cache"] = "hit"
+                return response
+
+            response = view(request, *args, **kwargs)
+            # Page ne naya CSRF secret banaya (cookie abhi aayi nahi) - us token wala HTML mat rakho
+            new_csrf = request.META.get("CSRF_COOKIE") not in (None, request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+            if response.status_code == 200 and not response.streaming and not response.cookies and not new_csrf:
+                cache.set(key, (response.content, response["Content-Type"]), timeout or settings.VIEW_CACHE_TIMEOUT)
+                response["X-Cache"] = "miss"
+            return response
+        return wrapper
+    return decorator
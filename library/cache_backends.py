@@ -0,0 +1,170 @@
+# library/cache_backends.py
+"""
+Two-tier Django cache backend.
+
+Tier 1 har process ka apna LRU (LocMemCache, MAX_ENTRIES par purani entries
+hatti hain) - hit par koi I/O nahi. Tier 2 ek doosra cache alias (file,
+Redis, memcached) jo saare gunicorn workers / job worker share karte hain.
+
+get: pehle local, phir shared (mila to local me bhar do). set/add/delete:
+shared me likho aur local update karo. Local copy sirf LOCAL_TIMEOUT
+seconds rehti hai, to doosre process ka likha (jaise catalogue version
+bump) zyada se zyada itni der baad dikhta hai. SHARED na ho to sirf tier 1
+(poore timeout ke saath) - pehle wala LocMem behaviour.
+
+Async views (aget/aset/...) ke liye: BaseCache ke default async methods har
+call ko sync_to_async se thread par bhejte hain. Yahan local tier memory hai,
+to woh seedha event loop par padha/likha jaata hai; sirf shared tier ka I/O
+uske apne async API se await hota hai.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "library.cache_backends.TieredCache",
+            "OPTIONS": {"SHARED": "shared", "LOCAL_TIMEOUT": 5, "LOCAL_MAX_ENTRIES": 5000},
+        },
+        "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", ...},
+    }
+"""
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED") or None
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        # Keys tiers khud banate hain (apne KEY_PREFIX/VERSION ke saath) - yahan raw key jaati hai
+        self.local = LocMemCache(f"tiered:{location}", {
+            "TIMEOUT": params.get("TIMEOUT", 300),
+            "KEY_PREFIX": params.get("KEY_PREFIX", ""),
+            "OPTIONS": {"MAX_ENTRIES": options.get("LOCAL_MAX_ENTRIES", 5000)},
+        })
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _local_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if self.shared is None:
+            return timeout
+        return self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version)
+        if value is not _MISSING or self.shared is None:
+            return default if value is _MISSING else value
+        value = self.shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.local.get_many(keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            fetched = self.shared.get_many(missing, version)
+            if fetched:
+                self.local.set_many(fetched, self.local_timeout, version)
+                found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is not None:
+            self.shared.set(key, value, timeout, version)
+        self.local.set(key, value, self._local_ttl(timeout), version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version) if self.shared is not None else []
+        self.local.set_many({k: v for k, v in data.items() if k not in failed}, self._local_ttl(timeout), version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is None:
+            return self.local.add(key, value, timeout, version)
+        added = self.shared.add(key, value, timeout, version)
+        if added:
+            self.local.set(key, value, self._local_ttl(timeout), version)
+        else:
+            self.local.delete(key, version)   # kisi aur ka value - agli get shared se layegi
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is None:
+            return self.local.touch(key, timeout, version)
+        self.local.touch(key, self._local_ttl(timeout), version)
+        return self.shared.touch(key, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        if self.shared is None:
+            return self.local.incr(key, delta, version)
+        value = self.shared.incr(key, delta, version)
+        self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self.local.delete(key, version)
+        if self.shared is not None:
+            deleted = self.shared.delete(key, version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version)
+        if self.shared is not None:
+            self.shared.delete_many(keys, version)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    # ---------- async (ASGI views) ----------
+
+    async def aget(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version)
+        if value is not _MISSING or self.shared is None:
+            return default if value is _MISSING else value
+        value = await self.shared.aget(key, _MISSING, version)
+        if value is _MISSING:
+            return default
+        self.local.set(key, value, self.local_timeout, version)
+        return value
+
+    async def aget_many(self, keys, version=None):
+        found = self.local.get_many(keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing and self.shared is not None:
+            fetched = await self.shared.aget_many(missing, version)
+            if fetched:
+                self.local.set_many(fetched, self.local_timeout, version)
+                found.update(fetched)
+        return found
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is not None:
+            await self.shared.aset(key, value, timeout, version)
+        self.local.set(key, value, self._local_ttl(timeout), version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is None:
+            return self.local.add(key, value, timeout, version)
+        added = await self.shared.aadd(key, value, timeout, version)
+        if added:
+            self.local.set(key, value, self._local_ttl(timeout), version)
+        else:
+            self.local.delete(key, version)
+        return added
+
+    async def adelete(self, key, version=None):
+        deleted = self.local.delete(key, version)
+        if self.shared is not None:
+            deleted = await self.shared.adelete(key, version)
+        return deleted
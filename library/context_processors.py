@@ -0,0 +1,43 @@
+# library/context_processors.py
+"""
+base.html ka "Recent Books / Recent Authors" widget, har template ke context me.
+
+Context processor har render par chalta hai, isliye yahan khud koi query
+nahi hoti: values lazy hain. base.html widget ko `{% cache %}` fragment me
+`recent_version` (catalogue version, library/cache.py) ke saath rakhta hai -
+fragment hit par lists kabhi evaluate hi nahi hotin. Miss par bhi dono lists
+usi version ke cache key se aati hain; Book/Author save/delete version
+badalta hai to naya key.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .cache import catalogue_version
+from .models import Author, Book
+
+RECENT_COUNT = 5
+
+
+def recent_widgets(version):
+    """(recent books, recent authors) for catalogue `version`, from cache."""
+    key = f"library:recent:{version}"
+    widgets = cache.get(key)
+    if widgets is None:
+        widgets = (
+            list(Book.objects.select_related("author").order_by("-id")[:RECENT_COUNT]),
+            list(Author.objects.order_by("-id")[:RECENT_COUNT]),
+        )
+        cache.set(key, widgets, settings.RECENT_WIDGETS_CACHE_TIMEOUT)
+    return widgets
+
+
+def recent_books_and_authors(request):
+    version = SimpleLazyObject(catalogue_version)
+    widgets = SimpleLazyObject(lambda: recent_widgets(str(version)))
+    return {
+        "recent_version": version,
+        "recent_cache_timeout": settings.RECENT_WIDGETS_CACHE_TIMEOUT,
+        "recent_books": SimpleLazyObject(lambda: widgets[0]),
+        "recent_authors": SimpleLazyObject(lambda: widgets[1]),
+    }
@@ -0,0 +1,160 @@
+# library/images.py
+"""
+Responsive image derivatives for Book.image / Profile.avatar.
+
+Har source image ke liye `IMAGE_DERIVATIVE_WIDTHS` x `IMAGE_DERIVATIVE_FORMATS`
+chhoti copies `media/derivatives/` me banti hain - sirf source se chhoti
+widths, plus source ki apni width (upscale kabhi nahi). Naam source naam ke
+hash se aata hai (content-addressed source = content hash), isliye URL kabhi
+badalta nahi aur far-future cache headers safe hain
+(library.middleware.ImmutableMediaMiddleware). Sirf content-addressed sources
+ke derivatives bante hain: default avatar ya purane `images/Gatsby.jpg` jaise
+naam jagah par badal sakte hain, unke liye original file hi jaati hai. Generation upload ke baad
+job queue me hota hai; `{% responsive_img %}` tag srcset banata hai aur
+derivatives ready na hon to original image dikhata hai. Kaunsi widths bani
+hain yeh per source name cache me rehta hai, to render par storage stat nahi.
+"""
+import hashlib
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+
+from .storage import content_storage, is_content_addressed, overwrite_storage
+
+DERIVATIVE_DIR = "derivatives"
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+# Source name -> derivative widths, process-local copy of the cache entry
+_widths = {}
+
+
+def derivative_key(source_name):
+    return hashlib.sha1(source_name.encode()).hexdigest()[:20]
+
+
+def derivative_name(source_name, width, fmt):
+    key = derivative_key(source_name)
+    return posixpath.join(DERIVATIVE_DIR, key[:2], f"{key}-{width}.{EXTENSIONS[fmt]}")
+
+
+def widths():
+    return sorted(settings.IMAGE_DERIVATIVE_WIDTHS)
+
+
+def source_widths(source_width):
+    """Derivative widths for a source this wide: configured widths below it, capped by the source width."""
+    below = [w for w in widths() if w < source_width]
+    return below if len(below) == len(widths()) else below + [source_width]
+
+
+def _cache_key(source_name):
+    return f"library:img:widths:{derivative_key(source_name)}"
+
+
+def _remember(source_name, found):
+    cache.set(_cache_key(source_name), found, None if found else settings.IMAGE_READY_RECHECK_SECONDS)
+    if found:
+        _widths[source_name] = found
+
+
+def _source_width(source_name):
+    """Width after EXIF rotation, from the image header only; None if unreadable."""
+    from PIL import Image
+
+    try:
+        with content_storage().open(source_name, "rb") as f, Image.open(f) as image:
+            rotated = image.getexif().get(0x0112) in (5, 6, 7, 8)   # Orientation: 90/270 degree
+            return image.height if rotated else image.width
+    except (OSError, ValueError):
+        return None
+
+
+def available_widths(source_name):
+    """
+    Derivative widths written for `source_name`, ascending; [] until they
+    are ready (or ever, for non-content-addressed names). Cache miss (naya
+    process / cache clear) par hi source header padha aur aakhri derivative
+    stat hota hai.
+    """
+    if not is_content_addressed(source_name):
+        return []
+    found = _widths.get(source_name)
+    if found is not None:
+        return found
+    found = cache.get(_cache_key(source_name))
+    if found is None:
+        found = []
+        width = _source_width(source_name)
+        if width:
+            planned = source_widths(width)
+            # Sabse bada format/width sabse aakhir me likha jaata hai
+            if overwrite_storage().exists(derivative_name(source_name, planned[-1], settings.IMAGE_DERIVATIVE_FORMATS[-1])):
+                found = planned
+        _remember(source_name, found)
+    elif found:
+        _widths[source_name] = found
+    return found
+
+
+def is_ready(source_name):
+    """True once every derivative of `source_name` has been written."""
+    return bool(available_widths(source_name))
+
+
+def _encode(image, fmt):
+    out = BytesIO()
+    quality = settings.IMAGE_DERIVATIVE_QUALITY
+    if fmt == "webp":
+        image.save(out, "WEBP", quality=quality, method=4)
+    else:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def generate_derivatives(source_name, storage=None):
+    """
+    Write every missing derivative of `source_name`. Returns how many were
+    written (0 if all existed, the source is gone or its name is not
+    content-addressed).
+    """
+    from PIL import Image, ImageOps
+
+    storage = storage or content_storage()
+    target = overwrite_storage()
+    if not is_content_addressed(source_name) or not storage.exists(source_name):
+        return 0
+    with storage.open(source_name, "rb") as f:
+        source = Image.open(f)
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ("RGB", "RGBA"):
+            source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+        source.load()
+
+    written = 0
+    planned = source_widths(source.width)
+    for width in planned:
+        resized = None
+        for fmt in settings.IMAGE_DERIVATIVE_FORMATS:
+            name = derivative_name(source_name, width, fmt)
+            if target.exists(name):
+                continue
+            if resized is None:
+                height = round(source.height * width / source.width)
+                resized = source.resize((width, height), Image.LANCZOS)
+            target.save(name, ContentFile(_encode(resized, fmt)))
+            written += 1
+    _remember(source_name, planned)
+    return written
+
+
+def derivative_url(source_name, width, fmt):
+    return overwrite_storage().url(derivative_name(source_name, width, fmt))
+
+
+def srcset(source_name, fmt):
+    return ", ".join(f"{derivative_url(source_name, w, fmt)} {w}w" for w in available_widths(source_name))
@@ -0,0 +1,429 @@
+# library/importers.py
+"""
+Bulk CSV -> Book import.
+
+Poora DataFrame column-wise (vectorized) clean hota hai: dates
+`pd.to_datetime` se, prices `pd.to_numeric` se. Authors ek query me
+resolve hote hain (+ ek bulk_create naye authors ke liye) aur books chunked
+`bulk_create` se ek transaction me insert hoti hain. Galat rows skip hoti
+hain aur unka row number + reason `ImportResult.errors` me milta hai.
+
+Bade files ke liye `run_import(import_job)` streaming mode hai: encoding
+file ke shuru ke kuch KB se pehchani jaati hai, file `chunksize` rows me
+padhi jaati hai aur har chunk `ImportJob` progress ke saath alag transaction
+me commit hota hai. Prefix ke baad koi byte us encoding me decode na ho to
+woh row U+FFFD ke saath save nahi hoti - row error ban jaati hai. Memory chunk size se bound rehti hai, file size se nahi.
+
+Import upsert hai, insert nahi: book ISBN (agar CSV me ho) ya natural key
+(title + author + published_date) se match hoti hai aur
+`bulk_create(update_conflicts=True)` se update hoti hai. Har row ka hash
+`Book.row_hash` me save hota hai - same feed dobara aaye to unchanged rows
+par koi write (ya image copy) nahi hota.
+"""
+import codecs
+import hashlib
+import os
+import time
+from collections import Counter
+from decimal import Decimal
+
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from . import search
+from .cache import bump_catalogue_version
+from .jobs import enqueue
+from .models import Author, Blob, Book, ImportJob
+from .storage import is_content_addressed
+
+DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y")
+DEFAULT_AUTHOR = "Unknown Author"
+# SQLite ke bound-parameter limit se neeche
+LOOKUP_CHUNK = 900
+ISBN_RE = r"^(?:\d{9}[\dX]|\d{13})$"
+NATURAL_KEY = ["title", "author", "published_date"]
+# Upsert par ye columns overwrite hote hain (ISBN match par natural key bhi)
+UPSERT_FIELDS = ["genre", "description", "price", "image", "isbn", "row_hash", "updated_at"]
+SNIFF_BYTES = 64 * 1024
+# Undecodable bytes ki jagah yeh private-use char aata hai; aisi row clean_books me error banti hai
+UNDECODABLE = "\U0010fffd"
+codecs.register_error("library-import-mark", lambda e: (UNDECODABLE, e.end))
+
+
+class CSVImportError(Exception):
+    """The file itself could not be read as CSV."""
+
+
+class ImportConflict(Exception):
+    """Another runner is already working on the same ImportJob."""
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []   # [(row_number, message), ...]
+
+    def merge(self, other):
+        self.created += other.created
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.errors.extend(other.errors)
+
+
+def read_csv(csv_file, **kwargs):
+    """Read an uploaded CSV, retrying with Latin-1 if it is not UTF-8."""
+    try:
+        df = pd.read_csv(csv_file, encoding='utf-8-sig', **kwargs)
+    except UnicodeDecodeError:
+        csv_file.seek(0)
+        try:
+            df = pd.read_csv(csv_file, encoding='ISO-8859-1', **kwargs)
+        except Exception as e:
+            raise CSVImportError(f"Cannot read CSV file: {e}")
+    except pd.errors.EmptyDataError:
+        raise CSVImportError("CSV file has no data.")
+    return df.dropna(how='all')
+
+
+def _text(df, column, default=""):
+    if column not in df:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].fillna(default).astype(str).str.strip()
+
+
+def parse_dates(values):
+    """Vectorized parse trying each of DATE_FORMATS; NaT where none match."""
+    values = values.astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(values[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def clean_books(df, row_offset=0):
+    """
+    Normalise a raw CSV frame. Returns (clean_df, errors) where clean_df only
+    holds valid rows with columns title/author/genre/description/published_date/price/image/isbn.
+    `row_offset` = data rows skipped before this frame's index 0 (resumed reads).
+    """
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+
+    out = pd.DataFrame(index=df.index)
+    # CSV line number: header is line 1, pandas index 0 is line 2
+    out["row"] = df.index + 2 + row_offset
+    out["title"] = _text(df, "title")
+    out["author"] = _text(df, "author", DEFAULT_AUTHOR).replace("", DEFAULT_AUTHOR)
+    out["genre"] = _text(df, "genre")
+    out["description"] = _text(df, "description")
+    out["image"] = _text(df, "image")
+    out["isbn"] = _text(df, "isbn").str.replace(r"[\s-]", "", regex=True).str.upper()
+    out["published_date"] = parse_dates(df["published_date"]) if "published_date" in df else pd.NaT
+    if "price" in df:
+        out["price"] = pd.to_numeric(df["price"], errors='coerce').where(df["price"].notna(), 0)
+    else:
+        out["price"] = 0.0
+
+    undecodable = pd.Series(False, index=df.index)
+    for column in df.columns:
+        if df[column].dtype == object:
+            undecodable |= df[column].str.contains(UNDECODABLE, regex=False, na=False)
+
+    errors = []
+    checks = [
+        (undecodable, "row has bytes that are not valid in the file's encoding"),
+        (out["title"] == "", "title is required"),
+        (out["published_date"].isna(), "published_date must be DD-MM-YYYY, YYYY-MM-DD or DD/MM/YYYY"),
+        (out["price"].isna() | (out["price"] < 0), "price must be a non-negative number"),
+        # DecimalField(max_digits=8, decimal_places=2): 2 decimals par round hoke bhi 6 digits me aaye
+        (out["price"].round(2) >= 10 ** 6, "price must be less than 1000000"),
+        (out["title"].str.len() > 200, "title is longer than 200 characters"),
+        (out["author"].str.len() > 100, "author is longer than 100 characters"),
+        (out["genre"].str.len() > 100, "genre is longer than 100 characters"),
+        ((out["isbn"] != "") & ~out["isbn"].str.match(ISBN_RE), "isbn must have 10 or 13 digits"),
+    ]
+    bad = pd.Series(False, index=out.index)
+    for mask, message in checks:
+        mask = mask & ~bad   # har row ka sirf pehla error
+        errors += [(int(r), message) for r in out.loc[mask, "row"]]
+        bad |= mask
+    return out[~bad], sorted(errors)
+
+
+def resolve_authors(names):
+    """
+    {name: author_id} for every name, creating the missing ones in bulk.
+    Same naam ke kai authors hon to sabse purana (chhota id) milta hai.
+    """
+    names = list(dict.fromkeys(names))
+    ids = {}
+    for i in range(0, len(names), LOOKUP_CHUNK):
+        ids.update(Author.objects.filter(name__in=names[i:i + LOOKUP_CHUNK]).order_by("-id").values_list("name", "id"))
+    missing = [n for n in names if n not in ids]
+    if missing:
+        Author.objects.bulk_create([Author(name=n) for n in missing], batch_size=LOOKUP_CHUNK)
+        for i in range(0, len(missing), LOOKUP_CHUNK):
+            ids.update(Author.objects.filter(name__in=missing[i:i + LOOKUP_CHUNK]).values_list("name", "id"))
+    return ids
+
+
+def _attach_image(book, img_path):
+    img_full_path = os.path.join(settings.BASE_DIR, img_path)
+    if os.path.exists(img_full_path):
+        with open(img_full_path, 'rb') as f:
+            book.image.save(os.path.basename(img_path), File(f), save=False)
+
+
+def row_hashes(clean):
+    """SHA-1 of every imported column, per row (change detection)."""
+    parts = [
+        clean["title"], clean["author"], clean["genre"], clean["description"],
+        clean["published_date"].dt.strftime("%Y-%m-%d"),
+        clean["price"].map("{:.2f}".format), clean["image"], clean["isbn"],
+    ]
+    joined = parts[0].str.cat(parts[1:], sep="\x1f")
+    return [hashlib.sha1(v.encode()).hexdigest() for v in joined]
+
+
+def existing_books(keys, isbns):
+    """
+    Books already in the DB for these natural keys / ISBNs:
+    ({(title, author_id, date): row}, {isbn: row}) with row = (id, isbn, row_hash, image).
+    """
+    by_key, by_isbn = {}, {}
+    fields = ("id", "title", "author_id", "published_date", "isbn", "row_hash", "image")
+    titles = list({k[0] for k in keys})
+    wanted = set(keys)
+    for i in range(0, len(titles), LOOKUP_CHUNK):
+        for pk, title, author_id, published, isbn, row_hash, image in (
+            Book.objects.filter(title__in=titles[i:i + LOOKUP_CHUNK]).values_list(*fields)
+        ):
+            if (title, author_id, published) in wanted:
+                by_key[(title, author_id, published)] = (pk, isbn, row_hash, image)
+    isbns = list(isbns)
+    for i in range(0, len(isbns), LOOKUP_CHUNK):
+        for pk, title, author_id, published, isbn, row_hash, image in (
+            Book.objects.filter(isbn__in=isbns[i:i + LOOKUP_CHUNK]).values_list(*fields)
+        ):
+            by_isbn[isbn] = (pk, isbn, row_hash, image)
+    return by_key, by_isbn
+
+
+def import_books(df, row_offset=0, batch_size=None):
+    """
+    Validate and upsert every row of `df`. Rows whose hash matches the
+    stored `row_hash` are skipped entirely. Returns an ImportResult.
+    """
+    batch_size = batch_size or settings.CSV_IMPORT_BATCH_SIZE
+    result = ImportResult()
+    clean, errors = clean_books(df, row_offset)
+    result.errors = errors
+    if clean.empty:
+        return result
+
+    with transaction.atomic():
+        author_ids = resolve_authors(clean["author"])
+        clean = clean.assign(
+            author_id=clean["author"].map(author_ids),
+            date=clean["published_date"].dt.date,
+            row_hash=row_hashes(clean),
+        )
+        # Ek hi file me same book do baar ho to aakhri row jeetti hai
+        clean = clean.drop_duplicates(["title", "author_id", "date"], keep="last")
+        clean = clean[(clean["isbn"] == "") | ~clean.duplicated("isbn", keep="last")]
+
+        keys = list(zip(clean["title"], clean["author_id"], clean["date"]))
+        by_key, by_isbn = existing_books(keys, set(clean["isbn"]) - {""})
+
+        upserts = {"key": [], "isbn": []}
+        new_refs = Counter()   # bulk_create par Blob refcount signals nahi chalte
+        for row, key in zip(clean.itertuples(index=False), keys):
+            group, match = "key", by_key.get(key)
+            if row.isbn and row.isbn in by_isbn:
+                group, match = "isbn", by_isbn[row.isbn]
+                other = by_key.get(key)
+                if other and other[0] != match[0]:
+                    result.errors.append((row.row, f"book #{other[0]} already has this title, author and date"))
+                    continue
+            elif row.isbn and match and match[1]:
+                result.errors.append((row.row, f"matches book #{match[0]} which has ISBN {match[1]}"))
+                continue
+            if match and match[2] == row.row_hash:
+                result.unchanged += 1
+                continue
+
+            book = Book(
+                title=row.title,
+                author_id=row.author_id,
+                genre=row.genre,
+                description=row.description,
+                published_date=row.date,
+                price=Decimal(str(round(row.price, 2))),
+                isbn=row.isbn or (match[1] if match else None),
+                row_hash=row.row_hash,
+            )
+            # Content-addressed storage: same image = same naam, disk par dobara nahi likhi jaati
+            if row.image:
+                _attach_image(book, row.image)
+            old_image = match[3] if match else ""
+            if not book.image and old_image:
+                book.image = old_image   # feed me image nahi / file missing - purani rehne do
+            if (book.image.name or "") != old_image:
+                new_refs[book.image.name] += 1
+                new_refs[old_image] -= 1
+            upserts[group].append(book)
+            if match:
+                result.updated += 1
+            else:
+                result.created += 1
+
+        if upserts["key"]:
+            Book.objects.bulk_create(
+                upserts["key"], batch_size=batch_size, update_conflicts=True,
+                unique_fields=NATURAL_KEY, update_fields=UPSERT_FIELDS,
+            )
+        if upserts["isbn"]:
+            Book.objects.bulk_create(
+                upserts["isbn"], batch_size=batch_size, update_conflicts=True,
+                unique_fields=["isbn"], update_fields=NATURAL_KEY + UPSERT_FIELDS,
+            )
+        for name, delta in new_refs.items():
+            if delta:
+                Blob.adjust(name, delta)
+            if delta > 0 and is_content_addressed(name):
+                enqueue("library.tasks.make_image_derivatives", coalesce=True, source_name=name)
+        changed = upserts["key"] + upserts["isbn"]
+        if changed:
+            # update_conflicts par Django 4.2 pk wapas nahi deta - natural key se dhoondo
+            by_key, _ = existing_books([(b.title, b.author_id, b.published_date) for b in changed], ())
+            # bulk_create signals nahi chalata - search index khud update karo
+            search.index_book_ids(row[0] for row in by_key.values())
+            transaction.on_commit(bump_catalogue_version)
+    result.errors.sort()
+    return result
+
+
+# ---------- Streaming import ----------
+
+def sniff_encoding(f, size=SNIFF_BYTES):
+    """'utf-8-sig' if the first `size` bytes decode as UTF-8, else Latin-1."""
+    prefix = f.read(size)
+    f.seek(0)
+    try:
+        # final=False: prefix ke end par kata hua multi-byte char error nahi hai
+        codecs.getincrementaldecoder("utf-8-sig")().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return "ISO-8859-1"
+    return "utf-8-sig"
+
+
+def iter_chunks(f, encoding, chunk_size):
+    """Yield DataFrames of `chunk_size` data rows; index continues across chunks."""
+    try:
+        # dtype=str: har chunk ka type alag infer na ho ("1984" vs 1984.0).
+        # Django File wrapper ko pandas binary nahi samajhta (encoding ignore
+        # kar deta hai), isliye andar wala raw file object dete hain
+        yield from pd.read_csv(
+            getattr(f, "file", f), encoding=encoding, encoding_errors="library-import-mark",
+            dtype=str, chunksize=chunk_size,
+        )
+    except pd.errors.EmptyDataError:
+        return
+    except (pd.errors.ParserError, ValueError) as e:
+        raise CSVImportError(f"Cannot read CSV file: {e}")
+
+
+def _import_chunk(import_job, chunk):
+    """
+    Insert one chunk and record progress in the same transaction. The
+    progress UPDATE is conditional on `chunks_done`, so if another runner
+    already committed this chunk ours rolls back instead of duplicating it.
+    """
+    room = max(0, settings.CSV_IMPORT_MAX_ERRORS - len(import_job.errors))
+    with transaction.atomic():
+        result = import_books(chunk.dropna(how='all'))
+        errors = import_job.errors + [list(e) for e in result.errors[:room]]
+        progress = dict(
+            chunks_done=import_job.chunks_done + 1,
+            rows_done=import_job.rows_done + len(chunk),
+            created_count=import_job.created_count + result.created,
+            updated_count=import_job.updated_count + result.updated,
+            unchanged_count=import_job.unchanged_count + result.unchanged,
+            error_count=import_job.error_count + len(result.errors),
+            errors=errors,
+            updated_at=timezone.now(),
+        )
+        claimed = ImportJob.objects.filter(
+            pk=import_job.pk, chunks_done=import_job.chunks_done,
+        ).update(**progress)
+        if not claimed:
+            raise ImportConflict(f"Import #{import_job.pk} chunk {import_job.chunks_done} already committed")
+    for field, value in progress.items():
+        setattr(import_job, field, value)
+
+
+def start_import(uploaded_file, user=None):
+    """Store the upload as an ImportJob and queue it for the worker."""
+    import_job = ImportJob.objects.create(
+        file=uploaded_file,
+        original_name=uploaded_file.name[:255],
+        chunk_size=settings.CSV_IMPORT_CHUNK_SIZE,
+        created_by=user if user and user.is_authenticated else None,
+    )
+    # Retry = resume, isliye attempts thode zyada
+    enqueue("library.tasks.run_import_job", max_attempts=10, import_id=import_job.id)
+    return import_job
+
+
+def run_import(import_job, time_budget=None):
+    """
+    Stream `import_job.file` into the catalogue, resuming after the last
+    committed chunk. With `time_budget` (seconds) it stops after the chunk
+    that crosses the budget and returns False; True once the file is done.
+    Unexpected errors are re-raised so the job queue can retry (= resume).
+    """
+    if import_job.is_finished:
+        return True
+    import_job.status = ImportJob.RUNNING
+    import_job.save(update_fields=["status", "updated_at"])
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    try:
+        with import_job.file.open("rb") as f:
+            if not import_job.encoding:
+                import_job.encoding = sniff_encoding(f)
+                import_job.save(update_fields=["encoding", "updated_at"])
+            for number, chunk in enumerate(iter_chunks(f, import_job.encoding, import_job.chunk_size)):
+                # Chunk boundaries fixed hain (chunk_size job par save hai), to
+                # committed chunks sirf parse hote hain, dobara insert nahi
+                if number < import_job.chunks_done:
+                    continue
+                _import_chunk(import_job, chunk)
+                reset_queries()   # DEBUG=True me query log har chunk ke saath badhta rehta
+                if deadline and time.monotonic() > deadline:
+                    return False
+    except ImportConflict:
+        return True   # dusra runner isse aage le ja raha hai
+    except CSVImportError as e:
+        # File hi kharab hai - retry se kuch nahi badlega
+        import_job.status = ImportJob.FAILED
+        import_job.last_error = str(e)
+        import_job.finished_at = timezone.now()
+        import_job.save(update_fields=["status", "last_error", "finished_at", "updated_at"])
+        return True
+    except Exception as e:
+        import_job.last_error = str(e)
+        import_job.save(update_fields=["last_error", "updated_at"])
+        raise
+
+    import_job.status = ImportJob.DONE
+    import_job.finished_at = timezone.now()
+    import_job.save(update_fields=["status", "finished_at", "updated_at"])
+    return True
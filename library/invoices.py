@@ -0,0 +1,118 @@
+# library/invoices.py
+"""
+Bulk invoice export - ek din/mahine ke saare orders ek saath.
+
+Orders DB se `.iterator()` me batches me aate hain (main process), har batch
+ke PDF contexts `ProcessPoolExecutor` workers render karte hain, aur result
+aate hi output me likh diye jaate hain:
+
+* `iter_merged_pdf` - ek multi-page PDF (workers sirf page content stamp
+  karte hain, `OrderPdfWriter` unhe file me jodta hai)
+* `iter_zip` - har order ki alag PDF, ZIP entries incrementally likhi jaati hain
+
+Dono generators bytes yield karte hain (file me likho ya StreamingHttpResponse
+me do). Ek waqt me sirf `workers * 2` batches memory me hote hain, isliye
+10k+ orders par bhi memory flat rehti hai.
+"""
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .utils.pdf import OrderPdfWriter, get_template, order_pdf_context, render_order_pdf
+
+
+class _Buffer:
+    """Write-only sink that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+# ---------- Workers (module level - picklable) ----------
+
+def stamp_pages(contexts):
+    template = get_template()
+    return [template.stamp(context) for context in contexts]
+
+
+def render_pdfs(contexts):
+    return [(context["order_id"], render_order_pdf(context)) for context in contexts]
+
+
+# ---------- Pipeline ----------
+
+def context_batches(orders, batch_size=None):
+    """Lists of PDF contexts, read from the queryset with .iterator()."""
+    batch_size = batch_size or settings.INVOICE_EXPORT_BATCH_SIZE
+    batch = []
+    for order in orders.select_related("book__author").order_by("pk").iterator(chunk_size=batch_size):
+        batch.append(order_pdf_context(order))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _run(func, batches, workers):
+    """func(batch) for every batch, results in order; at most workers*2 batches in flight."""
+    if workers <= 1:
+        for batch in batches:
+            yield func(batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(func, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _workers(workers):
+    return settings.INVOICE_EXPORT_WORKERS if workers is None else workers
+
+
+def iter_merged_pdf(orders, workers=None, batch_size=None):
+    """One PDF, one page per order, as a stream of byte chunks."""
+    out = _Buffer()
+    writer = OrderPdfWriter(out)
+    for pages in _run(stamp_pages, context_batches(orders, batch_size), _workers(workers)):
+        for page in pages:
+            writer.add_page(page)
+        yield out.drain()
+    writer.close()
+    yield out.drain()
+
+
+def iter_zip(orders, workers=None, batch_size=None):
+    """ZIP of `order_<id>.pdf` files, as a stream of byte chunks."""
+    out = _Buffer()
+    # _Buffer me seek/tell nahi hai -> zipfile data descriptors use karta hai
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        for pdfs in _run(render_pdfs, context_batches(orders, batch_size), _workers(workers)):
+            for order_id, pdf_bytes in pdfs:
+                archive.writestr(f"order_{order_id}.pdf", pdf_bytes)
+            yield out.drain()
+    yield out.drain()
+
+
+EXPORTERS = {
+    "pdf": (iter_merged_pdf, "application/pdf"),
+    "zip": (iter_zip, "application/zip"),
+}
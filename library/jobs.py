@@ -0,0 +1,192 @@
+# library/jobs.py
+"""
+Chhota sa DB-backed job queue (outbox pattern).
+
+`enqueue()` ek Job row likhta hai - agar caller transaction me hai to job
+usi transaction ke saath commit hota hai. `manage.py run_jobs` worker pending
+jobs claim karke chalata hai, fail hone par exponential backoff se retry.
+Tests / local dev ke liye `JOBS_EAGER = True` job ko commit ke turant baad
+isi process me chala deta hai.
+"""
+import hashlib
+import json
+import logging
+import socket
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _coalesce_key(name, payload):
+    raw = json.dumps([name, payload], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def enqueue(name, delay=0, max_attempts=None, coalesce=False, **payload):
+    """
+    Queue `name` (dotted path of a task function) with JSON kwargs.
+
+    `coalesce=True` reuses an already pending job with the same name and
+    payload, so bursts (e.g. many orders) collapse into one run. Job ki
+    partial unique constraint isse concurrent enqueue me bhi pakka karti hai.
+    """
+    from .models import Job
+
+    fields = dict(
+        name=name,
+        payload=payload,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or _setting("JOBS_MAX_ATTEMPTS", 5),
+    )
+    if not coalesce:
+        job = Job.objects.create(**fields)
+    else:
+        key = _coalesce_key(name, payload)
+        for attempt in range(3):
+            pending = Job.objects.filter(name=name, payload=payload, status=Job.PENDING).first()
+            if pending:
+                return pending
+            try:
+                with transaction.atomic():
+                    job = Job.objects.create(coalesce_key=key, **fields)
+                break
+            except IntegrityError:
+                # Doosre process ne abhi wahi job banaya - agle round me wahi milega
+                # (ya woh claim ho chuka hai, tab naya banega)
+                if attempt == 2:
+                    raise
+    if _setting("JOBS_EAGER", False):
+        transaction.on_commit(lambda: run_job(job.id))
+    return job
+
+
+def backoff_seconds(attempts):
+    """Delay before retry number `attempts` (1, 2, 3 ...)."""
+    base = _setting("JOBS_BACKOFF_BASE", 30)
+    cap = _setting("JOBS_BACKOFF_MAX", 3600)
+    return min(base * 2 ** (attempts - 1), cap)
+
+
+def claim(job_id):
+    """Atomically flip a job to running; False if another worker got it."""
+    from .models import Job
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=_setting("JOBS_LOCK_TIMEOUT", 600))
+    claimable = Job.objects.filter(_claimable_q(now, stale), pk=job_id)
+    # Running job coalesce nahi karta: naya enqueue naya pending job banaye.
+    # Stale running job = pichhla worker beech me mar gaya; woh bhi ek attempt hai
+    return claimable.update(
+        status=Job.RUNNING, locked_at=now, coalesce_key=None,
+        attempts=Case(When(status=Job.RUNNING, then=F("attempts") + 1), default=F("attempts"),
+                      output_field=PositiveIntegerField()),
+    ) == 1
+
+
+def _claimable_q(now, stale):
+    from .models import Job
+
+    # Pending jobs jinka time aa gaya, ya running jobs jinka worker mar gaya
+    return Q(status=Job.PENDING, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale)
+
+
+def run_job(job_id):
+    """Claim and execute one job. Returns True if it ran successfully."""
+    from .models import Job
+
+    if not claim(job_id):
+        return False
+    job = Job.objects.get(pk=job_id)
+    if job.attempts >= job.max_attempts:
+        # Har baar worker hi mar gaya (OOM / kill) - ab aur retry nahi
+        job.status = Job.FAILED
+        job.locked_at = None
+        job.finished_at = timezone.now()
+        job.last_error = job.last_error or "worker died while running this job"
+        job.save(update_fields=["status", "locked_at", "finished_at", "last_error"])
+        logger.error("❌ %s failed permanently: worker died %s times", job, job.attempts)
+        return False
+    job.attempts += 1
+    try:
+        func = import_string(job.name)
+        func(**job.payload)
+    except Exception as e:
+        job.last_error = "".join(traceback.format_exception(e))[-4000:]
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("❌ %s failed permanently: %s", job, e)
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(seconds=backoff_seconds(job.attempts))
+            logger.warning("⚠️ %s failed (attempt %s), retrying: %s", job, job.attempts, e)
+        job.locked_at = None
+        job.save(update_fields=["attempts", "status", "run_at", "locked_at", "last_error", "finished_at"])
+        return False
+
+    job.status = Job.DONE
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=["attempts", "status", "locked_at", "finished_at"])
+    return True
+
+
+def due_job_ids(limit):
+    from .models import Job
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=_setting("JOBS_LOCK_TIMEOUT", 600))
+    return list(
+        Job.objects.filter(_claimable_q(now, stale))
+        .order_by("run_at", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_pending(limit=100, executor=None):
+    """Run up to `limit` due jobs, optionally on a thread pool. Returns how many were picked."""
+    ids = due_job_ids(limit)
+    if executor is None:
+        for job_id in ids:
+            run_job(job_id)
+    else:
+        list(executor.map(_run_in_thread, ids))
+    return len(ids)
+
+
+def work(workers=None, batch_size=None, poll_interval=None, once=False):
+    """Worker loop used by `manage.py run_jobs`."""
+    workers = workers or _setting("JOBS_WORKERS", 4)
+    batch_size = batch_size or _setting("JOBS_BATCH_SIZE", 50)
+    poll_interval = poll_interval if poll_interval is not None else _setting("JOBS_POLL_INTERVAL", 1.0)
+
+    logger.info("🚀 Job worker started on %s with %s threads", socket.gethostname(), workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job") as pool:
+        while True:
+            ran = run_pending(batch_size, executor=pool)
+            if once:
+                return ran
+            if not ran:
+                close_old_connections()
+                time.sleep(poll_interval)
@@ -0,0 +1,175 @@
+# library/mail.py
+"""
+Email dispatch with pooled backend connections.
+
+`EmailMessage.send()` har message ke liye naya SMTP connection (TCP + TLS +
+AUTH) kholta hai. Yahan job worker ke threads ek chhote pool se already
+khula connection uthaate hain, saare messages ek `send_messages()` call me
+bhejte hain aur connection wapas pool me rakh dete hain.
+
+    from library import mail
+    mail.send_messages([admin_email, user_email])
+    errors = mail.deliver(messages)   # bulk: har message ka alag result
+
+Pool ka connection `EMAIL_POOL_IDLE_TIMEOUT` se zyada idle ho ya
+`EMAIL_POOL_MAX_MESSAGES` bhej chuka ho to band karke naya khulta hai
+(SMTP servers idle connections kaat dete hain). Pool se uthaya connection
+pehle NOOP se check hota hai - server ne use kaat diya ho to kuch bhejne se
+pehle hi naya khulta hai. Bhejte waqt connection gire to message dobara nahi
+bheja jaata: server DATA le chuka ho sakta hai, aur retry = duplicate mail.
+"""
+import logging
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    def __init__(self):
+        self.backend = get_connection(fail_silently=False)
+        self.backend.open()
+        self.used_at = time.monotonic()
+        self.sent = 0
+
+    def expired(self):
+        now = time.monotonic()
+        return (now - self.used_at > settings.EMAIL_POOL_IDLE_TIMEOUT
+                or self.sent >= settings.EMAIL_POOL_MAX_MESSAGES)
+
+    def close(self):
+        try:
+            self.backend.close()
+        except Exception:   # connection already gone - kuch karna nahi
+            pass
+
+    def alive(self):
+        """NOOP on the SMTP socket; False if the server already dropped it. Non-SMTP backends: True."""
+        smtp = getattr(self.backend, "connection", None)
+        if smtp is None:
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+
+_pool = []
+_lock = threading.Lock()
+
+
+def _checkout():
+    while True:
+        with _lock:
+            conn = _pool.pop() if _pool else None
+        if conn is None:
+            return _PooledConnection()
+        if not conn.expired():
+            if conn.alive():
+                return conn
+            logger.info("Pooled SMTP connection was dropped by the server, reconnecting")
+        conn.close()
+
+
+def _checkin(conn):
+    conn.used_at = time.monotonic()
+    with _lock:
+        if len(_pool) < settings.EMAIL_POOL_SIZE:
+            _pool.append(conn)
+            return
+    conn.close()
+
+
+def close_all():
+    """Close every pooled connection (tests, shutdown, settings change)."""
+    with _lock:
+        conns, _pool[:] = list(_pool), []
+    for conn in conns:
+        conn.close()
+
+
+def _key(message):
+    return (message.from_email, tuple(message.recipients()), message.subject, message.body)
+
+
+def dedupe(messages):
+    """Drop exact repeats (same sender, recipients, subject and body), keeping order."""
+    seen = set()
+    unique = []
+    for message in messages:
+        key = _key(message)
+        if key not in seen:
+            seen.add(key)
+            unique.append(message)
+    return unique
+
+
+def send_messages(messages):
+    """Send `messages` over one pooled connection, in EMAIL_BATCH_SIZE groups. Returns how many went out."""
+    messages = dedupe(messages)
+    sent = 0
+    size = settings.EMAIL_BATCH_SIZE
+    for i in range(0, len(messages), size):
+        sent += _send_batch(messages[i:i + size])
+    return sent
+
+
+def _send_batch(batch):
+    conn = _checkout()
+    try:
+        sent = conn.backend.send_messages(batch) or 0
+    except Exception:
+        # Retry nahi: server kuch messages le chuka ho sakta hai
+        conn.close()
+        raise
+    conn.sent += sent
+    _checkin(conn)
+    return sent
+
+
+def send(message):
+    return send_messages([message])
+
+
+def deliver(messages):
+    """
+    Send every message on one pooled connection and report each one:
+    returns a list with None (sent) or the exception for that message.
+    Ek recipient fail ho to baaki chalte rehte hain; server hi na mile to
+    exception bahar jaata hai (caller baad me resume kare).
+    """
+    results = []
+    conn = _checkout()
+    for message in messages:
+        if conn is None or conn.expired():
+            if conn is not None:
+                conn.close()
+            conn = _PooledConnection()
+        try:
+            conn.backend.send_messages([message])
+        except Exception as e:
+            # Connection ki halat pata nahi - agle message ke liye naya. Yeh
+            # message dobara nahi: connection DATA ke baad gira ho to server
+            # use le chuka hoga
+            conn.close()
+            conn = None
+            results.append(e)
+            continue
+        conn.sent += 1
+        results.append(None)
+    if conn is not None:
+        _checkin(conn)
+    return results
+
+
+@receiver(setting_changed)
+def _reset_pool(setting, **kwargs):
+    # override_settings(EMAIL_BACKEND=...) ke baad purane backend ke connections nahi
+    if setting.startswith("EMAIL_"):
+        close_all()
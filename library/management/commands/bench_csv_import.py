@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from library.importers import import_books
+
+
+def synthetic_catalogue(rows, authors=None, seed=0, prefix="Bench"):
+    """Random CSV-shaped frame with a mix of the accepted date formats."""
+    rng = np.random.default_rng(seed)
+    authors = authors or max(1, rows // 20)
+    days = pd.to_datetime("1950-01-01") + pd.to_timedelta(rng.integers(0, 27000, rows), unit="D")
+    fmt = rng.integers(0, 3, rows)
+    dates = np.where(fmt == 0, days.strftime("%d-%m-%Y"),
+                     np.where(fmt == 1, days.strftime("%Y-%m-%d"), days.strftime("%d/%m/%Y")))
+    return pd.DataFrame({
+        "title": [f"{prefix} Book {i}" for i in range(rows)],
+        "author": [f"{prefix} Author {i}" for i in rng.integers(0, authors, rows)],
+        "genre": rng.choice(["Fiction", "History", "Science", "Poetry"], rows),
+        "published_date": dates,
+        "price": rng.integers(100, 100000, rows) / 100,
+        "description": "Generated for the import benchmark.",
+    })
+
+
+class Command(BaseCommand):
+    help = "Measure CSV import throughput (rows/second) and unchanged re-import time. Every run is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'rows':>8} {'seconds':>9} {'rows/s':>10} {'re-import s':>12}")
+        for size in options["sizes"]:
+            # Naya prefix, taaki DB me pehle se padi bench books se upsert na ho
+            df = synthetic_catalogue(size, prefix=f"Bench {time.time_ns()}")
+            with transaction.atomic():
+                start = time.perf_counter()
+                result = import_books(df)
+                elapsed = time.perf_counter() - start
+                # Same feed dobara - sab rows hash se skip honi chahiye
+                start = time.perf_counter()
+                again = import_books(df)
+                reimport = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if result.created != size:
+                raise CommandError(f"{size} rows: only {result.created} created, errors {result.errors[:5]}")
+            if again.unchanged != size:
+                raise CommandError(f"{size} rows: re-import was not a no-op "
+                                   f"(created {again.created}, updated {again.updated})")
+            self.stdout.write(f"{size:>8} {elapsed:>9.2f} {size / elapsed:>10.0f} {reimport:>12.2f}")
@@ -0,0 +1,215 @@
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from library.models import Author, Book, NewsletterSubscriber, Order
+from library.pagination import encode_cursor, keyset_queryset
+
+# Jin models ke Meta.indexes is benchmark ka "index plan" hain
+PLAN_MODELS = (Author, Book, Order)
+SEED_BATCH = 10000
+
+
+@contextmanager
+def _raw_created_at():
+    """bulk_create me apna created_at rakhne do (auto_now_add warna now() likh deta)."""
+    field = Order._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed(stdout, books, orders, seed=0):
+    """Top Book/Order up to `books`/`orders` rows (bulk_create - no signals, no search index)."""
+    rng = np.random.default_rng(seed)
+    prefix = f"Seed {time.time_ns()}"
+
+    missing = books - Book.objects.count()
+    if missing > 0:
+        Author.objects.bulk_create(
+            [Author(name=f"{prefix} Author {i}") for i in range(max(1, missing // 20))], batch_size=SEED_BATCH)
+        author_ids = list(Author.objects.filter(name__startswith=prefix).values_list("pk", flat=True))
+        genres = ["Fiction", "History", "Science", "Poetry", "Drama", "Children", "Biography", "Travel"]
+        for start in range(0, missing, SEED_BATCH):
+            n = min(SEED_BATCH, missing - start)
+            days = rng.integers(0, 27000, n)
+            with transaction.atomic():
+                Book.objects.bulk_create([
+                    Book(title=f"{prefix} Book {start + i}", author_id=author_ids[a], genre=genres[g],
+                         published_date=datetime(1950, 1, 1).date() + timedelta(days=int(d)),
+                         price=int(p) / 100, like_count=int(lk))
+                    for i, (a, g, d, p, lk) in enumerate(zip(
+                        rng.integers(0, len(author_ids), n), rng.integers(0, len(genres), n), days,
+                        rng.integers(5000, 200000, n), rng.zipf(2.0, n) - 1))
+                ], batch_size=SEED_BATCH)
+            stdout.write(f"  books  {start + n:>9}/{missing}", ending="\r")
+        stdout.write("")
+
+    missing = orders - Order.objects.count()
+    if missing > 0:
+        book_ids = np.fromiter(Book.objects.values_list("pk", flat=True).iterator(), dtype=np.int64)
+        customers = max(1, missing // 25)
+        # Orders pk order me hi time me aage badhte hain (pichle 2 saal)
+        first = timezone.now() - timedelta(days=730)
+        step = timedelta(days=730) / missing
+        with _raw_created_at():
+            for start in range(0, missing, SEED_BATCH):
+                n = min(SEED_BATCH, missing - start)
+                with transaction.atomic():
+                    Order.objects.bulk_create([
+                        Order(book_id=int(b), name=f"Customer {c}", email=f"customer{c}@example.com",
+                              phone=f"9{c:09d}", address="MG Road, Lucknow", quantity=int(q),
+                              status="cancelled" if s < 0.08 else "confirmed",
+                              created_at=first + step * (start + i))
+                        for i, (b, c, q, s) in enumerate(zip(
+                            rng.choice(book_ids, n), rng.integers(0, customers, n),
+                            rng.integers(1, 4, n), rng.random(n)))
+                    ], batch_size=SEED_BATCH)
+                stdout.write(f"  orders {start + n:>9}/{missing}", ending="\r")
+        stdout.write("")
+
+
+def cases():
+    """(label, queryset factory) - har ek kisi view/admin page ki asli query."""
+    per_page = settings.BOOKS_PER_PAGE
+    books = Book.objects.select_related("author").with_like_state(AnonymousUser())
+
+    def page(sort, **filters):
+        desc = sort.startswith("-")
+        return lambda: books.filter(**filters).order_by(sort, "-pk" if desc else "pk")[:per_page + 1]
+
+    count = Book.objects.count()
+    if not count:
+        raise CommandError("No books to benchmark - run with --seed (and --books/--orders) first")
+    mid = Book.objects.order_by("pk").values("pk", "published_date")[count // 2]
+    author_id = Book.objects.values_list("author_id", flat=True).order_by("pk")[count // 3]
+    newest = Order.objects.order_by("-pk").values("created_at", "email").first() or {
+        "created_at": timezone.now(), "email": "nobody@example.com"}
+    day = timezone.localtime(newest["created_at"]).date() - timedelta(days=30)
+    day_start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    admin_orders = Order.objects.select_related("book").order_by("-created_at", "-pk")
+
+    return [
+        ("book_list ?sort=-published_date", page("-published_date")),
+        ("book_list ?sort=-published_date page 2", lambda: keyset_queryset(
+            books, "-published_date", encode_cursor([mid["published_date"], mid["pk"]]))[:per_page + 1]),
+        ("book_list ?sort=title", page("title")),
+        ("book_list ?sort=price", page("price")),
+        ("book_list ?sort=-like_count", page("-like_count")),
+        ("book_list ?sort=author__name", page("author__name")),
+        ("book_list ?author=<id>", page("-published_date", author_id=author_id)),
+        ("book_list authors dropdown", lambda: Author.objects.only("id", "name").order_by("name")),
+        ("api_books_by_genre", lambda: Book.objects.values("genre").annotate(count=Count("id")).order_by("-count")),
+        ("api_top_authors", lambda: Book.objects.values("author__name").annotate(
+            count=Count("id")).order_by("-count")[:8]),
+        ("admin orders ?status=cancelled", lambda: admin_orders.filter(status="cancelled")[:100]),
+        ("admin orders ?created_at=<day>", lambda: admin_orders.filter(
+            created_at__gte=day_start, created_at__lt=day_start + timedelta(days=1))[:100]),
+        ("admin orders ?status&created_at", lambda: admin_orders.filter(
+            status="cancelled", created_at__gte=day_start, created_at__lt=day_start + timedelta(days=1))[:100]),
+        ("admin orders ?q=<email>", lambda: admin_orders.filter(
+            Q(name__icontains=newest["email"]) | Q(email__icontains=newest["email"])
+            | Q(phone__icontains=newest["email"]) | Q(book__title__icontains=newest["email"]))[:100]),
+        ("order_pdf owner (email=)", lambda: Order.objects.filter(email=newest["email"]).order_by("-created_at")[:20]),
+        ("rollup_sales last day", lambda: Order.objects.filter(
+            created_at__gte=day_start + timedelta(days=30)).values_list(
+            "created_at", "book_id", "status", "quantity", Coalesce("unit_price", "book__price"))),
+        ("newsletter subscribe check", lambda: NewsletterSubscriber.objects.filter(email=newest["email"])[:1]),
+    ]
+
+
+def plan_indexes():
+    return [(model, index) for model in PLAN_MODELS for index in model._meta.indexes]
+
+
+def _existing_indexes(model):
+    with connection.cursor() as cursor:
+        return set(connection.introspection.get_constraints(cursor, model._meta.db_table))
+
+
+@contextmanager
+def without_plan_indexes(stdout):
+    """Plan ke indexes drop karo ("before"), baad me wapas banao."""
+    dropped = [(m, i) for m, i in plan_indexes() if i.name in _existing_indexes(m)]
+    with connection.schema_editor() as editor:
+        for model, index in dropped:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        start = time.perf_counter()
+        with connection.schema_editor() as editor:
+            for model, index in dropped:
+                editor.add_index(model, index)
+        stdout.write(f"(re-created {len(dropped)} indexes in {time.perf_counter() - start:.1f}s)")
+
+
+def measure(runs):
+    """label -> (p50 ms, p99 ms, plan)."""
+    results = {}
+    for label, factory in cases():
+        factory().explain()   # warm-up (page cache)
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(factory())
+            samples.append((time.perf_counter() - start) * 1000)
+        cuts = statistics.quantiles(samples, n=100, method="inclusive")
+        results[label] = (cuts[49], cuts[98], factory().explain())
+    return results
+
+
+class Command(BaseCommand):
+    help = ("Seed a big catalogue/order set and report EXPLAIN plans + p50/p99 latency of the "
+            "view queries with the Meta index plan in place; --drop-indexes also measures them "
+            "with the plan dropped (before). Sirf scratch DB par chalao.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", action="store_true", help="Top up books/orders to --books/--orders first")
+        parser.add_argument("--books", type=int, default=1000000)
+        parser.add_argument("--orders", type=int, default=5000000)
+        parser.add_argument("--runs", type=int, default=50)
+        parser.add_argument("--drop-indexes", action="store_true",
+                            help="Also measure with the Meta indexes dropped (DDL on the configured DB!)")
+        parser.add_argument("--yes", action="store_true", help="Allow --drop-indexes with DEBUG=False")
+        parser.add_argument("--plans", action="store_true", help="Print EXPLAIN output for every query")
+
+    def handle(self, *args, **options):
+        if options["drop_indexes"] and not (settings.DEBUG or options["yes"]):
+            raise CommandError(f"--drop-indexes drops indexes on {connection.settings_dict['NAME']}; "
+                               "DEBUG is off, so pass --yes if this really is a scratch DB")
+        if options["seed"]:
+            start = time.perf_counter()
+            seed(self.stdout, options["books"], options["orders"])
+            self.stdout.write(f"seeded in {time.perf_counter() - start:.0f}s")
+        self.stdout.write(f"{Book.objects.count()} books, {Order.objects.count()} orders, "
+                          f"{connection.vendor}, {options['runs']} runs per query")
+
+        before = {}
+        if options["drop_indexes"]:
+            with without_plan_indexes(self.stdout):
+                before = measure(options["runs"])
+        after = measure(options["runs"])
+
+        self.stdout.write(f"\n{'query':<42} {'before p50/p99 ms':>20} {'after p50/p99 ms':>20}")
+        for label, (p50, p99, plan) in after.items():
+            old = f"{before[label][0]:.2f}/{before[label][1]:.2f}" if label in before else "-"
+            self.stdout.write(f"{label:<42} {old:>20} {f'{p50:.2f}/{p99:.2f}':>20}")
+        if options["plans"]:
+            for label, (_, _, plan) in after.items():
+                if label in before:
+                    self.stdout.write(f"\n## {label}\n-- before\n{before[label][2]}\n-- after\n{plan}")
+                else:
+                    self.stdout.write(f"\n## {label}\n{plan}")
@@ -0,0 +1,95 @@
+import logging
+import socket
+import time
+
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from library import mail
+from library.utils.pdf import render_order_pdf
+
+from .bench_pdf import sample_contexts
+
+
+class _CountingHandler:
+    def __init__(self):
+        self.sessions = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def order_messages(context, pdf_bytes):
+    """Admin + buyer receipt (with PDF) and the old separate confirmation mail."""
+    admin = EmailMessage(f"New Book Order: {context['book']} (#{context['order_id']})", "New order received.",
+                         "library@example.com", ["admin@example.com"])
+    user = EmailMessage("Your Book Order Confirmation", f"Hi {context['name']}, thanks for your order.",
+                        "library@example.com", [context["email"]])
+    for message in (admin, user):
+        message.attach(f"order_{context['order_id']}.pdf", pdf_bytes, "application/pdf")
+    confirmation = EmailMessage(f"Order Confirmation #{context['order_id']}", f"Hello {context['name']}",
+                                "library@example.com", [context["email"]])
+    return admin, user, confirmation
+
+
+class Command(BaseCommand):
+    help = "Compare per-message SMTP sends with pooled send_messages() against a local aiosmtpd server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=300)
+
+    def handle(self, *args, **options):
+        try:
+            from aiosmtpd.controller import Controller
+        except ImportError:
+            raise CommandError("bench_email needs aiosmtpd: pip install aiosmtpd")
+
+        logging.getLogger("mail.log").setLevel(logging.WARNING)   # aiosmtpd har command log karta hai
+        contexts = sample_contexts(options["orders"])
+        handler = _CountingHandler()
+        port = _free_port()
+        controller = Controller(handler, hostname="127.0.0.1", port=port)
+        controller.start()
+        try:
+            with override_settings(EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+                                   EMAIL_HOST="127.0.0.1", EMAIL_PORT=port,
+                                   EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+                                   EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD=""):
+                self.run("per-message send()", handler, contexts, self.send_each)
+                self.run("pooled send_messages", handler, contexts, self.send_pooled)
+                mail.close_all()
+        finally:
+            controller.stop()
+
+    def send_each(self, context, pdf_bytes):
+        for message in order_messages(context, pdf_bytes):
+            message.send()
+
+    def send_pooled(self, context, pdf_bytes):
+        admin, user, _ = order_messages(context, pdf_bytes)
+        mail.send_messages([admin, user])
+
+    def run(self, label, handler, contexts, send):
+        handler.sessions = handler.messages = 0
+        start = time.perf_counter()
+        for context in contexts:
+            send(context, render_order_pdf(context))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<22}: {len(contexts) / elapsed:>7.0f} orders/s  "
+            f"{handler.messages} messages over {handler.sessions} SMTP connections"
+        )
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from library.models import Book
+
+from .bench_email import _free_port
+
+# name -> server command (port, workers); dono same settings/DB/cache par
+SERVERS = {
+    "gunicorn-sync": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "mypro.wsgi:application", "--workers", str(workers),
+        "--bind", f"127.0.0.1:{port}", "--backlog", "2048", "--log-level", "warning"],
+    "uvicorn-async": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "mypro.asgi:application", "--workers", str(workers),
+        "--host", "127.0.0.1", "--port", str(port), "--backlog", "2048", "--no-access-log",
+        "--log-level", "warning"],
+}
+
+
+def typeahead_queries(clients, keystrokes, seed=0):
+    """Per client: prefixes of a word from a real title, one per keystroke ("g", "go", "god", ...)."""
+    rng = random.Random(seed)
+    last = Book.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    ids = [rng.randint(1, last) for _ in range(max(clients, 200))]
+    titles = list(Book.objects.filter(pk__in=ids).values_list("title", flat=True)) or ["book"]
+    words = [rng.choice(rng.choice(titles).lower().split() or ["book"]) for _ in range(clients)]
+    return [[word[:n] for n in range(1, min(keystrokes, len(word)) + 1)] for word in words]
+
+
+async def _client(session, url, queries, think, samples, statuses):
+    for query in queries:
+        start = time.perf_counter()
+        try:
+            async with session.get(url, params={"q": query, "fields": "id,title", "limit": 8}) as response:
+                await response.read()
+                statuses[response.status] += 1
+        except Exception as exc:   # timeout / connection reset - load test me gina jaata hai
+            statuses[type(exc).__name__] += 1
+            continue
+        samples.append((time.perf_counter() - start) * 1000)
+        if think:
+            await asyncio.sleep(think / 1000)
+
+
+async def run_load(url, queries, think, timeout):
+    """Fire every client at once; (wall seconds, latency samples ms, status counts)."""
+    import aiohttp
+
+    samples, statuses = [], Counter()
+    connector = aiohttp.TCPConnector(limit=0)   # har client ka apna connection (keep-alive)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(session, url, q, think, samples, statuses) for q in queries))
+        return time.perf_counter() - start, samples, statuses
+
+
+def _wait_until_up(url, process, seconds=30):
+    import urllib.request
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"server exited with {process.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"server did not answer {url} in {seconds}s")
+
+
+class Command(BaseCommand):
+    help = ("Load-test the type-ahead search API with N concurrent clients against gunicorn (sync "
+            "workers, mypro.wsgi) and uvicorn (async, mypro.asgi). Sirf scratch DB par chalao, "
+            "DEBUG=False ke saath.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--keystrokes", type=int, default=6, help="Requests per client (one per prefix)")
+        parser.add_argument("--think", type=int, default=0, help="ms between a client's keystrokes")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--timeout", type=float, default=60)
+        parser.add_argument("--servers", default=",".join(SERVERS), help=f"Comma list of {', '.join(SERVERS)}")
+        parser.add_argument("--url", help="Bench an already running server instead (base URL)")
+
+    def handle(self, *args, **options):
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_http needs aiohttp: pip install aiohttp")
+
+        queries = typeahead_queries(options["clients"], options["keystrokes"])
+        path = reverse("api_search_books")
+        self.stdout.write(f"{options['clients']} clients x {options['keystrokes']} keystrokes, "
+                          f"think {options['think']}ms, {options['workers']} workers, {Book.objects.count()} books")
+
+        if options["url"]:
+            self.report(options["url"], self.load(options["url"].rstrip("/") + path, queries, options))
+            return
+        for name in options["servers"].split(","):
+            if name not in SERVERS:
+                raise CommandError(f"unknown server {name!r}")
+            port = _free_port()
+            base = f"http://127.0.0.1:{port}"
+            cache.clear()   # dono ko same thanda cache
+            process = subprocess.Popen(SERVERS[name](port, options["workers"]), env=os.environ.copy())
+            try:
+                _wait_until_up(base + reverse("counters"), process)
+                self.report(name, self.load(base + path, queries, options))
+            finally:
+                process.terminate()
+                process.wait(10)
+
+    def load(self, url, queries, options):
+        return asyncio.run(run_load(url, queries, options["think"], options["timeout"]))
+
+    def report(self, name, result):
+        wall, samples, statuses = result
+        ok = statuses.get(200, 0) + statuses.get(304, 0)
+        line = f"{name:<16} {ok / wall:>8.0f} req/s"
+        if len(samples) > 1:
+            cuts = statistics.quantiles(samples, n=100, method="inclusive")
+            line += f"  p50 {cuts[49]:>7.1f}ms  p99 {cuts[98]:>8.1f}ms  max {max(samples):>8.1f}ms"
+        self.stdout.write(f"{line}  {dict(statuses)}")
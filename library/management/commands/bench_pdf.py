@@ -0,0 +1,48 @@
+import time
+from datetime import date
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from library.models import Author, Book, Order
+from library.utils.pdf import OrderPdfWriter, order_pdf_context, render_order_pdf
+
+
+def sample_contexts(count):
+    """Unsaved orders -> PDF contexts (DB touch nahi hota)."""
+    author = Author(name="Munshi Premchand")
+    book = Book(title="Godaan", author=author, price=250, published_date=date(1936, 6, 10))
+    now = timezone.now()
+    return [
+        order_pdf_context(Order(
+            id=i, book=book, name=f"Buyer {i}", email=f"buyer{i}@example.com", phone="9999999999",
+            address=f"House {i}, MG Road, Lucknow, Uttar Pradesh 226001", quantity=1 + i % 3,
+            notes="Gift wrap please" if i % 2 else "", created_at=now,
+        ))
+        for i in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measure order PDF rendering throughput (single PDFs and one merged multi-page PDF)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        contexts = sample_contexts(options["count"])
+
+        start = time.perf_counter()
+        size = sum(len(render_order_pdf(c)) for c in contexts)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"single : {len(contexts) / elapsed:>9.0f} PDFs/s  (avg {size / len(contexts):.0f} bytes)")
+
+        start = time.perf_counter()
+        out = BytesIO()
+        writer = OrderPdfWriter(out)
+        for context in contexts:
+            writer.add_order(context)
+        writer.close()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"merged : {len(contexts) / elapsed:>9.0f} pages/s ({len(out.getvalue()) / 1024:.0f} KB)")
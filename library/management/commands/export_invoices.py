@@ -0,0 +1,61 @@
+import resource
+import time
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from library.invoices import EXPORTERS
+from library.models import Order
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+class Command(BaseCommand):
+    help = "Export invoices for a day, a month or a list of orders as one merged PDF or a ZIP."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write (.pdf / .zip)")
+        parser.add_argument("--format", choices=sorted(EXPORTERS), help="Default: output file extension")
+        parser.add_argument("--day", help="YYYY-MM-DD")
+        parser.add_argument("--month", help="YYYY-MM")
+        parser.add_argument("--ids", help="Comma separated order ids")
+        parser.add_argument("--workers", type=int, help="Default: INVOICE_EXPORT_WORKERS")
+        parser.add_argument("--batch-size", type=int, help="Default: INVOICE_EXPORT_BATCH_SIZE")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or options["output"].rsplit(".", 1)[-1].lower()
+        if fmt not in EXPORTERS:
+            raise CommandError("Pass --format pdf|zip or use a .pdf/.zip output file")
+
+        orders = Order.objects.all()
+        try:
+            if options["day"]:
+                start = _day_start(date.fromisoformat(options["day"]))
+                orders = orders.filter(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+            if options["month"]:
+                first = date.fromisoformat(options["month"] + "-01")
+                following = (first + timedelta(days=32)).replace(day=1)
+                orders = orders.filter(created_at__gte=_day_start(first), created_at__lt=_day_start(following))
+            if options["ids"]:
+                orders = orders.filter(pk__in=[int(i) for i in options["ids"].split(",") if i.strip()])
+        except ValueError as e:
+            raise CommandError(f"Invalid filter: {e}")
+
+        export, _ = EXPORTERS[fmt]
+        start = time.perf_counter()
+        size = 0
+        with open(options["output"], "wb") as f:
+            for chunk in export(orders, workers=options["workers"], batch_size=options["batch_size"]):
+                f.write(chunk)
+                size += len(chunk)
+        elapsed = time.perf_counter() - start
+
+        count = orders.count()
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {count} invoices -> {options['output']} ({size / 1024 / 1024:.1f} MB) "
+            f"in {elapsed:.1f}s, peak RSS {peak_mb:.0f} MB"
+        ))
@@ -0,0 +1,94 @@
+import os
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from library.models import REFCOUNTED_FILES, Blob
+from library.storage import content_storage
+
+
+class Command(BaseCommand):
+    help = "Delete unreferenced content-addressed media blobs (and optionally adopt legacy files)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=float, default=24,
+                            help="Keep zero-ref blobs this long (upload abhi save ho raha ho sakta hai)")
+        parser.add_argument("--recount", action="store_true",
+                            help="Recompute refcounts from the database first")
+        parser.add_argument("--adopt-legacy", action="store_true",
+                            help="Move old upload_to files into the content store and delete the copies")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        if options["adopt_legacy"]:
+            self.adopt_legacy(dry_run)
+        if options["recount"] or options["adopt_legacy"]:
+            self.recount()
+
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+        storage = content_storage()
+        freed = removed = 0
+        for blob in Blob.objects.filter(refcount__lte=0, updated_at__lt=cutoff).iterator():
+            if not dry_run:
+                # Dobara check karke delete: beech me re-upload / naya reference aaya to
+                # row touch ho chuka hai aur kuch delete nahi hota. File sirf tab jaati
+                # hai jab row gayi - row lock commit tak save() ko rokta hai.
+                with transaction.atomic():
+                    deleted, _ = Blob.objects.filter(pk=blob.pk, refcount__lte=0, updated_at__lt=cutoff).delete()
+                    if not deleted:
+                        continue
+                    storage.delete(blob.name)
+            freed += blob.size
+            removed += 1
+        verb = "Would remove" if dry_run else "Removed"
+        self.stdout.write(self.style.SUCCESS(f"✅ {verb} {removed} blobs ({freed / 1024 / 1024:.1f} MB)"))
+
+    def recount(self):
+        """Refcount = rows per file name, straight from the tables."""
+        counts = {}
+        for model, field in REFCOUNTED_FILES.items():
+            rows = model.objects.exclude(**{field: ""}).values(field).annotate(n=Count("pk"))
+            for row in rows:
+                counts[row[field]] = counts.get(row[field], 0) + row["n"]
+        for blob in Blob.objects.all().iterator():
+            refcount = counts.get(blob.name, 0)
+            if blob.refcount != refcount:
+                Blob.objects.filter(pk=blob.pk).update(refcount=refcount, updated_at=timezone.now())
+
+    def adopt_legacy(self, dry_run):
+        """
+        Pre-CAS uploads `upload_to` dir me seedhe pade hain (blobs `xx/` subdirs me).
+        Jo file kisi row me use ho rahi hai use store me daal ke rows ka naam
+        badlo, phir purani file (aur bina reference waali copies) delete karo.
+        """
+        storage = content_storage()
+        adopted = removed = freed = 0
+        for model, field_name in REFCOUNTED_FILES.items():
+            field = model._meta.get_field(field_name)
+            directory = field.upload_to.rstrip("/")
+            if not storage.exists(directory):
+                continue
+            for filename in storage.listdir(directory)[1]:
+                name = f"{directory}/{filename}"
+                # Field default (profile_pics/default.png) naye rows ke liye chahiye
+                if name == field.default:
+                    continue
+                rows = model.objects.filter(**{field_name: name})
+                if rows.exists():
+                    adopted += 1
+                    if not dry_run:
+                        with storage.open(name, "rb") as f:
+                            new_name = storage.save(name, File(f, name))
+                        # .update(): signals nahi chalte, refcount baad me recount se
+                        rows.update(**{field_name: new_name})
+                removed += 1
+                freed += storage.size(name)
+                if not dry_run:
+                    os.remove(storage.path(name))
+        verb = "Would adopt" if dry_run else "Adopted"
+        self.stdout.write(f"{verb} {adopted} legacy files, removed {removed} ({freed / 1024 / 1024:.1f} MB)")
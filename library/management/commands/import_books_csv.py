@@ -0,0 +1,47 @@
+import os
+import resource
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from library.importers import run_import
+from library.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = "Stream a (large) CSV file into the catalogue chunk by chunk, or resume an interrupted import."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="CSV file to import")
+        parser.add_argument("--resume", type=int, help="ImportJob id to continue")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            try:
+                import_job = ImportJob.objects.get(pk=options["resume"])
+            except ImportJob.DoesNotExist:
+                raise CommandError(f"ImportJob #{options['resume']} not found")
+        elif options["path"]:
+            path = options["path"]
+            if not os.path.exists(path):
+                raise CommandError(f"{path} not found")
+            with open(path, "rb") as f:
+                import_job = ImportJob.objects.create(
+                    file=File(f, name=os.path.basename(path)),
+                    original_name=os.path.basename(path),
+                    chunk_size=options["chunk_size"] or settings.CSV_IMPORT_CHUNK_SIZE,
+                )
+        else:
+            raise CommandError("Give a CSV path or --resume <id>")
+
+        self.stdout.write(f"Import #{import_job.id}: starting at chunk {import_job.chunks_done}")
+        run_import(import_job)
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Import #{import_job.id} {import_job.status}: {import_job.rows_done} rows, "
+            f"{import_job.created_count} created, {import_job.updated_count} updated, "
+            f"{import_job.unchanged_count} unchanged, {import_job.error_count} skipped "
+            f"(peak RSS {peak_mb:.0f} MB)"
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from library.images import generate_derivatives
+from library.models import REFCOUNTED_FILES
+
+
+class Command(BaseCommand):
+    help = "Generate the responsive WebP/JPEG derivatives for every book image and avatar (skips existing ones)."
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field in REFCOUNTED_FILES.items():
+            names.update(model.objects.exclude(**{field: ""}).values_list(field, flat=True).distinct())
+        written = failed = 0
+        for name in sorted(n for n in names if n):
+            try:
+                written += generate_derivatives(name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"⚠️ {name}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(names)} images, {written} derivatives written, {failed} failed"))
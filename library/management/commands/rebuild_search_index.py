@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from library import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the book full-text search index from the Book table."
+
+    def handle(self, *args, **options):
+        if search.backend() is None:
+            self.stdout.write(self.style.WARNING("⚠️ No full-text index on this database; search uses icontains."))
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {count} books"))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from library.sales import rollup
+
+
+class Command(BaseCommand):
+    help = "Update the DailyBookSales rollup from the last processed order (cron: every few minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Recompute every day from scratch")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        written, since_day = rollup(rebuild=options["rebuild"])
+        scope = f"from {since_day}" if since_day else "full rebuild"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Sales rollup ({scope}): {written} rows in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from library import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (order emails, WhatsApp, Google Sheet sync...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, help="Thread pool size (default: JOBS_WORKERS)")
+        parser.add_argument("--batch-size", type=int, help="Jobs claimed per poll (default: JOBS_BATCH_SIZE)")
+        parser.add_argument("--poll-interval", type=float, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+
+    def handle(self, *args, **options):
+        ran = jobs.work(
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+            once=options["once"],
+        )
+        if options["once"]:
+            self.stdout.write(self.style.SUCCESS(f"✅ Processed {ran} job(s)"))
@@ -0,0 +1,36 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.models import Campaign
+from library.newsletter import send_campaign
+
+
+class Command(BaseCommand):
+    help = "Send (or resume) a newsletter campaign to every subscriber in this process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("campaign_id", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            campaign = Campaign.objects.get(pk=options["campaign_id"])
+        except Campaign.DoesNotExist:
+            raise CommandError(f"Campaign #{options['campaign_id']} not found")
+
+        self.stdout.write(f"Campaign #{campaign.id}: starting after subscriber {campaign.cursor}")
+        before = campaign.sent_count + campaign.failed_count
+        start = time.perf_counter()
+        if send_campaign(campaign) is None:
+            raise CommandError(f"Campaign #{campaign.id} is being sent by another worker (lease held)")
+        elapsed = time.perf_counter() - start
+
+        campaign.refresh_from_db()
+        handled = campaign.sent_count + campaign.failed_count - before
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Campaign #{campaign.id} {campaign.status}: {campaign.sent_count} sent, "
+            f"{campaign.failed_count} failed ({handled / max(elapsed, 1e-9):.0f} recipients/s, "
+            f"peak RSS {peak_mb:.0f} MB)"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from library.utils.google_sheet import push_all_orders_to_sheet
+
+
+class Command(BaseCommand):
+    help = "Send orders newer than the last synced one to the Google Sheet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Clear the sheet and rewrite every order")
+
+    def handle(self, *args, **options):
+        push_all_orders_to_sheet(full=options["full"])
@@ -0,0 +1,57 @@
+import asyncio
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise jo ASGI par bhi async chain me rehta hai.
+
+    Upstream middleware sirf sync hai; chain me ek bhi sync middleware ho to
+    Django uske neeche sab kuch har request par thread me adapt karta hai aur
+    async views ka fayda khatam. Static lookup sirf dict/stat hai, to async
+    mode me use seedha event loop par chalao aur baaki chain await karo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = super().__call__(request)   # static file, ya get_response ka coroutine
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+class ImmutableMediaMiddleware(MiddlewareMixin):
+    """
+    Far-future `Cache-Control: immutable` for media whose URL changes with
+    its content: image derivatives and content-addressed blobs
+    (images/ab/<sha256>.jpg). Django sirf DEBUG me media serve karta hai;
+    production me nginx/CDN par same rule lagana hai.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        media = re.escape(settings.MEDIA_URL)
+        self.pattern = re.compile(rf"^{media}(?:derivatives/|[^/]+/[0-9a-f]{{2}}/[0-9a-f]{{64}}\.)")
+
+    def process_response(self, request, response):
+        if response.status_code == 200 and self.pattern.match(request.path):
+            patch_cache_control(response, public=True, max_age=settings.MEDIA_IMMUTABLE_MAX_AGE, immutable=True)
+        return response
@@ -0,0 +1,59 @@
+# Full-text index for book search (see library/search.py)
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE library_book_fts USING fts5("
+                "title, author, genre, description, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+        except Exception:
+            # SQLite bina FTS5 ke compiled hai -> search icontains par chalega
+            return
+        schema_editor.execute(
+            "INSERT INTO library_book_fts (rowid, title, author, genre, description) "
+            "SELECT b.id, b.title, a.name, b.genre, COALESCE(b.description, '') "
+            "FROM library_book b JOIN library_author a ON a.id = b.author_id"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE library_book_search ("
+            "book_id bigint PRIMARY KEY REFERENCES library_book (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX library_book_search_document_gin ON library_book_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO library_book_search (book_id, document) "
+            "SELECT b.id, "
+            "setweight(to_tsvector('simple', b.title), 'A') || "
+            "setweight(to_tsvector('simple', a.name), 'B') || "
+            "setweight(to_tsvector('simple', b.genre), 'C') || "
+            "setweight(to_tsvector('simple', COALESCE(b.description, '')), 'D') "
+            "FROM library_book b JOIN library_author a ON a.id = b.author_id"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS library_book_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS library_book_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0017_synccursor'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
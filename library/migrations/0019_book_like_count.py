@@ -0,0 +1,31 @@
+# Generated by Django 4.2.23 on 2026-10-18 16:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_counts(apps, schema_editor):
+    Book = apps.get_model('library', 'Book')
+    counts = (
+        Book.likes.through.objects.filter(book_id=OuterRef('pk'))
+        .order_by().values('book_id')
+        .annotate(c=Count('*')).values('c')
+    )
+    Book.objects.update(like_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0018_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
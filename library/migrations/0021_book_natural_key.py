@@ -0,0 +1,95 @@
+# Generated by Django 4.2.23 on 2026-10-18 16:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _chunks(items, size=900):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def merge_duplicate_books(apps, schema_editor):
+    """
+    Purane CSV re-uploads ne same (title, author, published_date) ki kai
+    books banayi hain. Sabse purani book rakho, orders aur likes uspar le
+    aao, baaki delete - tabhi unique constraint lag payega.
+    """
+    Book = apps.get_model('library', 'Book')
+    Order = apps.get_model('library', 'Order')
+    Like = Book.likes.through
+
+    # Ek sorted scan: har group ki pehli (sabse chhoti id) book rakhi jaati hai
+    keep_for = {}
+    last_key = keep = None
+    rows = (
+        Book.objects.order_by('title', 'author_id', 'published_date', 'id')
+        .values_list('id', 'title', 'author_id', 'published_date')
+    )
+    for pk, *key in rows.iterator(chunk_size=5000):
+        if key == last_key:
+            keep_for[pk] = keep
+        else:
+            last_key, keep = key, pk
+    if not keep_for:
+        return
+    dupes = list(keep_for)
+
+    for chunk in _chunks(dupes):
+        for order_id, book_id in Order.objects.filter(book_id__in=chunk).values_list('id', 'book_id'):
+            Order.objects.filter(pk=order_id).update(book_id=keep_for[book_id])
+        moved = [
+            Like(book_id=keep_for[book_id], user_id=user_id)
+            for book_id, user_id in Like.objects.filter(book_id__in=chunk).values_list('book_id', 'user_id')
+        ]
+        Like.objects.bulk_create(moved, ignore_conflicts=True)
+        Like.objects.filter(book_id__in=chunk).delete()
+        Book.objects.filter(pk__in=chunk).delete()
+
+    counts = Like.objects.filter(book_id=OuterRef('pk')).order_by().values('book_id').annotate(c=Count('*')).values('c')
+    Book.objects.update(like_count=Coalesce(Subquery(counts), 0))
+    # Historical models par signals nahi chalte; PostgreSQL index FK cascade se saaf hota hai
+    if schema_editor.connection.vendor == 'sqlite':
+        if 'library_book_fts' in schema_editor.connection.introspection.table_names():
+            with schema_editor.connection.cursor() as cursor:
+                for chunk in _chunks(dupes):
+                    cursor.execute(
+                        "DELETE FROM library_book_fts WHERE rowid IN (%s)" % ", ".join(["%s"] * len(chunk)),
+                        chunk,
+                    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0020_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(blank=True, max_length=13, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='row_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='updated_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(merge_duplicate_books, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='book',
+            constraint=models.UniqueConstraint(fields=('title', 'author', 'published_date'), name='unique_book_title_author_date'),
+        ),
+    ]
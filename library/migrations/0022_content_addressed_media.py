@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 17:01
+
+from django.db import migrations, models
+import library.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0021_book_natural_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=library.storage.content_storage, upload_to='images/'),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='avatar',
+            field=models.ImageField(default='profile_pics/default.png', storage=library.storage.content_storage, upload_to='profile_pics/'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.23 on 2026-10-18 17:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0023_newsletter_campaign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=10)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='library.book')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailybooksales',
+            constraint=models.UniqueConstraint(fields=('day', 'book', 'status'), name='unique_daily_book_sales'),
+        ),
+    ]
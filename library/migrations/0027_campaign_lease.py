@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0026_book_author_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='campaign',
+            name='lock_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='campaign',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
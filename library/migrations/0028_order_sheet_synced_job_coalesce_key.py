@@ -0,0 +1,43 @@
+# Generated by Django 4.2.23 on 2026-10-18 18:42
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_synced_orders(apps, schema_editor):
+    # Pehle har order post_save signal se turant sheet par jaata tha (aur 0017 ka
+    # "google_sheet:orders" cursor kabhi seed nahi hua), to migrate ke waqt ke
+    # saare orders sheet par hain - unhe dobara append nahi karna
+    SyncCursor = apps.get_model("library", "SyncCursor")
+    Order = apps.get_model("library", "Order")
+    Order.objects.update(sheet_synced_at=timezone.now())
+    SyncCursor.objects.filter(name="google_sheet:orders").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0027_campaign_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='coalesce_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='sheet_synced_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_synced_orders, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('sheet_synced_at__isnull', True)), fields=['id'], name='order_sheet_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('coalesce_key',), name='job_pending_coalesce_uniq'),
+        ),
+    ]
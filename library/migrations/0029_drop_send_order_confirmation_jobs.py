@@ -0,0 +1,24 @@
+# send_order_confirmation task hata diya (buyer confirmation send_order_receipts
+# ke saath jaata hai) - uske bache hue jobs ab import hi nahi honge
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def complete_stale_jobs(apps, schema_editor):
+    Job = apps.get_model("library", "Job")
+    Job.objects.filter(name="library.tasks.send_order_confirmation").exclude(status="done").update(
+        status="done", locked_at=None, coalesce_key=None, finished_at=timezone.now(),
+        last_error="task removed; confirmation is part of send_order_receipts",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0028_order_sheet_synced_job_coalesce_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(complete_stale_jobs, migrations.RunPython.noop),
+    ]
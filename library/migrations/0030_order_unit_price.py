@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-18 18:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_prices(apps, schema_editor):
+    # Purane orders ki asli price ab pata nahi - aaj ki book price hi sabse achha andaaza
+    Book = apps.get_model("library", "Book")
+    Order = apps.get_model("library", "Order")
+    Order.objects.filter(unit_price__isnull=True).update(
+        unit_price=Subquery(Book.objects.filter(pk=OuterRef("book_id")).values("price")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0029_drop_send_order_confirmation_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.RunPython(snapshot_prices, migrations.RunPython.noop),
+    ]
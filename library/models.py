@@ -2,10 +2,14 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save   # ✅ post_save ke liye
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save   # ✅ post_save ke liye
 from django.dispatch import receiver             # ✅ receiver ke liye
-from .utils.google_sheet import save_to_google_sheet
-from .utils import send_whatsapp, send_order_email
+from django.conf import settings
+from django.utils import timezone
+from .cache import USERS_VERSION_KEY, bump_catalogue_version, bump_tags, bump_version
+from .jobs import enqueue
+from .storage import content_storage, is_content_addressed
 
 
 
@@ -14,9 +18,33 @@ from .utils import send_whatsapp, send_order_email
 class Author(models.Model):
     name = models.CharField(max_length=100)
     bio = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)   # public fragments ka Last-Modified/ETag
+
+    class Meta:
+        # Author dropdown + book_list ?sort=author__name
+        indexes = [models.Index(fields=["name"], name="author_name_idx")]
+
     def __str__(self):
         return self.name
 
+class BookQuerySet(models.QuerySet):
+    def with_like_state(self, user):
+        """Annotate `liked_by_user` for `user` with one EXISTS subquery (no per-card queries)."""
+        if not user.is_authenticated:
+            return self.annotate(liked_by_user=models.Value(False))
+        likes = Book.likes.through.objects.filter(book_id=models.OuterRef("pk"), user_id=user.pk)
+        return self.annotate(liked_by_user=models.Exists(likes))
+
+    def refresh_like_counts(self):
+        """Recount likes for these books in a single UPDATE."""
+        counts = (
+            Book.likes.through.objects.filter(book_id=models.OuterRef("pk"))
+            .order_by().values("book_id")
+            .annotate(c=models.Count("*")).values("c")
+        )
+        return self.update(like_count=Coalesce(models.Subquery(counts), 0), updated_at=timezone.now())
+
+
 class Book(models.Model):
     title = models.CharField(max_length=200)
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')
@@ -24,14 +52,106 @@ class Book(models.Model):
     description = models.TextField(blank=True, null=True) 
     published_date = models.DateField()
     price = models.DecimalField(max_digits=8, decimal_places=2)
-    image = models.ImageField(upload_to='images/', blank=True, null=True)
+    image = models.ImageField(upload_to='images/', storage=content_storage, blank=True, null=True)
+    isbn = models.CharField(max_length=13, unique=True, blank=True, null=True)
+    # CSV import ke last row ka hash - same feed dobara aaye to row skip (importers.py)
+    row_hash = models.CharField(max_length=40, blank=True, editable=False)
 
     likes = models.ManyToManyField(User, related_name="liked_books", blank=True)
+    # likes ka denormalized count - m2m_changed signal sync rakhta hai
+    like_count = models.PositiveIntegerField(default=0, editable=False)
+    # Koi bhi dikhne wala field badle (likes bhi) -> naya ETag/Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Natural key - CSV import isi par upsert karta hai
+            models.UniqueConstraint(
+                fields=["title", "author", "published_date"],
+                name="unique_book_title_author_date",
+            ),
+        ]
+        # book_list ke sort keys (views.BOOK_SORT_FIELDS), har ek pk tie-breaker ke saath
+        # taaki keyset page index ka seedha range scan ho; genre = dashboard GROUP BY.
+        # title sort ke liye upar wala unique constraint ka index kaafi hai.
+        # `bench_db --drop-indexes` inhi indexes ko drop/re-create karke farak naapta hai.
+        indexes = [
+            models.Index(fields=["published_date", "id"], name="book_published_idx"),
+            models.Index(fields=["author", "published_date", "id"], name="book_author_published_idx"),
+            models.Index(fields=["price", "id"], name="book_price_idx"),
+            models.Index(fields=["like_count", "id"], name="book_like_count_idx"),
+            models.Index(fields=["genre"], name="book_genre_idx"),
+        ]
+
     def total_likes(self):
-        return self.likes.count()
+        return self.like_count
     def __str__(self):
         return self.title
 
+
+@receiver(m2m_changed, sender=Book.likes.through)
+def book_likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # user.liked_books.clear() - kaunsi books thi, clear se pehle yaad rakho
+        instance._cleared_book_ids = list(instance.liked_books.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        book_ids = [instance.pk]
+    elif action == "post_clear":
+        book_ids = getattr(instance, "_cleared_book_ids", [])
+    else:
+        book_ids = pk_set
+    Book.objects.filter(pk__in=book_ids).refresh_like_counts()
+    # Like count / liked-by-me dikhane wale cached pages (views.book_detail, books_by_author)
+    author_ids = Book.objects.filter(pk__in=book_ids).values_list("author_id", flat=True).distinct()
+    bump_tags(*[f"book:{pk}" for pk in book_ids], *[f"author:{pk}" for pk in author_ids])
+
+# Search index ko Book/Author ke saath sync rakho (library/search.py)
+# aur catalogue version badhao taaki cached API responses purane ho jaayein
+@receiver(post_save, sender=Book)
+def book_post_save(sender, instance, **kwargs):
+    from . import search
+    search.index_book(instance)
+    bump_catalogue_version()
+
+
+@receiver(post_delete, sender=Book)
+def book_post_delete(sender, instance, **kwargs):
+    from . import search
+    search.remove_book(instance.pk)
+    bump_catalogue_version()
+
+
+@receiver(post_save, sender=Author)
+def author_post_save(sender, instance, created, **kwargs):
+    if not created:
+        from . import search
+        # Naam badla to saari books ek set-based reindex me (ek-ek INSERT nahi)
+        search.index_book_ids(instance.books.values_list("pk", flat=True))
+    bump_catalogue_version()
+
+
+@receiver(post_delete, sender=Author)
+def author_post_delete(sender, instance, **kwargs):
+    bump_catalogue_version()
+
+
+# Site counters (library/stats.py) me active users bhi hain
+@receiver(post_save, sender=User)
+def user_post_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return   # har login par nahi
+    bump_version(USERS_VERSION_KEY)
+
+
+@receiver(post_delete, sender=User)
+def user_post_delete(sender, instance, **kwargs):
+    bump_version(USERS_VERSION_KEY)
+
 # ✅ NEW
 class Order(models.Model):
     STATUS_CHOICES = (
@@ -48,29 +168,195 @@ class Order(models.Model):
     notes = models.TextField(blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Order ke waqt ki book price - baad me price badle to purani sales/revenue nahi badalti
+    unit_price = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True, editable=False)
+    # Google Sheet par kab gaya (None = abhi bhejna hai), utils/google_sheet.py
+    sheet_synced_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Admin: date_hierarchy / created_at filter, rollup_sales ka incremental read.
+            # include= sirf PostgreSQL par lagta hai (index-only scan), SQLite ignore karta hai
+            models.Index(fields=["created_at"], include=["book", "status", "quantity"],
+                         name="order_created_idx"),
+            # Admin ?status= filter, -created_at order me
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            # Customer ke orders (order PDF owner check, admin exact email search)
+            models.Index(fields=["email", "created_at"], name="order_email_created_idx"),
+            # Sheet sync ke pending orders - partial, to sirf unsynced rows index me
+            models.Index(fields=["id"], condition=models.Q(sheet_synced_at__isnull=True),
+                         name="order_sheet_pending_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.unit_price is None and self.book_id:
+            self.unit_price = self.book.price
+        super().save(*args, **kwargs)
 
 # ✅ Signal: jab new Order create hoga to Google Sheet me add ho
-# Signal to send data to Google Sheet, WhatsApp, and Email after order is created
+# Signal to send data to Google Sheet after order is created
+# (emails, PDF aur WhatsApp link: buy_now ka send_order_receipts job)
+# Kaam yahan inline nahi hota - har side effect ek Job ban ke order ke saath hi
+# commit hota hai, aur `manage.py run_jobs` worker use baad me chalata hai.
 @receiver(post_save, sender=Order)
 def order_post_save(sender, instance, created, **kwargs):
     if created:
-        try:
-            save_to_google_sheet(instance)
-            print("✅ Order added to Google Sheet")
-        except Exception as e:
-            print("⚠️ Google Sheet Error:", e)
-
-        try:
-            send_whatsapp(instance)
-            print("✅ WhatsApp message sent")
-        except Exception as e:
-            print("⚠️ WhatsApp Error:", e)
-
-        try:
-            send_order_email(instance)
-            print("✅ Email sent")
-        except Exception as e:
-            print("⚠️ Email Error:", e)
+        enqueue("library.tasks.sync_orders_to_sheet", coalesce=True,
+                delay=settings.GOOGLE_SHEET_FLUSH_INTERVAL)
+    else:
+        from .sales import mark_stale
+        mark_stale(instance)   # status/quantity badla -> us din ka rollup dobara
+
+
+@receiver(post_delete, sender=Order)
+def order_post_delete(sender, instance, **kwargs):
+    from .sales import mark_stale
+    mark_stale(instance)
+
+
+class Job(models.Model):
+    """Durable outbox entry: a dotted task path plus JSON kwargs."""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+    name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # enqueue(coalesce=True): name+payload ka hash, claim hote hi clear
+    coalesce_key = models.CharField(max_length=64, blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at"])]
+        constraints = [
+            # Ek (name, payload) ka ek hi pending job - concurrent enqueue bhi duplicate nahi bana sakte
+            models.UniqueConstraint(fields=["coalesce_key"], condition=models.Q(status="pending"),
+                                    name="job_pending_coalesce_uniq"),
+        ]
+
+    def __str__(self):
+        return f"Job #{self.id} {self.name} ({self.status})"
+
+
+class SyncCursor(models.Model):
+    """Named high-water mark for incremental syncs (e.g. last order sent to the sheet)."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.CharField(max_length=64, default="0")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    @classmethod
+    def get_int(cls, name):
+        value = cls.objects.filter(name=name).values_list("value", flat=True).first()
+        return int(value or 0)
+
+    @classmethod
+    def set_int(cls, name, value, only_forward=False):
+        cursor, _ = cls.objects.get_or_create(name=name)
+        if only_forward and int(cursor.value) >= value:
+            return
+        cursor.value = str(value)
+        cursor.save(update_fields=["value", "updated_at"])
+
+
+class DailyBookSales(models.Model):
+    """
+    Order rollup: ek row per (din, book, status). Sales APIs isi chhoti table
+    se week/month buckets banati hain; `manage.py rollup_sales` ise
+    `created_at` high-water mark se aage update karta hai (library/sales.py).
+    """
+    day = models.DateField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name="daily_sales")
+    status = models.CharField(max_length=10)
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "book", "status"], name="unique_daily_book_sales"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.book_id} {self.status}: {self.quantity}"
+
+
+class ImportJob(models.Model):
+    """
+    One streamed CSV import. Har chunk apne progress update ke saath ek hi
+    transaction me commit hota hai, isliye `chunks_done` tak ka data pakka
+    DB me hai aur dobara chalane par import wahin se aage badhta hai.
+    """
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+    file = models.FileField(upload_to="imports/")
+    original_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    encoding = models.CharField(max_length=20, blank=True)
+    chunk_size = models.PositiveIntegerField(default=5000)
+    chunks_done = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)   # pehle CSV_IMPORT_MAX_ERRORS hi
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Import #{self.id} {self.original_name} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+
+
+class Blob(models.Model):
+    """One file in ContentAddressedStorage; `refcount` = rows pointing at it."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+    @classmethod
+    def adjust(cls, name, delta):
+        if name:
+            cls.objects.filter(name=name).update(
+                refcount=models.F("refcount") + delta, updated_at=timezone.now(),
+            )
+
 class Testimonial(models.Model):
     user_name = models.CharField(max_length=100)
     content = models.TextField()
@@ -86,14 +372,111 @@ class NewsletterSubscriber(models.Model):
     subscribed_at = models.DateTimeField(auto_now_add=True)
 
 
+class Campaign(models.Model):
+    """
+    One newsletter broadcast to every NewsletterSubscriber. Subscribers id
+    order me jaate hain; har chunk ki deliveries aur `cursor` (aakhri
+    subscriber id) ek transaction me save hote hain, to crash ke baad run
+    wahin se aage badhta hai (library/newsletter.py). Ek waqt me sirf ek run
+    (lease) bhejta hai.
+    """
+    DRAFT = "draft"
+    SENDING = "sending"
+    SENT = "sent"
+    STATUS_CHOICES = (
+        (DRAFT, "Draft"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+    )
+    subject = models.CharField(max_length=200)
+    body = models.TextField(help_text="HTML; same content goes to every subscriber")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=DRAFT)
+    cursor = models.PositiveBigIntegerField(default=0)   # last NewsletterSubscriber.id handled
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Lease: jo run bhej raha hai (job ya send_campaign command); har chunk par renew
+    locked_at = models.DateTimeField(blank=True, null=True)
+    lock_token = models.CharField(max_length=32, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class CampaignDelivery(models.Model):
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    )
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="deliveries")
+    subscriber = models.ForeignKey(NewsletterSubscriber, on_delete=models.SET_NULL, null=True, blank=True)
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["campaign", "subscriber"], name="unique_campaign_subscriber"),
+        ]
+
+    def __str__(self):
+        return f"{self.email} ({self.status})"
+
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     full_name = models.CharField(max_length=100, blank=True, null=True)
     mobile = models.CharField(max_length=15, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
-    avatar = models.ImageField(upload_to='profile_pics/', default='profile_pics/default.png')
+    avatar = models.ImageField(upload_to='profile_pics/', storage=content_storage, default='profile_pics/default.png')
 
 
 
     def __str__(self):
         return f"Order #{self.id} - {self.book.title}"
+
+
+# ---------- Media refcounts (library/storage.py) ----------
+# Kaunsa model ka kaunsa file field Blob refcount me gina jaata hai
+REFCOUNTED_FILES = {Book: "image", Profile: "avatar"}
+
+
+def file_pre_save(sender, instance, raw=False, **kwargs):
+    field = REFCOUNTED_FILES[sender]
+    old = None
+    if instance.pk and not raw:
+        old = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    instance._stored_file = old or ""
+
+
+def file_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_stored_file", "")
+    new = getattr(instance, REFCOUNTED_FILES[sender]).name or ""
+    if new != old:
+        Blob.adjust(new, 1)
+        Blob.adjust(old, -1)
+        if is_content_addressed(new):
+            # srcset ke chhote WebP/JPEG versions background me (library/images.py);
+            # default avatar jaise fixed naamon ke nahi
+            enqueue("library.tasks.make_image_derivatives", coalesce=True, source_name=new)
+    instance._stored_file = new
+
+
+def file_post_delete(sender, instance, **kwargs):
+    Blob.adjust(getattr(instance, REFCOUNTED_FILES[sender]).name, -1)
+
+
+for model in REFCOUNTED_FILES:
+    pre_save.connect(file_pre_save, sender=model, dispatch_uid=f"blob_pre_save_{model.__name__}")
+    post_save.connect(file_post_save, sender=model, dispatch_uid=f"blob_post_save_{model.__name__}")
+    post_delete.connect(file_post_delete, sender=model, dispatch_uid=f"blob_post_delete_{model.__name__}")
@@ -0,0 +1,161 @@
+# library/newsletter.py
+"""
+Newsletter broadcasts (Campaign -> every NewsletterSubscriber).
+
+* Email content campaign ke start par ek hi baar render hota hai
+  (`newsletter_email.html`); har recipient ko wahi subject/text/html jaata hai.
+* Subscribers `.iterator(chunk_size=NEWSLETTER_CHUNK_SIZE)` se id order me
+  aate hain - poori list kabhi memory me nahi hoti.
+* Har chunk `EMAIL_BATCH_SIZE` ke batches me toot ke `NEWSLETTER_CONCURRENCY`
+  threads par jaata hai; har thread library.mail ke pool se apna SMTP
+  connection leta hai.
+* Chunk ki saari deliveries (sent/failed) ek bulk_create me, aur campaign ka
+  `cursor` + counters usi transaction me save hote hain. Crash ke baad run
+  cursor se aage chalta hai - zyada se zyada ek chunk dobara jaa sakta hai.
+* Bhejne se pehle run campaign ka lease leta hai (conditional UPDATE on
+  `locked_at`) aur har chunk se pehle renew karta hai. Doosra job / command
+  usi campaign par aaye to lease nahi milta aur woh kuch nahi bhejta - warna
+  dono same cursor se sabko do baar mail karte.
+"""
+import time
+import uuid
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import reset_queries, transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from . import mail
+from .jobs import enqueue
+from .models import Campaign, CampaignDelivery, NewsletterSubscriber
+
+
+def render_campaign(campaign):
+    """(subject, text, html) - rendered once per run, shared by every message."""
+    html = render_to_string("newsletter_email.html", {"campaign": campaign, "site_url": settings.SITE_URL})
+    return campaign.subject, strip_tags(html).strip(), html
+
+
+def start_campaign(campaign):
+    """Mark the campaign as sending and queue its background run."""
+    if campaign.status == Campaign.DRAFT:
+        campaign.status = Campaign.SENDING
+        campaign.started_at = timezone.now()
+        campaign.save(update_fields=["status", "started_at", "updated_at"])
+    enqueue("library.tasks.send_campaign", coalesce=True, campaign_id=campaign.id)
+
+
+def _claim(campaign):
+    """Lease token, or None while another run holds a fresh lease."""
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.NEWSLETTER_LEASE_SECONDS)
+    claimed = Campaign.objects.filter(
+        Q(locked_at__isnull=True) | Q(locked_at__lt=stale), pk=campaign.pk,
+    ).update(locked_at=now, lock_token=token)
+    return token if claimed else None
+
+
+def _renew(campaign, token):
+    """False if the lease expired and someone else took it - tab ek bhi mail aage nahi."""
+    return Campaign.objects.filter(pk=campaign.pk, lock_token=token).update(locked_at=timezone.now()) == 1
+
+
+def _release(campaign, token):
+    Campaign.objects.filter(pk=campaign.pk, lock_token=token).update(locked_at=None, lock_token="")
+
+
+def _subscriber_chunks(campaign, chunk_size):
+    rows = (NewsletterSubscriber.objects.filter(pk__gt=campaign.cursor)
+            .order_by("pk").values_list("pk", "email").iterator(chunk_size=chunk_size))
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _send_chunk(campaign, content, chunk, pool):
+    subject, text, html = content
+    messages = []
+    for _, email in chunk:
+        message = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, [email])
+        message.attach_alternative(html, "text/html")
+        messages.append(message)
+
+    size = settings.EMAIL_BATCH_SIZE
+    batches = [messages[i:i + size] for i in range(0, len(messages), size)]
+    errors = [error for batch_errors in pool.map(mail.deliver, batches) for error in batch_errors]
+
+    deliveries = [
+        CampaignDelivery(
+            campaign_id=campaign.id, subscriber_id=pk, email=email,
+            status=CampaignDelivery.FAILED if error else CampaignDelivery.SENT,
+            error=str(error)[:255] if error else "",
+        )
+        for (pk, email), error in zip(chunk, errors)
+    ]
+    failed = sum(1 for error in errors if error)
+    with transaction.atomic():
+        CampaignDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
+        Campaign.objects.filter(pk=campaign.pk).update(
+            cursor=chunk[-1][0],
+            sent_count=F("sent_count") + len(chunk) - failed,
+            failed_count=F("failed_count") + failed,
+            updated_at=timezone.now(),
+        )
+    campaign.cursor = chunk[-1][0]
+
+
+def send_campaign(campaign, time_budget=None):
+    """
+    Send to every subscriber after `campaign.cursor`. With `time_budget`
+    (seconds) it stops after the chunk that crosses it and returns False;
+    True once everyone has been handled. None if another run holds the
+    campaign's lease (nothing sent).
+    """
+    if campaign.status == Campaign.SENT:
+        return True
+    token = _claim(campaign)
+    if token is None:
+        return None
+    try:
+        campaign.refresh_from_db()   # cursor: pichhle run ne kahan chhoda
+        if campaign.status == Campaign.SENT:
+            return True
+        if campaign.status == Campaign.DRAFT:
+            campaign.status = Campaign.SENDING
+            campaign.started_at = timezone.now()
+            campaign.save(update_fields=["status", "started_at", "updated_at"])
+        deadline = time.monotonic() + time_budget if time_budget else None
+        content = render_campaign(campaign)
+
+        try:
+            with ThreadPoolExecutor(max_workers=settings.NEWSLETTER_CONCURRENCY,
+                                    thread_name_prefix="newsletter") as pool:
+                for chunk in _subscriber_chunks(campaign, settings.NEWSLETTER_CHUNK_SIZE):
+                    if not _renew(campaign, token):
+                        return None
+                    _send_chunk(campaign, content, chunk, pool)
+                    reset_queries()
+                    if deadline and time.monotonic() > deadline:
+                        return False
+        except Exception as e:
+            Campaign.objects.filter(pk=campaign.pk).update(last_error=str(e), updated_at=timezone.now())
+            raise
+
+        campaign.refresh_from_db()
+        campaign.status = Campaign.SENT
+        campaign.finished_at = timezone.now()
+        campaign.save(update_fields=["status", "finished_at", "updated_at"])
+        return True
+    finally:
+        _release(campaign, token)
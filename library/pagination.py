@@ -0,0 +1,85 @@
+# library/pagination.py
+"""Opaque keyset cursors: the sort values of the last row, base64-encoded."""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Cursor values as a list, or None for a missing/garbled cursor."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _sort_value(obj, field):
+    for part in field.split("__"):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _model_field(model, field):
+    """"author__name" jaise path ka aakhri model field."""
+    *relations, name = field.split("__")
+    for part in relations:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(name)
+
+
+def _cursor_after(model, field, cursor):
+    """(value, pk) from `cursor` converted for `field`, or None if it doesn't fit (tampered / other sort)."""
+    after = decode_cursor(cursor)
+    if not after or len(after) != 2:
+        return None
+    value, pk = after
+    if value is None or type(pk) is not int:
+        return None
+    try:
+        return _model_field(model, field).to_python(value), pk
+    except (FieldDoesNotExist, ValidationError, ValueError, TypeError):
+        return None
+
+
+def keyset_queryset(queryset, sort_field, cursor):
+    """`queryset` ordered by `sort_field` + pk, filtered to rows after `cursor`."""
+    desc = sort_field.startswith("-")
+    field = sort_field.lstrip("-")
+    op = "lt" if desc else "gt"
+    queryset = queryset.order_by(sort_field, "-pk" if desc else "pk")
+
+    after = _cursor_after(queryset.model, field, cursor)
+    if after is not None:   # kharab cursor = pehla page
+        value, pk = after
+        # `field <= value` (ya >=) faltu lagta hai, par isi se DB (sort_field, id)
+        # index par seedha range seek karta hai - sirf OR ho to poora index scan
+        queryset = queryset.filter(**{f"{field}__{op}e": value}).filter(
+            Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"pk__{op}": pk})
+        )
+    return queryset
+
+
+def keyset_page(queryset, sort_field, cursor, per_page):
+    """
+    One page of `queryset` ordered by `sort_field` (e.g. "-published_date",
+    "author__name") with the primary key as tie-breaker, continuing after
+    `cursor`. Returns (items, next_cursor). Stable even while rows are added,
+    unlike OFFSET paging.
+    """
+    field = sort_field.lstrip("-")
+    items = list(keyset_queryset(queryset, sort_field, cursor)[:per_page + 1])
+    if len(items) <= per_page:
+        return items, None
+    last = items[per_page - 1]
+    return items[:per_page], encode_cursor([_sort_value(last, field), last.pk])
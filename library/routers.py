@@ -0,0 +1,72 @@
+# library/routers.py
+"""
+Read replica routing - settings me DATABASE_REPLICA_URL ho tabhi lagta hai.
+
+Catalogue (Author, Book, Testimonial) aur analytics (DailyBookSales) ki
+reads "replica" se; baaki sab models, saari writes aur migrations primary
+("default") par. Replica thoda peeche ho sakta hai, isliye:
+  - transaction.atomic() ke andar reads primary se (wahi data jo likh rahe hain);
+  - is request/job me ek bhi write hua to uske baad ki reads primary se
+    (run_jobs ka claim() khud ek write hai, to jobs primary par hi padhte hain);
+  - ReplicaPinMiddleware write wali request ke baad ek cookie deta hai, to
+    usi client ki agli REPLICA_PIN_SECONDS tak ki requests bhi primary se
+    padhti hain (book add -> redirect -> detail page 404 nahi hota).
+
+Replica par migrate nahi chalta (woh primary ki copy hai). Local stand-in:
+primary migrate karke file copy karo aur
+DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3 do.
+"""
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+REPLICA = "replica"
+PIN_COOKIE = "library_primary"
+REPLICA_MODELS = {"author", "book", "testimonial", "dailybooksales"}
+
+_pin = Local()
+
+
+def pin_to_primary():
+    _pin.pinned = True
+
+
+def unpin():
+    _pin.pinned = False
+
+
+def pinned():
+    return getattr(_pin, "pinned", False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (model._meta.app_label != "library" or model._meta.model_name not in REPLICA_MODELS
+                or pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True   # replica = primary ki copy, same rows
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        if request.COOKIES.get(PIN_COOKIE):
+            pin_to_primary()
+        else:
+            unpin()
+
+    def process_response(self, request, response):
+        if pinned() and not request.COOKIES.get(PIN_COOKIE):
+            response.set_cookie(PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite="Lax")
+        return response
@@ -0,0 +1,184 @@
+# library/sales.py
+"""
+Sales analytics: Order -> DailyBookSales rollup + bucketed queries.
+
+`rollup()` orders ko pandas me (day, book, status) par group karke
+DailyBookSales me likhta hai. Revenue order ki `unit_price` (order ke waqt ki
+book price) se banta hai, to baad me price edit karne se purane din nahi
+badalte. High-water mark (`SyncCursor` "sales:rollup",
+aakhri rolled-up order ka created_at, epoch ms) ke din se hi dobara
+aggregate hota hai - us din ki rows delete karke fresh likhi jaati hain, to
+der se commit hue orders bhi aa jaate hain aur run idempotent rehta hai.
+Kisi purane order ka status badle ya woh delete ho to models.py ka signal
+cursor ko us order ke din tak peeche kar deta hai.
+
+APIs (views.py) sirf rollup table padhti hain: din/hafta/mahina buckets,
+top books aur status breakdown, cached per `SALES_VERSION_KEY`.
+"""
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import DailyBookSales, Order, SyncCursor
+
+CURSOR_NAME = "sales:rollup"
+SALES_VERSION_KEY = "library:sales:version"
+COLUMNS = ["created_at", "book_id", "status", "quantity", "price"]
+PERIODS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+READ_CHUNK = 50000
+
+
+def _to_ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, dt_time.min))
+
+
+def _aggregate(rows):
+    """pandas group-by of one chunk of order rows -> frame indexed by (day, book_id, status)."""
+    import pandas as pd
+
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    df["day"] = pd.to_datetime(df["created_at"], utc=True).dt.tz_convert(settings.TIME_ZONE).dt.date
+    # Paise me integer - float rounding revenue me nahi aata
+    df["revenue"] = df["quantity"] * (df["price"].astype(float) * 100).round().astype("int64")
+    return df.groupby(["day", "book_id", "status"]).agg(
+        orders=("quantity", "size"), quantity=("quantity", "sum"), revenue=("revenue", "sum"),
+    )
+
+
+def _rollup_frame(orders):
+    """Aggregate `orders` chunk by chunk (memory flat). Returns (frame or None, max created_at)."""
+    import pandas as pd
+
+    partials, chunk, newest = [], [], None
+    # Order ki snapshot price; bulk_create wale (seed) orders par book ki price
+    rows = orders.values_list("created_at", "book_id", "status", "quantity", Coalesce("unit_price", "book__price"))
+    for row in rows.iterator(chunk_size=5000):
+        chunk.append(row)
+        newest = row[0] if newest is None or row[0] > newest else newest
+        if len(chunk) >= READ_CHUNK:
+            partials.append(_aggregate(chunk))
+            chunk = []
+    if chunk:
+        partials.append(_aggregate(chunk))
+    if not partials:
+        return None, newest
+    frame = partials[0] if len(partials) == 1 else pd.concat(partials).groupby(level=[0, 1, 2]).sum()
+    return frame, newest
+
+
+def rollup(rebuild=False):
+    """
+    Bring DailyBookSales up to date. Returns (rows written, first day recomputed or None).
+    `rebuild=True` (ya pehli baar) poori table dobara banata hai.
+    """
+    hwm = SyncCursor.get_int(CURSOR_NAME)
+    orders = Order.objects.all()
+    since_day = None
+    if hwm and not rebuild:
+        since_day = timezone.localtime(datetime.fromtimestamp(hwm / 1000, tz=dt_timezone.utc)).date()
+        orders = orders.filter(created_at__gte=_day_start(since_day))
+
+    frame, newest = _rollup_frame(orders)
+    with transaction.atomic():
+        stale = DailyBookSales.objects.all()
+        if since_day is not None:
+            stale = stale.filter(day__gte=since_day)
+        stale.delete()
+        written = 0
+        if frame is not None:
+            DailyBookSales.objects.bulk_create(
+                [
+                    DailyBookSales(day=day, book_id=book_id, status=status, orders=int(row.orders),
+                                   quantity=int(row.quantity), revenue=Decimal(int(row.revenue)).scaleb(-2))
+                    for (day, book_id, status), row in zip(frame.index, frame.itertuples(index=False))
+                ],
+                batch_size=1000,
+            )
+            written = len(frame)
+        if newest is not None:
+            # Sirf tab aage badhao jab beech me signal ne cursor peeche na kiya ho
+            new_value = str(max(_to_ms(newest), hwm))
+            updated = SyncCursor.objects.filter(name=CURSOR_NAME, value=str(hwm)).update(
+                value=new_value, updated_at=timezone.now())
+            if not updated and not SyncCursor.objects.filter(name=CURSOR_NAME).exists():
+                SyncCursor.objects.create(name=CURSOR_NAME, value=new_value)
+        transaction.on_commit(lambda: bump_version(SALES_VERSION_KEY))
+    return written, since_day
+
+
+def mark_stale(order):
+    """An already rolled-up order changed: move the cursor back to its day."""
+    if order.created_at and SyncCursor.get_int(CURSOR_NAME) > _to_ms(order.created_at):
+        SyncCursor.set_int(CURSOR_NAME, _to_ms(order.created_at))
+
+
+# ---------- Queries (rollup table only) ----------
+
+def date_range(days=None, start=None, end=None):
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=(days or settings.SALES_DEFAULT_DAYS) - 1)
+    return start, end
+
+
+def _rows(start, end, status=None):
+    rows = DailyBookSales.objects.filter(day__gte=start, day__lte=end)
+    if status:
+        rows = rows.filter(status=status)
+    else:
+        rows = rows.exclude(status="cancelled")
+    return rows
+
+
+def _totals():
+    return {"orders": Sum("orders"), "quantity": Sum("quantity"), "revenue": Sum("revenue")}
+
+
+def _money(value):
+    return float(value or 0)
+
+
+def sales_series(period, start, end, status=None):
+    buckets = (_rows(start, end, status).annotate(bucket=PERIODS[period]("day"))
+               .values("bucket").annotate(**_totals()).order_by("bucket"))
+    buckets = list(buckets)
+    return {
+        "period": period,
+        "labels": [b["bucket"].isoformat()[:10] for b in buckets],
+        "orders": [b["orders"] for b in buckets],
+        "quantity": [b["quantity"] for b in buckets],
+        "revenue": [_money(b["revenue"]) for b in buckets],
+    }
+
+
+def top_books(start, end, limit=10, status=None):
+    rows = (_rows(start, end, status).values("book_id", "book__title")
+            .annotate(**_totals()).order_by("-quantity", "book_id")[:limit])
+    rows = list(rows)
+    return {
+        "labels": [r["book__title"] for r in rows],
+        "book_ids": [r["book_id"] for r in rows],
+        "quantity": [r["quantity"] for r in rows],
+        "revenue": [_money(r["revenue"]) for r in rows],
+    }
+
+
+def status_breakdown(start, end):
+    rows = (DailyBookSales.objects.filter(day__gte=start, day__lte=end)
+            .values("status").annotate(**_totals()).order_by("-orders"))
+    rows = list(rows)
+    return {
+        "labels": [r["status"] for r in rows],
+        "orders": [r["orders"] for r in rows],
+        "quantity": [r["quantity"] for r in rows],
+        "revenue": [_money(r["revenue"]) for r in rows],
+    }
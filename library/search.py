@@ -0,0 +1,235 @@
+# library/search.py
+"""
+Full-text search over books (title, author name, genre, description).
+
+SQLite par FTS5 virtual table `library_book_fts` (rowid = book id) aur
+PostgreSQL par `library_book_search` tsvector table + GIN index use hota hai.
+Dono tables migration 0018 banata hai aur models.py ke signals unhe sync
+rakhte hain. Koi aur backend ho (ya FTS5 compile na ho) to purana
+icontains search chalta hai.
+
+Rank hamesha "chhota = behtar" hota hai (FTS5 bm25 jaisa), isliye PostgreSQL
+par ts_rank ko negate kiya jata hai.
+"""
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.db.models import Case, IntegerField, Q, When
+
+from .pagination import decode_cursor, encode_cursor
+
+SQLITE_TABLE = "library_book_fts"
+POSTGRES_TABLE = "library_book_search"
+
+# Column weights: title, author, genre, description
+WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+_available = {}
+
+
+def backend(alias=DEFAULT_DB_ALIAS):
+    """'sqlite', 'postgresql' or None when no full-text index exists."""
+    if alias not in _available:
+        conn = connections[alias]
+        table = {"sqlite": SQLITE_TABLE, "postgresql": POSTGRES_TABLE}.get(conn.vendor)
+        found = table is not None and table in conn.introspection.table_names()
+        _available[alias] = conn.vendor if found else None
+    return _available[alias]
+
+
+def _read_alias():
+    """Ranking query kis DB par - catalogue read, to replica router ke hisaab se."""
+    from .models import Book
+    return router.db_for_read(Book)
+
+
+def tokens(query):
+    return re.findall(r"\w+", (query or "").lower())[:10]
+
+
+def _document(book):
+    return (book.title, book.author.name, book.genre or "", book.description or "")
+
+
+# ---------- Index maintenance ----------
+
+def index_book(book):
+    """(Re)index one book; call after it is saved."""
+    kind = backend()
+    if kind is None:
+        return
+    title, author, genre, description = _document(book)
+    with connection.cursor() as cursor:
+        if kind == "sqlite":
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [book.pk])
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} (rowid, title, author, genre, description) VALUES (%s, %s, %s, %s, %s)",
+                [book.pk, title, author, genre, description],
+            )
+        else:
+            cursor.execute(
+                f"""
+                INSERT INTO {POSTGRES_TABLE} (book_id, document) VALUES (
+                    %s,
+                    setweight(to_tsvector('simple', %s), 'A') ||
+                    setweight(to_tsvector('simple', %s), 'B') ||
+                    setweight(to_tsvector('simple', %s), 'C') ||
+                    setweight(to_tsvector('simple', %s), 'D')
+                )
+                ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document
+                """,
+                [book.pk, title, author, genre, description],
+            )
+
+
+def remove_book(book_id):
+    kind = backend()
+    if kind is None:
+        return
+    with connection.cursor() as cursor:
+        if kind == "sqlite":
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [book_id])
+        else:
+            cursor.execute(f"DELETE FROM {POSTGRES_TABLE} WHERE book_id = %s", [book_id])
+
+
+def _fill(cursor, kind, where="", params=()):
+    """INSERT ... SELECT index rows for the books matching `where`."""
+    if kind == "sqlite":
+        cursor.execute(f"""
+            INSERT INTO {SQLITE_TABLE} (rowid, title, author, genre, description)
+            SELECT b.id, b.title, a.name, b.genre, COALESCE(b.description, '')
+            FROM library_book b JOIN library_author a ON a.id = b.author_id {where}
+        """, params)
+    else:
+        cursor.execute(f"""
+            INSERT INTO {POSTGRES_TABLE} (book_id, document)
+            SELECT b.id,
+                   setweight(to_tsvector('simple', b.title), 'A') ||
+                   setweight(to_tsvector('simple', a.name), 'B') ||
+                   setweight(to_tsvector('simple', b.genre), 'C') ||
+                   setweight(to_tsvector('simple', COALESCE(b.description, '')), 'D')
+            FROM library_book b JOIN library_author a ON a.id = b.author_id {where}
+        """, params)
+    return cursor.rowcount
+
+
+def index_book_ids(book_ids, chunk_size=500):
+    """Set-based (re)index for many books at once, e.g. after bulk_create."""
+    kind = backend()
+    if kind is None:
+        return
+    book_ids = list(book_ids)
+    key = "rowid" if kind == "sqlite" else "book_id"
+    table = SQLITE_TABLE if kind == "sqlite" else POSTGRES_TABLE
+    with connection.cursor() as cursor:
+        for i in range(0, len(book_ids), chunk_size):
+            chunk = book_ids[i:i + chunk_size]
+            marks = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({marks})", chunk)
+            _fill(cursor, kind, f"WHERE b.id IN ({marks})", chunk)
+
+
+def rebuild_index():
+    """Drop and refill the whole index with one INSERT ... SELECT. Returns row count."""
+    kind = backend()
+    if kind is None:
+        return 0
+    with connection.cursor() as cursor:
+        if kind == "sqlite":
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+        else:
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+        return _fill(cursor, kind)
+
+
+# ---------- Querying ----------
+
+def ranked_ids(query, limit=None, after=None, author_id=None):
+    """
+    [(book_id, rank), ...] best match first. Every word is matched as a
+    prefix, so "har pot" finds "Harry Potter" while the user is typing.
+    `after` = last (book_id, rank) row of the previous page (keyset).
+    `author_id` limit se pehle hi filter karta hai (top-N us author ke).
+    """
+    words = tokens(query)
+    alias = _read_alias()
+    kind = backend(alias)
+    if not words or kind is None:
+        return []
+    limit = limit or settings.SEARCH_MAX_RESULTS
+    if kind == "sqlite":
+        match = " ".join(f'"{w}"*' for w in words)
+        inner = f"""
+            SELECT rowid AS id, bm25({SQLITE_TABLE}, %s, %s, %s, %s) AS score
+            FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s
+        """
+        params = [*WEIGHTS, match]
+    else:
+        tsquery = " & ".join(f"{w}:*" for w in words)
+        inner = f"""
+            SELECT book_id AS id, -ts_rank(document, q) AS score
+            FROM {POSTGRES_TABLE}, to_tsquery('simple', %s) q
+            WHERE document @@ q
+        """
+        params = [tsquery]
+    if author_id is not None:
+        key = "rowid" if kind == "sqlite" else "book_id"
+        inner += f" AND {key} IN (SELECT id FROM library_book WHERE author_id = %s)"
+        params.append(author_id)
+    where = ""
+    if after is not None:
+        where = "WHERE score > %s OR (score = %s AND id > %s)"
+        params += [after[1], after[1], after[0]]
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, score FROM ({inner}) ranked {where} ORDER BY score, id LIMIT %s",
+            [*params, limit],
+        )
+        return cursor.fetchall()
+
+
+def _fallback_filter(query):
+    return (
+        Q(title__icontains=query) | Q(author__name__icontains=query)
+        | Q(genre__icontains=query) | Q(description__icontains=query)
+    )
+
+
+def ranked_books(queryset, query, author_id=None):
+    """
+    (queryset, capped): `query` matches annotated with `search_position`
+    (0 = best match) and ordered by it. Index sirf `SEARCH_MAX_RESULTS`
+    best matches deta hai; `capped` batata hai ki aur bhi matches ho sakte
+    hain. `author_id` cut se pehle lagta hai. Bina full-text index ke
+    icontains filter, bina position ke.
+    """
+    if author_id is not None:
+        queryset = queryset.filter(author_id=author_id)
+    if backend() is None:
+        return queryset.filter(_fallback_filter(query)), False
+    limit = settings.SEARCH_MAX_RESULTS
+    ids = [book_id for book_id, _ in ranked_ids(query, limit, author_id=author_id)]
+    if not ids:
+        return queryset.none(), False
+    position = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).annotate(search_position=position).order_by("search_position"), len(ids) >= limit
+
+
+def search_books(queryset, query):
+    """Filter a Book queryset to `query` matches, ordered by relevance."""
+    return ranked_books(queryset, query)[0]
+
+
+def relevance_page(queryset, cursor, per_page):
+    """
+    One page of a ranked_books() queryset in rank order. Returns
+    (items, next_cursor); cursor = last row's search_position.
+    """
+    after = decode_cursor(cursor)
+    position = after[0] if after and len(after) == 1 and type(after[0]) is int else -1   # kharab = pehla page
+    items = list(queryset.filter(search_position__gt=position).order_by("search_position")[:per_page + 1])
+    if len(items) <= per_page:
+        return items, None
+    return items[:per_page], encode_cursor([items[per_page - 1].search_position])
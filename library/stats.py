@@ -0,0 +1,65 @@
+# library/stats.py
+"""
+Dashboard / home page aggregates (top authors, books per genre, counters).
+
+Har stat ka JSON cache me un versions ke naam se rakha jaata hai jin par woh
+depend karta hai (library/cache.py): Book/Author likhe jaane par catalogue
+version badalta hai, User add/delete par users version. Version badla to
+naya key - GROUP BY sirf pehli request par chalta hai, baaki sab cache read.
+Wahi version ETag/Last-Modified bhi banta hai, to browser ko 304 milta hai.
+
+Endpoints async views hain (ASGI), isliye yahan sab async hai: cache read
+TieredCache ke local tier se bina thread hop ke, aur miss par ORM query
+`aiterator`/`acount` se.
+"""
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count
+
+from .cache import CATALOGUE_VERSION_KEY, USERS_VERSION_KEY, aget_or_compute, aget_version
+from .models import Author, Book
+
+
+def _chart(rows, label):
+    return {"labels": [r[label] for r in rows], "counts": [r["count"] for r in rows]}
+
+
+async def top_authors():
+    rows = Book.objects.values("author__name").annotate(count=Count("id")).order_by("-count")[:8]
+    return _chart([r async for r in rows.aiterator()], "author__name")
+
+
+async def books_by_genre():
+    rows = Book.objects.values("genre").annotate(count=Count("id")).order_by("-count")
+    return _chart([r async for r in rows.aiterator()], "genre")
+
+
+async def site_counters():
+    return {
+        "total_books": await Book.objects.acount(),
+        "total_authors": await Author.objects.acount(),
+        "active_users": await User.objects.filter(is_active=True).acount(),
+    }
+
+
+STATS = {
+    "top_authors": (top_authors, [CATALOGUE_VERSION_KEY]),
+    "books_by_genre": (books_by_genre, [CATALOGUE_VERSION_KEY]),
+    "counters": (site_counters, [CATALOGUE_VERSION_KEY, USERS_VERSION_KEY]),
+}
+
+
+async def astat_version(name):
+    """(tag, newest version in ms) of stat `name` - cache reads only."""
+    versions = [await aget_version(key) for key in STATS[name][1]]
+    return "-".join(map(str, versions)), max(versions)
+
+
+async def astat_json(name, tag):
+    """JSON body of stat `name` for version `tag`, computed only on a cache miss."""
+    async def compute():
+        return json.dumps(await STATS[name][0](), separators=(",", ":"))
+
+    return await aget_or_compute(f"library:stats:{name}:{tag}", compute, settings.STATS_CACHE_TIMEOUT)
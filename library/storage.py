@@ -0,0 +1,110 @@
+# library/storage.py
+"""
+Content-addressed media storage.
+
+Upload ka naam nahi, content ka sha256 file ka naam banta hai:
+`images/Gatsby.jpg` -> `images/3f/3fa9...c1.jpg`. Same image dobara aaye to
+disk par kuch nahi likha jaata - sirf wahi naam laut aata hai. Har stored
+file ki ek `Blob` row hai jiska `refcount` models.py ke signals sambhalte
+hain; `manage.py gc_media` zero-reference blobs delete karta hai.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.utils import timezone
+
+# "images/3f/3fa9...c1.jpg" - ContentAddressedStorage.content_name ka format
+CONTENT_NAME_RE = re.compile(r"^[^/]+/[0-9a-f]{2}/[0-9a-f]{64}(?:\.\w+)?$")
+
+
+def is_content_addressed(name):
+    """True for names derived from the file's sha256 - unka content kabhi nahi badalta."""
+    return bool(name and CONTENT_NAME_RE.match(name))
+
+
+class OverwriteStorage(FileSystemStorage):
+    """
+    Deterministic names: a save to an existing name replaces the file
+    atomically instead of picking `name_abc123.jpg`. Only for names derived
+    from content (blobs, image derivatives).
+    """
+
+    def _save(self, name, content):
+        # Temp file + os.replace: do workers same file likhein to bhi file
+        # hamesha poori rahe (same content, to kaun jeeta farak nahi padta)
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f"{full_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in content.chunks():
+                f.write(chunk)
+        if self.file_permissions_mode is not None:
+            os.chmod(tmp_path, self.file_permissions_mode)
+        os.replace(tmp_path, full_path)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+
+class ContentAddressedStorage(OverwriteStorage):
+    def digest(self, content):
+        """(sha256 hex, size) of a File, read in chunks."""
+        sha = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            sha.update(chunk)
+            size += len(chunk)
+        return sha.hexdigest(), size
+
+    def content_name(self, name, digest):
+        directory = posixpath.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + ext)
+
+    def save(self, name, content, max_length=None):
+        from .models import Blob
+
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        digest, size = self.digest(content)
+        name = self.content_name(name, digest)
+        # Pehle row touch (updated_at): gc_media grace period ke andar ki blob nahi
+        # chhoota, aur jo GC abhi row delete kar raha hai uske commit ka intezaar hota
+        # hai - phir naya row + file dobara likhi jaati hai
+        if not Blob.objects.filter(name=name).update(updated_at=timezone.now()):
+            Blob.objects.get_or_create(name=name, defaults={"size": size})
+        if not self.exists(name):
+            if hasattr(content, "seek"):
+                content.seek(0)
+            self._save(name, content)
+        return name
+
+
+_storage = None
+_overwrite_storage = None
+
+
+def content_storage():
+    """Shared ContentAddressedStorage (callable, so migrations don't freeze MEDIA_ROOT)."""
+    global _storage
+    if _storage is None:
+        _storage = ContentAddressedStorage()
+    return _storage
+
+
+def overwrite_storage():
+    global _overwrite_storage
+    if _overwrite_storage is None:
+        _overwrite_storage = OverwriteStorage()
+    return _overwrite_storage
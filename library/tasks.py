@@ -0,0 +1,124 @@
+# library/tasks.py
+"""
+Background tasks run by the job worker (see library/jobs.py).
+
+Har task sirf JSON-safe kwargs leta hai (jaise order_id) aur model khud
+DB se load karta hai, taaki retry par hamesha latest data mile.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage
+
+from . import mail, whatsapp
+from .jobs import enqueue
+from .models import Campaign, ImportJob, Order
+from .utils.google_sheet import sheet_sync
+from .utils.pdf import order_html_pdf, order_pdf, order_pdf_url
+
+
+def _get_order(order_id):
+    return Order.objects.select_related("book__author").get(pk=order_id)
+
+
+def sync_orders_to_sheet():
+    sheet_sync().sync_new_orders()
+
+
+def send_order_whatsapp(order_id, pdf_url=None):
+    whatsapp.send(*whatsapp.order_message(_get_order(order_id), pdf_url))
+
+
+def send_order_receipts(order_id):
+    """Admin + buyer emails with the PDF summary; WhatsApp with the PDF link is queued separately."""
+    order = _get_order(order_id)
+    book = order.book
+
+    # Ek hi render: wahi stored file emails me attach hoti hai aur WhatsApp link banti hai
+    pdf_name, pdf_bytes = order_pdf(order)
+    filename = f"order_{order.id}.pdf"
+
+    # --- Admin email ---
+    subject_admin = f"New Book Order: {book.title} (#{order.id})"
+    body_admin = (
+        f"New order received.\n\n"
+        f"Order ID: {order.id}\n"
+        f"Book: {book.title}\n"
+        f"Buyer: {order.name}\n"
+        f"Email: {order.email}\n"
+        f"Phone: {order.phone}\n"
+        f"Qty: {order.quantity}\n"
+    )
+    email_admin = EmailMessage(
+        subject_admin,
+        body_admin,
+        settings.DEFAULT_FROM_EMAIL,
+        [settings.ORDER_NOTIFICATION_EMAIL],
+    )
+    email_admin.attach(filename, pdf_bytes, "application/pdf")
+
+    # --- User email ---
+    subject_user = "Your Book Order Confirmation"
+    body_user = (
+        f"Hi {order.name},\n\n"
+        f"Thanks for your order of '{book.title}'. "
+        "We've attached your order summary as PDF.\n\n"
+        "We'll contact you soon with shipping details.\n\n"
+        "Regards,\nLibrary Team"
+    )
+    email_user = EmailMessage(
+        subject_user,
+        body_user,
+        settings.DEFAULT_FROM_EMAIL,
+        [order.email],
+    )
+    email_user.attach(filename, pdf_bytes, "application/pdf")
+
+    # Dono ek hi pooled SMTP connection par
+    mail.send_messages([email_admin, email_user])
+
+    # Alag job, taaki WhatsApp fail hone par emails dobara na jaayein
+    enqueue("library.tasks.send_order_whatsapp", order_id=order.id, pdf_url=order_pdf_url(pdf_name))
+
+
+def render_order_html_pdf(order_id):
+    order_html_pdf(_get_order(order_id))
+
+
+def send_order_pdf_email(order_id):
+    """Buyer asked for their order PDF again (order_pdf_email view)."""
+    from .storage import overwrite_storage
+
+    order = _get_order(order_id)
+    with overwrite_storage().open(order_html_pdf(order), "rb") as f:
+        pdf_bytes = f.read()
+    email = EmailMessage(
+        subject=f"Your Order #{order.id}",
+        body="Please find your order PDF attached.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[order.email],
+    )
+    email.attach(f"order_{order.id}.pdf", pdf_bytes, "application/pdf")
+    mail.send(email)
+
+
+def run_import_job(import_id):
+    """Import the next slice of a streamed CSV; re-queues itself until the file is done."""
+    from .importers import run_import
+
+    import_job = ImportJob.objects.get(pk=import_id)
+    if not run_import(import_job, time_budget=settings.CSV_IMPORT_JOB_SECONDS):
+        enqueue("library.tasks.run_import_job", max_attempts=10, import_id=import_id)
+
+
+def send_campaign(campaign_id):
+    """Send the next slice of a newsletter campaign; re-queues itself until everyone got it."""
+    from .newsletter import send_campaign as run_campaign
+
+    campaign = Campaign.objects.get(pk=campaign_id)
+    # None = doosra run lease pakde hai; woh khud aage ka job daalega
+    if run_campaign(campaign, time_budget=settings.NEWSLETTER_JOB_SECONDS) is False:
+        enqueue("library.tasks.send_campaign", coalesce=True, campaign_id=campaign_id)
+
+
+def make_image_derivatives(source_name):
+    from .images import generate_derivatives
+    generate_derivatives(source_name)
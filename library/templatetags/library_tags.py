@@ -0,0 +1,35 @@
+from django import template
+from django.conf import settings
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from library import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_img(image, alt="", sizes="100vw", **attrs):
+    """
+    <picture> with WebP + JPEG srcsets of the image derivatives, e.g.
+    {% responsive_img book.image alt=book.title sizes="(max-width: 576px) 50vw, 200px" class="card-img-top" %}
+    Falls back to the original file until the derivatives are generated.
+    """
+    if not image:
+        return ""
+    attrs.setdefault("loading", "lazy")
+    if not images.is_ready(image.name):
+        return format_html('<img src="{}" alt="{}"{}>', image.url, alt, flatatt(attrs))
+
+    formats = settings.IMAGE_DERIVATIVE_FORMATS
+    fallback = "jpeg" if "jpeg" in formats else formats[-1]
+    sources = format_html_join(
+        "", '<source type="image/{}" srcset="{}" sizes="{}">',
+        ((fmt, images.srcset(image.name, fmt), sizes) for fmt in formats if fmt != fallback),
+    )
+    largest = images.derivative_url(image.name, images.available_widths(image.name)[-1], fallback)
+    img = format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" decoding="async"{}>',
+        largest, images.srcset(image.name, fallback), sizes, alt, flatatt(attrs),
+    )
+    return format_html("<picture>{}{}</picture>", sources, img)
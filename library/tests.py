@@ -1,3 +1,1654 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django.core.management import call_command
+
+from . import jobs, search
+from .models import Author, Book, DailyBookSales, Job, Order, SyncCursor
+from .utils import google_sheet
+
+
+def make_book(title="Gatsby", author_name="Fitzgerald", **kwargs):
+    author, _ = Author.objects.get_or_create(name=author_name)
+    kwargs.setdefault("genre", "Fiction")
+    kwargs.setdefault("published_date", date(2020, 1, 1))
+    kwargs.setdefault("price", "199.00")
+    return Book.objects.create(title=title, author=author, **kwargs)
+
+
+def use_temp_media(test, **settings):
+    """Point MEDIA_ROOT (plus any extra settings) at a temp dir for one test."""
+    import shutil
+    import tempfile
+    from django.core.cache import cache
+    from . import images
+
+    media = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media)
+    override = override_settings(MEDIA_ROOT=media, **settings)
+    override.enable()
+    test.addCleanup(override.disable)
+    images._widths.clear()
+    cache.clear()   # derivative widths ka cache pichhle test ke media ka hai
+    return media
+
+
+calls = []
+
+
+def record_task(**kwargs):
+    calls.append(kwargs)
+
+
+def failing_task(**kwargs):
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_durable_and_worker_runs_it(self):
+        job = jobs.enqueue("library.tests.record_task", order_id=7)
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(calls, [])
+
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(calls, [{"order_id": 7}])
+
+    def test_failed_job_is_retried_with_backoff_then_gives_up(self):
+        job = jobs.enqueue("library.tests.failing_task", max_attempts=2)
+
+        jobs.run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=jobs.backoff_seconds(1) - 5))
+        self.assertIn("boom", job.last_error)
+        # Backoff ke dauraan worker ise nahi uthata
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_job_cannot_be_claimed_twice(self):
+        job = jobs.enqueue("library.tests.record_task")
+        self.assertTrue(jobs.claim(job.id))
+        self.assertFalse(jobs.claim(job.id))
+
+    def test_job_that_keeps_killing_its_worker_gives_up(self):
+        job = jobs.enqueue("library.tests.record_task", max_attempts=2)
+        stale = timezone.now() - timedelta(hours=1)
+        self.assertTrue(jobs.claim(job.id))
+        for expected in (1, 2):
+            Job.objects.filter(pk=job.pk).update(locked_at=stale)   # worker beech me mar gaya
+            self.assertTrue(jobs.claim(job.id))
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, expected)
+        Job.objects.filter(pk=job.pk).update(locked_at=stale)
+        self.assertFalse(jobs.run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(calls, [])
+
+    def test_admin_retry_leaves_running_jobs_alone(self):
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        failed = jobs.enqueue("library.tests.record_task")
+        running = jobs.enqueue("library.tests.record_task", order_id=2)
+        Job.objects.filter(pk=failed.pk).update(status=Job.FAILED, attempts=5)
+        jobs.claim(running.id)
+        self.client.post(reverse("admin:library_job_changelist"),
+                         {"action": "retry_now", "_selected_action": [failed.pk, running.pk]})
+        self.assertEqual(Job.objects.get(pk=failed.pk).status, Job.PENDING)
+        self.assertEqual(Job.objects.get(pk=failed.pk).attempts, 0)
+        self.assertEqual(Job.objects.get(pk=running.pk).status, Job.RUNNING)
+
+    def test_concurrent_coalesced_enqueue_makes_one_job(self):
+        from django.db.models.query import QuerySet
+
+        first = jobs.enqueue("library.tests.record_task", coalesce=True, order_id=1)
+        real_first = QuerySet.first
+        lookups = []
+
+        def stale_first(qs):
+            # Doosre process ka insert abhi dikha nahi tha
+            lookups.append(qs)
+            return None if len(lookups) == 1 else real_first(qs)
+
+        with mock.patch.object(QuerySet, "first", stale_first):
+            again = jobs.enqueue("library.tests.record_task", coalesce=True, order_id=1)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+        # Claim ke baad naya enqueue naya job banata hai
+        self.assertTrue(jobs.claim(first.id))
+        self.assertNotEqual(jobs.enqueue("library.tests.record_task", coalesce=True, order_id=1).pk, first.pk)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_in_process_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            jobs.enqueue("library.tests.record_task", order_id=1)
+        self.assertEqual(calls, [{"order_id": 1}])
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+
+class BuyNowTests(TestCase):
+    def test_buy_now_only_queues_notifications(self):
+        book = make_book()
+        with mock.patch("library.tasks.send_order_receipts") as receipts:
+            response = self.client.post(reverse("buy_now", args=[book.pk]), {
+                "name": "Asha", "email": "asha@example.com", "phone": "9999999999",
+                "address": "Delhi", "quantity": 2, "notes": "",
+            })
+        self.assertRedirects(response, reverse("book_list"), fetch_redirect_response=False)
+        receipts.assert_not_called()
+
+        order = Order.objects.get()
+        names = set(Job.objects.values_list("name", flat=True))
+        self.assertIn("library.tasks.send_order_receipts", names)
+        self.assertIn("library.tasks.sync_orders_to_sheet", names)
+        self.assertNotIn("library.tasks.send_order_confirmation", names)   # receipts hi confirmation hai
+        receipts_job = Job.objects.get(name="library.tasks.send_order_receipts")
+        self.assertEqual(receipts_job.payload, {"order_id": order.id})
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.rows = []
+        self.calls = 0
+
+    def append_rows(self, rows, **kwargs):
+        self.calls += 1
+        self.rows.extend(rows)
+
+    def clear(self):
+        self.rows = []
+
+
+class FakeGspreadClient:
+    def __init__(self):
+        self.sheet1 = FakeWorksheet()
+        self.opened = 0
+
+    def open_by_key(self, key):
+        self.opened += 1
+        return self
+
+
+@override_settings(GOOGLE_SHEET_BATCH_SIZE=2)
+class GoogleSheetSyncTests(TestCase):
+    def setUp(self):
+        self.client_ = FakeGspreadClient()
+        google_sheet.set_client(self.client_)
+        self.addCleanup(google_sheet.set_client, None)
+        self.book = make_book()
+
+    def make_orders(self, n):
+        return [
+            Order.objects.create(book=self.book, name=f"n{i}", email="a@x.com", phone="1", address="x")
+            for i in range(n)
+        ]
+
+    def test_new_orders_are_sent_in_batches_and_only_once(self):
+        orders = self.make_orders(3)
+        self.assertEqual(google_sheet.push_all_orders_to_sheet(), 3)
+        sheet = self.client_.sheet1
+        self.assertEqual([r[0] for r in sheet.rows], [o.id for o in orders])
+        self.assertEqual(sheet.calls, 2)   # batch size 2 -> 2 + 1
+        self.assertFalse(Order.objects.filter(sheet_synced_at__isnull=True).exists())
+
+        # Delta only
+        newer = self.make_orders(1)
+        self.assertEqual(google_sheet.save_to_google_sheet(newer[0]), 1)
+        self.assertEqual(len(sheet.rows), 4)
+        self.assertEqual(self.client_.opened, 1)
+
+    def test_full_resync_rewrites_headers_and_rows(self):
+        self.make_orders(2)
+        google_sheet.push_all_orders_to_sheet()
+        google_sheet.push_all_orders_to_sheet(full=True)
+        rows = self.client_.sheet1.rows
+        self.assertEqual(rows[0], google_sheet.HEADERS)
+        self.assertEqual(len(rows), 3)
+
+    def test_order_committed_after_a_higher_id_is_still_sent(self):
+        late, early = self.make_orders(2)
+        # `early` (bada id) pehle commit hokar sync ho gaya, `late` baad me commit hua
+        Order.objects.filter(pk=early.pk).update(sheet_synced_at=timezone.now())
+        self.assertEqual(google_sheet.push_all_orders_to_sheet(), 1)
+        self.assertEqual([r[0] for r in self.client_.sheet1.rows], [late.id])
+
+    def test_order_signal_coalesces_sheet_jobs(self):
+        self.make_orders(3)
+        self.assertEqual(Job.objects.filter(name="library.tasks.sync_orders_to_sheet").count(), 1)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.potter = make_book("Harry Potter", "Rowling", genre="Fantasy")
+        self.other = make_book("Cooking 101", "Chef", description="Better than harry potter fan fiction")
+
+    def titles(self, query):
+        return [b.title for b in search.search_books(Book.objects.all(), query)]
+
+    def test_prefix_match_is_relevance_ranked(self):
+        self.assertEqual(search.backend(), "sqlite")
+        self.assertEqual(self.titles("har pot"), ["Harry Potter", "Cooking 101"])
+        self.assertEqual(self.titles("rowl"), ["Harry Potter"])
+        self.assertEqual(self.titles("fanta"), ["Harry Potter"])
+
+    def test_index_follows_book_and_author_changes(self):
+        self.potter.title = "Philosopher's Stone"
+        self.potter.save()
+        self.assertEqual(self.titles("philosopher"), ["Philosopher's Stone"])
+
+        author = self.potter.author
+        author.name = "Galbraith"
+        author.save()
+        self.assertEqual(self.titles("galbraith"), ["Philosopher's Stone"])
+
+        self.potter.delete()
+        self.assertEqual(self.titles("galbraith"), [])
+
+    def test_rebuild_command(self):
+        search.remove_book(self.potter.pk)
+        self.assertEqual(self.titles("rowling"), [])
+        call_command("rebuild_search_index", stdout=mock.MagicMock())
+        self.assertEqual(self.titles("rowling"), ["Harry Potter"])
+
+    def test_search_api_uses_index(self):
+        response = self.client.get(reverse("api_search_books"), {"q": "potter"})
+        self.assertEqual([r["title"] for r in response.json()["results"]], ["Harry Potter", "Cooking 101"])
+
+
+class SearchApiTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            make_book(f"Potter {i}", "Rowling", price="10.50")
+        self.url = reverse("api_search_books")
+
+    def test_keyset_pages_cover_everything_once(self):
+        for q in ("", "potter"):
+            seen, cursor = [], ""
+            while True:
+                data = self.client.get(self.url, {"q": q, "limit": 2, "cursor": cursor}).json()
+                seen += [r["id"] for r in data["results"]]
+                cursor = data["next"]
+                if not cursor:
+                    break
+            self.assertEqual(sorted(seen), sorted(Book.objects.values_list("id", flat=True)))
+            self.assertEqual(len(seen), len(set(seen)))
+
+    def test_bad_cursor_is_ignored(self):
+        from .pagination import encode_cursor
+        first = self.client.get(self.url, {"limit": 2}).json()
+        for q in ("", "potter"):
+            for values in (["abc"], ["abc", "x"], [1, "nan"], [None], [True, 1.5], {"id": 1}):
+                response = self.client.get(self.url, {"q": q, "limit": 2, "cursor": encode_cursor(values)})
+                self.assertEqual(response.status_code, 200, (q, values))
+                if not q:
+                    self.assertEqual(response.json(), first)
+
+    def test_fields_projection_and_serialization(self):
+        row = self.client.get(self.url, {"fields": "title,author,price,bogus"}).json()["results"][0]
+        self.assertEqual(row, {"title": "Potter 0", "author": "Rowling", "price": "10.50"})
+
+    def test_repeat_query_is_not_modified_until_catalogue_changes(self):
+        first = self.client.get(self.url, {"q": "pot"})
+        etag = first["ETag"]
+        again = self.client.get(self.url, {"q": "pot"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        make_book("Potter 9", "Rowling")
+        changed = self.client.get(self.url, {"q": "pot"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()["results"]), 6)
+
+    def test_cached_page_is_served_without_queries(self):
+        self.client.get(self.url, {"q": "pot"})
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {"q": "pot"})
+
+    async def test_async_client(self):
+        first = await self.async_client.get(self.url, {"q": "pot", "fields": "title"})
+        self.assertEqual(len(first.json()["results"]), 5)
+        self.assertEqual(first["Cache-Control"], "no-cache")
+        again = await self.async_client.get(self.url, {"q": "pot", "fields": "title"},
+                                            headers={"if-none-match": first["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+
+class LikeCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("reader", password="pw")
+        self.other = User.objects.create_user("other", password="pw")
+        self.book = make_book()
+
+    def test_like_count_follows_both_sides_of_the_relation(self):
+        self.book.likes.add(self.user, self.other)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.like_count, 2)
+
+        self.other.liked_books.remove(self.book)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.like_count, 1)
+
+        self.user.liked_books.clear()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.like_count, 0)
+
+    def test_like_toggle_view(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse("like_book", args=[self.book.pk]))
+        book = Book.objects.with_like_state(self.user).get(pk=self.book.pk)
+        self.assertEqual((book.like_count, book.liked_by_user), (1, True))
+
+        self.client.post(reverse("like_book", args=[self.book.pk]))
+        book = Book.objects.with_like_state(self.user).get(pk=self.book.pk)
+        self.assertEqual((book.like_count, book.liked_by_user), (0, False))
+
+    def test_book_list_query_count_does_not_grow_with_catalogue(self):
+        self.client.force_login(self.user)
+
+        def queries_for_page():
+            from django.db import connection
+            from django.test.utils import CaptureQueriesContext
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse("book_list"))
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        for i in range(3):
+            make_book(f"Book {i}", f"Author {i}").likes.add(self.user)
+        small = queries_for_page()
+        for i in range(3, 40):
+            make_book(f"Book {i}", f"Author {i}").likes.add(self.other)
+        self.assertEqual(queries_for_page(), small)
+        self.assertLessEqual(small, 8)
+
+
+@override_settings(BOOKS_PER_PAGE=3)
+class BookListPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("reader", password="pw")
+        self.client.force_login(self.user)
+        # Duplicate sort values so the id tie-breaker matters
+        # (title/author/date together stay unique - natural key constraint)
+        for i in range(8):
+            make_book(f"Book {i % 3}", f"Author {i % 2}", price=f"{i % 4}.00",
+                      published_date=date(2020, 1, 1 + i % 4))
+
+    def test_every_sort_walks_all_books_exactly_once(self):
+        from .views import BOOK_SORT_FIELDS
+        all_ids = sorted(Book.objects.values_list("id", flat=True))
+        for sort in BOOK_SORT_FIELDS:
+            seen, cursor = [], None
+            while True:
+                params = {"sort": sort, **({"cursor": cursor} if cursor else {})}
+                response = self.client.get(reverse("book_list_page"), params)
+                seen += [b.id for b in response.context["books"]]
+                next_query = response.context["next_query"]
+                if not next_query:
+                    break
+                cursor = QueryDict(next_query)["cursor"]
+            self.assertEqual(sorted(seen), all_ids, sort)
+            self.assertEqual(len(seen), len(set(seen)), sort)
+
+    def test_junk_or_stale_cursor_is_the_first_page(self):
+        from .pagination import encode_cursor
+        first = [b.id for b in self.client.get(reverse("book_list_page"), {"sort": "-published_date"}).context["books"]]
+        for values in (["not-a-date", 1], [None, 1], [{"x": 1}, 1], ["2020-01-02", "abc"], ["Book 1", 3]):
+            for url in (reverse("book_list"), reverse("book_list_page")):
+                response = self.client.get(url, {"sort": "-published_date", "cursor": encode_cursor(values)})
+                self.assertEqual(response.status_code, 200, values)
+                self.assertEqual([b.id for b in response.context["books"]], first, values)
+        self.assertEqual(self.client.get(reverse("book_list"), {"cursor": "%%%garbage"}).status_code, 200)
+
+    def test_search_pages_keep_relevance_order_and_show_the_cap(self):
+        for i in range(5):
+            make_book(f"Gaban {i}", "Premchand", description="gaban " * i)
+        expected = [pk for pk, _ in search.ranked_ids("gaban")]
+        self.assertEqual(len(expected), 5)
+
+        seen, params = [], {"q": "gaban"}
+        while True:
+            response = self.client.get(reverse("book_list_page"), params)
+            seen += [b.id for b in response.context["books"]]
+            if not response.context["next_query"]:
+                break
+            params = QueryDict(response.context["next_query"])
+        self.assertEqual(seen, expected)
+
+        by_title = self.client.get(reverse("book_list"), {"q": "gaban", "sort": "title"})
+        self.assertEqual([b.title for b in by_title.context["books"]], ["Gaban 0", "Gaban 1", "Gaban 2"])
+        self.assertNotContains(by_title, "Refine your search")
+
+        with self.settings(SEARCH_MAX_RESULTS=4):
+            response = self.client.get(reverse("book_list"), {"q": "gaban"})
+        self.assertContains(response, "Showing the top 4 matches")
+
+    def test_author_filter_applies_before_the_search_cap(self):
+        for i in range(4):
+            make_book(f"Gaban {i}", "Premchand")
+        quiet = make_book("Notes", "Chugtai", description="On reading gaban")   # sirf description - sabse kam rank
+        self.assertEqual(search.ranked_ids("gaban")[-1][0], quiet.id)
+        with self.settings(SEARCH_MAX_RESULTS=2):
+            response = self.client.get(reverse("book_list"), {"q": "gaban", "author": quiet.author_id})
+        self.assertEqual([b.id for b in response.context["books"]], [quiet.id])
+
+    def test_first_page_only_ships_one_page_and_no_modals(self):
+        response = self.client.get(reverse("book_list"))
+        self.assertEqual(len(response.context["books"]), 3)
+        self.assertContains(response, "js-next-page")
+        self.assertNotContains(response, "imgModal")
+
+    def test_modal_fragment(self):
+        book = Book.objects.first()
+        response = self.client.get(reverse("book_modal", args=[book.pk]))
+        self.assertContains(response, book.author.name)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN output is SQLite's")
+class IndexPlanTests(TestCase):
+    """Hot paths ke query plans - koi index hata de to yahin pakda jaaye."""
+
+    def setUp(self):
+        self.book = make_book()
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(f"INDEX {index}", plan)
+        self.assertNotIn("TEMP B-TREE FOR ORDER BY", plan)
+
+    def test_book_list_sorts_and_next_page_seek_the_index(self):
+        from .pagination import encode_cursor, keyset_queryset
+
+        books = Book.objects.select_related("author")
+        cursor = encode_cursor([self.book.published_date, self.book.pk])
+        self.assertUsesIndex(keyset_queryset(books, "-published_date", None)[:25], "book_published_idx")
+        page_2 = keyset_queryset(books, "-published_date", cursor)[:25]
+        self.assertUsesIndex(page_2, "book_published_idx (published_date<?)")
+        self.assertUsesIndex(keyset_queryset(books, "price", None)[:25], "book_price_idx")
+        self.assertUsesIndex(keyset_queryset(books, "-like_count", None)[:25], "book_like_count_idx")
+        by_author = books.filter(author_id=self.book.author_id)
+        self.assertUsesIndex(keyset_queryset(by_author, "-published_date", None)[:25],
+                             "book_author_published_idx")
+
+    def test_admin_order_filters(self):
+        orders = Order.objects.order_by("-created_at", "-pk")
+        self.assertUsesIndex(orders.filter(status="cancelled")[:100], "order_status_created_idx")
+        self.assertUsesIndex(orders.filter(created_at__gte=timezone.now())[:100], "order_created_idx")
+        self.assertUsesIndex(orders.filter(email="a@example.com")[:20], "order_email_created_idx")
+
+    def test_bench_db_smoke(self):
+        from io import StringIO
+
+        out = StringIO()
+        call_command("bench_db", "--seed", "--books", 30, "--orders", 60, "--runs", 2, stdout=out)
+        self.assertEqual(Order.objects.count(), 60)
+        self.assertIn("admin orders ?status=cancelled", out.getvalue())
+
+    @override_settings(DEBUG=False)
+    def test_bench_db_refuses_unsafe_runs(self):
+        from io import StringIO
+
+        from django.core.management.base import CommandError
+
+        # khali catalogue -> saaf error, IndexError nahi
+        Book.objects.all().delete()
+        with self.assertRaisesMessage(CommandError, "--seed"):
+            call_command("bench_db", "--runs", 1, stdout=StringIO())
+        # DEBUG off par index drop bina --yes ke nahi
+        with self.assertRaisesMessage(CommandError, "--yes"):
+            call_command("bench_db", "--drop-indexes", "--runs", 1, stdout=StringIO())
+
+
+class CSVImportTests(TestCase):
+    def test_vectorized_import_reports_bad_rows(self):
+        import pandas as pd
+        from .importers import import_books
+
+        Author.objects.create(name="Premchand")
+        df = pd.DataFrame({
+            "title": ["Godaan", "Nirmala", "", "Gaban", "Kafan"],
+            "author": ["Premchand", "Premchand", "X", "Premchand", "Nobody New"],
+            "published_date": ["10-06-1936", "1927-01-01", "1930-01-01", "31/02/1931", "01/01/1936"],
+            "price": [250, "abc", 10, 99, None],
+        })
+        result = import_books(df)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.errors, [
+            (3, "price must be a non-negative number"),
+            (4, "title is required"),
+            (5, "published_date must be DD-MM-YYYY, YYYY-MM-DD or DD/MM/YYYY"),
+        ])
+        self.assertEqual(Author.objects.filter(name="Premchand").count(), 1)
+        kafan = Book.objects.get(title="Kafan")
+        self.assertEqual((kafan.author.name, kafan.published_date, kafan.price), ("Nobody New", date(1936, 1, 1), 0))
+        self.assertEqual(Book.objects.get(title="Godaan").published_date, date(1936, 6, 10))
+        self.assertEqual([b.title for b in search.search_books(Book.objects.all(), "godaan")], ["Godaan"])
+
+    def test_oversized_genre_and_price_are_row_errors(self):
+        import pandas as pd
+        from .importers import import_books
+
+        df = pd.DataFrame({
+            "title": ["Godaan", "Nirmala", "Gaban", "Kafan"],
+            "author": ["Premchand"] * 4,
+            "genre": ["Classic", "x" * 101, "Classic", "Classic"],
+            "published_date": ["1936-01-01"] * 4,
+            "price": [999999.99, 10, 999999.999, "inf"],
+        })
+        result = import_books(df)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [
+            (3, "genre is longer than 100 characters"),
+            (4, "price must be less than 1000000"),
+            (5, "price must be less than 1000000"),
+        ])
+
+    def test_upload_view(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        admin = User.objects.create_superuser("admin", "a@x.com", "pw")
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile("books.csv", "title,author,published_date,price\nGodaan,Premchand,10-06-1936,250\n".encode("latin-1"))
+        response = self.client.post(reverse("csvs_upload_books"), {"csv_file": upload})
+        self.assertRedirects(response, reverse("book_list"), fetch_redirect_response=False)
+        self.assertTrue(Book.objects.filter(title="Godaan").exists())
+
+    def test_reimport_upserts_and_skips_unchanged_rows(self):
+        import pandas as pd
+        from .importers import import_books
+
+        feed = pd.DataFrame({
+            "title": ["Godaan", "Gaban"],
+            "author": ["Premchand", "Premchand"],
+            "published_date": ["10-06-1936", "01-01-1931"],
+            "price": [250, 99],
+            "isbn": ["", "978-81-7028-000-1"],
+        })
+        import_books(feed)
+        godaan = Book.objects.get(title="Godaan")
+        user = User.objects.create_user("reader")
+        godaan.likes.add(user)
+
+        with self.assertNumQueries(5):   # savepoint + release, authors, existing by title, by isbn
+            again = import_books(feed)
+        self.assertEqual((again.created, again.updated, again.unchanged), (0, 0, 2))
+
+        feed.loc[0, "price"] = 300
+        feed.loc[1, "title"] = "Gaban (Revised)"   # ISBN se match, title badla
+        result = import_books(feed)
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 2, 0))
+        self.assertEqual(Book.objects.count(), 2)
+        godaan.refresh_from_db()
+        self.assertEqual((godaan.price, godaan.like_count), (300, 1))
+        self.assertEqual(Book.objects.get(isbn="9788170280001").title, "Gaban (Revised)")
+        self.assertEqual([b.title for b in search.search_books(Book.objects.all(), "revised")], ["Gaban (Revised)"])
+
+    def test_book_form_rejects_duplicate_natural_key(self):
+        from .forms import BookForm
+
+        book = make_book("Godaan", "Premchand", published_date=date(1936, 6, 10))
+        form = BookForm(data={
+            "title": "Godaan", "author": book.author_id,
+            "published_date": "1936-06-10", "price": "10.00",
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn("Title, Author and Published date already exists", str(form.non_field_errors()))
+
+
+class StreamingImportTests(TestCase):
+    def setUp(self):
+        use_temp_media(self, CSV_IMPORT_STREAM_THRESHOLD=0)
+
+    def make_import(self, text, encoding="utf-8", chunk_size=2):
+        from django.core.files.base import ContentFile
+        from .models import ImportJob
+
+        return ImportJob.objects.create(
+            file=ContentFile(text.encode(encoding), name="feed.csv"),
+            original_name="feed.csv", chunk_size=chunk_size,
+        )
+
+    def test_chunks_commit_and_resume(self):
+        from .importers import run_import
+        from .models import ImportJob
+
+        text = "title,author,published_date,price\n" + "".join(
+            f"Kitab {i},Lekhak,01-01-2000,{i}\n" for i in range(5)
+        ) + "Kharab,Lekhak,not-a-date,1\n"
+        import_job = self.make_import(text)
+
+        # Pehla chunk ho chuka, phir process mar gaya
+        with mock.patch("library.importers.time.monotonic", side_effect=[0, 10]):
+            self.assertFalse(run_import(import_job, time_budget=5))
+        self.assertEqual((import_job.chunks_done, Book.objects.count()), (1, 2))
+
+        import_job = ImportJob.objects.get(pk=import_job.pk)
+        self.assertTrue(run_import(import_job))
+        import_job.refresh_from_db()
+        self.assertEqual(import_job.status, ImportJob.DONE)
+        self.assertEqual((import_job.chunks_done, import_job.rows_done), (3, 6))
+        self.assertEqual((import_job.created_count, import_job.error_count), (5, 1))
+        self.assertEqual(import_job.errors, [[7, "published_date must be DD-MM-YYYY, YYYY-MM-DD or DD/MM/YYYY"]])
+        self.assertEqual(Book.objects.filter(title__startswith="Kitab").count(), 5)
+
+    def test_stale_runner_does_not_duplicate_chunk(self):
+        from .importers import run_import
+        from .models import ImportJob
+
+        import_job = self.make_import("title,author,published_date,price\nA,X,01-01-2000,1\nB,X,01-01-2000,1\n")
+        stale = ImportJob.objects.get(pk=import_job.pk)
+        run_import(import_job)
+        self.assertTrue(run_import(stale))   # chunk 0 pehle hi commit ho chuka
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_latin1_sniffed_from_prefix(self):
+        from .importers import run_import
+
+        import_job = self.make_import("title,author,published_date,price\nCafé,Zoë,01-01-2000,1\n", encoding="latin-1")
+        run_import(import_job)
+        self.assertEqual(import_job.encoding, "ISO-8859-1")
+        self.assertEqual(Book.objects.get().author.name, "Zoë")
+
+    def test_bytes_after_the_sniffed_prefix_are_row_errors(self):
+        from django.core.files.base import ContentFile
+        from .importers import run_import
+
+        import_job = self.make_import("title,author,published_date,price\nGodaan,Premchand,01-01-2000,1\n")
+        import_job.file.save("feed.csv", ContentFile(
+            "title,author,published_date,price\nGodaan,Premchand,01-01-2000,1\nCafé,Zoë,01-01-2000,1\n"
+            .encode("latin-1")), save=False)
+        import_job.encoding = "utf-8-sig"   # prefix UTF-8 tha, Latin-1 baad me aaya
+        import_job.save()
+        run_import(import_job)
+        self.assertEqual(list(Book.objects.values_list("title", flat=True)), ["Godaan"])
+        self.assertEqual(import_job.errors, [[3, "row has bytes that are not valid in the file's encoding"]])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_large_upload_goes_to_background_job(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import ImportJob
+
+        admin = User.objects.create_superuser("admin", "a@x.com", "pw")
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile("books.csv", b"title,author,published_date,price\nGodaan,Premchand,10-06-1936,250\n")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("csvs_upload_books"), {"csv_file": upload})
+        import_job = ImportJob.objects.get()
+        self.assertRedirects(response, reverse("csv_import_status", args=[import_job.pk]), fetch_redirect_response=False)
+        import_job.refresh_from_db()
+        self.assertEqual((import_job.status, import_job.created_count), (ImportJob.DONE, 1))
+        status = self.client.get(reverse("csv_import_status", args=[import_job.pk]), {"format": "json"}).json()
+        self.assertEqual(status["status"], "done")
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = use_temp_media(self)
+
+    def upload(self, name, data=b"same cover bytes"):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return SimpleUploadedFile(name, data, content_type="image/jpeg")
+
+    def test_identical_uploads_share_one_blob(self):
+        from .models import Blob
+
+        first = make_book("Gatsby", image=self.upload("Gatsby.jpg"))
+        with mock.patch("library.storage.ContentAddressedStorage._save") as write:
+            second = make_book("Gatsby 2", image=self.upload("Gatsby.JPG"))
+        write.assert_not_called()
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r"^images/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(Blob.objects.get().refcount, 2)
+
+        second.image = self.upload("other.jpg", b"different")
+        second.save()
+        first.delete()
+        refs = dict(Blob.objects.values_list("name", "refcount"))
+        self.assertEqual(refs, {first.image.name: 0, second.image.name: 1})
+
+    def test_gc_removes_only_unreferenced_blobs(self):
+        import os
+        from io import StringIO
+        from .models import Blob
+
+        keep = make_book("Keep", image=self.upload("a.jpg", b"keep"))
+        gone = make_book("Gone", image=self.upload("b.jpg", b"gone"))
+        gone_name = gone.image.name
+        gone.delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        call_command("gc_media", stdout=StringIO())
+        self.assertEqual(list(Blob.objects.values_list("name", flat=True)), [keep.image.name])
+        self.assertTrue(os.path.exists(os.path.join(self.media, keep.image.name)))
+        self.assertFalse(os.path.exists(os.path.join(self.media, gone_name)))
+
+    def test_gc_keeps_a_blob_reuploaded_after_it_was_picked(self):
+        import os
+        from io import StringIO
+        from django.db.models.query import QuerySet
+        from .models import Blob
+
+        gone = make_book("Gone", image=self.upload("b.jpg", b"cover"))
+        name = gone.image.name
+        gone.delete()
+        Blob.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        real_iterator = QuerySet.iterator
+
+        def reupload_midway(qs, *args, **kwargs):
+            picked = list(real_iterator(qs, *args, **kwargs))
+            make_book("Back", image=self.upload("c.jpg", b"cover"))   # same content, GC ke beech
+            return iter(picked)
+
+        with mock.patch.object(QuerySet, "iterator", reupload_midway):
+            call_command("gc_media", stdout=StringIO())
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        self.assertTrue(os.path.exists(os.path.join(self.media, name)))
+
+    def test_adopt_legacy_dedupes_old_uploads(self):
+        import os
+        from io import StringIO
+        from .models import Blob
+
+        os.makedirs(os.path.join(self.media, "images"))
+        for name in ("Gatsby.jpg", "Gatsby_W1Gh59r.jpg", "Gatsby_e7H6IJ5.jpg"):
+            with open(os.path.join(self.media, "images", name), "wb") as f:
+                f.write(b"old cover")
+        book = make_book("Gatsby")
+        Book.objects.filter(pk=book.pk).update(image="images/Gatsby_W1Gh59r.jpg")
+
+        call_command("gc_media", "--adopt-legacy", stdout=StringIO())
+        book.refresh_from_db()
+        blob = Blob.objects.get()
+        self.assertEqual((book.image.name, blob.refcount), (blob.name, 1))
+        self.assertEqual(os.listdir(os.path.join(self.media, "images")), [blob.name.split("/")[1]])
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media = use_temp_media(self)
+
+    def png(self, width=900, height=1200):
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        out = BytesIO()
+        Image.new("RGBA", (width, height), (200, 30, 30, 255)).save(out, "PNG")
+        return SimpleUploadedFile("cover.png", out.getvalue(), content_type="image/png")
+
+    @override_settings(JOBS_EAGER=True, IMAGE_DERIVATIVE_WIDTHS=(160, 320))
+    def test_upload_queues_derivatives_and_tag_emits_srcset(self):
+        from PIL import Image
+        from django.template import Context, Template
+        from . import images
+
+        template = Template('{% load library_tags %}{% responsive_img book.image alt="Cover" sizes="200px" class="x" %}')
+        with self.captureOnCommitCallbacks(execute=True):
+            book = make_book("Gatsby", image=self.png())
+            html = template.render(Context({"book": book}))
+        self.assertIn(f'src="{book.image.url}"', html)   # abhi ready nahi - original
+
+        images._widths.clear()
+        self.assertTrue(images.is_ready(book.image.name))
+        with Image.open(images.overwrite_storage().path(images.derivative_name(book.image.name, 160, "webp"))) as thumb:
+            self.assertEqual(thumb.size, (160, 213))
+        html = template.render(Context({"book": book}))
+        self.assertIn('<source type="image/webp" srcset="/media/derivatives/', html)
+        self.assertIn(" 320w", html)
+        self.assertIn('sizes="200px" alt="Cover" decoding="async" class="x" loading="lazy"', html)
+        self.assertNotIn(book.image.url, html)
+
+    def test_small_source_is_not_upscaled(self):
+        from PIL import Image
+        from . import images
+
+        book = make_book("Tiny", image=self.png(100, 50))
+        self.assertEqual(images.generate_derivatives(book.image.name), 2)
+        self.assertEqual(images.generate_derivatives(book.image.name), 0)
+        with Image.open(images.overwrite_storage().path(images.derivative_name(book.image.name, 100, "jpeg"))) as big:
+            self.assertEqual(big.size, (100, 50))
+
+    def test_srcset_stops_at_the_source_width_and_is_cached(self):
+        from django.core.cache import cache
+        from django.template import Context, Template
+        from . import images
+
+        book = make_book("Mid", image=self.png(500, 300))
+        images.generate_derivatives(book.image.name)
+        template = Template('{% load library_tags %}{% responsive_img book.image %}')
+
+        images._widths.clear()
+        cache.clear()   # naya process: ek baar storage se pata karo
+        self.assertEqual(images.available_widths(book.image.name), [160, 320, 500])
+        images._widths.clear()   # doosra process, shared cache
+        with mock.patch.object(type(images.overwrite_storage()), "exists") as exists:
+            html = template.render(Context({"book": book}))
+        exists.assert_not_called()
+        self.assertIn(" 500w", html)
+        self.assertNotIn(" 640w", html)
+
+    def test_fixed_names_get_no_derivatives(self):
+        from django.core.files.base import ContentFile
+        from django.template import Context, Template
+        from .models import Profile
+        from . import images
+
+        Profile.objects.create(user=User.objects.create_user("reader"))   # default.png avatar
+        self.assertFalse(Job.objects.filter(name="library.tasks.make_image_derivatives").exists())
+
+        # Purana upload: naam content se nahi bana, file jagah par badal sakti hai
+        images.overwrite_storage().save("images/Gatsby.png", ContentFile(self.png().read()))
+        book = make_book("Gatsby")
+        Book.objects.filter(pk=book.pk).update(image="images/Gatsby.png")
+        book.refresh_from_db()
+        self.assertEqual(images.generate_derivatives("images/Gatsby.png"), 0)
+        html = Template("{% load library_tags %}{% responsive_img book.image %}").render(Context({"book": book}))
+        self.assertIn('src="/media/images/Gatsby.png"', html)
+        self.assertNotIn("derivatives/", html)
+
+    def test_hashed_media_is_served_immutable(self):
+        from .middleware import ImmutableMediaMiddleware
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        middleware = ImmutableMediaMiddleware(lambda request: HttpResponse("img"))
+        hashed = middleware(RequestFactory().get("/media/derivatives/ab/ab12-160.webp"))
+        blob = middleware(RequestFactory().get(f"/media/images/3f/{'3f' * 32}.jpg"))
+        legacy = middleware(RequestFactory().get("/media/images/Gatsby.jpg"))
+        self.assertIn("immutable", hashed["Cache-Control"])
+        self.assertIn("max-age=31536000", blob["Cache-Control"])
+        self.assertFalse(legacy.has_header("Cache-Control"))
+
+
+class OrderPdfTests(TestCase):
+    def setUp(self):
+        use_temp_media(self)
+
+    def make_order(self, book=None, **kwargs):
+        kwargs.setdefault("address", "12 MG Road, Lucknow")
+        order = Order.objects.create(
+            book=book or make_book(), name="Asha", email="asha@example.com", phone="99",
+            quantity=2, **kwargs,
+        )
+        return Order.objects.select_related("book__author").get(pk=order.pk)
+
+    def test_receipts_render_once_and_share_the_stored_pdf(self):
+        from django.core import mail
+        from .tasks import send_order_receipts
+        from .utils import pdf
+
+        order = self.make_order(notes="Gift (wrap)")
+        with mock.patch("library.utils.pdf.render_order_pdf", wraps=pdf.render_order_pdf) as render:
+            send_order_receipts(order.id)
+            send_order_receipts(order.id)
+        self.assertEqual(render.call_count, 1)
+
+        attachments = [m.attachments[0][1] for m in mail.outbox]
+        self.assertEqual(len(attachments), 4)
+        self.assertEqual(len(set(attachments)), 1)
+        body = attachments[0]
+        self.assertTrue(body.startswith(b"%PDF-1.4") and body.endswith(b"%%EOF\n"))
+        self.assertIn(b"(Gift \\(wrap\\)) Tj", body)
+        self.assertIn(b"(Rs. 398.00) Tj", body)
+
+        name = pdf.order_pdf_name(order)
+        whatsapp = Job.objects.filter(name="library.tasks.send_order_whatsapp").last()
+        self.assertEqual(whatsapp.payload["pdf_url"], f"https://library-1-u3wy.onrender.com/media/{name}")
+
+        order.address = "New address"
+        order.save()
+        self.assertNotEqual(pdf.order_pdf_name(order), name)
+
+    def test_multi_page_writer_xref(self):
+        from io import BytesIO
+        from .utils.pdf import OrderPdfWriter, order_pdf_context
+
+        context = order_pdf_context(self.make_order())
+        out = BytesIO()
+        writer = OrderPdfWriter(out)
+        for _ in range(3):
+            writer.add_order(context)
+        writer.close()
+        data = out.getvalue()
+
+        self.assertIn(b"/Count 3", data)
+        self.assertEqual(data.count(b"/Subtype /Form"), 1)   # frame sirf ek baar
+        start = int(data.rsplit(b"startxref\n", 1)[1].split()[0])
+        entries = data[start:].split(b"trailer")[0].splitlines()[3:]
+        for number, entry in enumerate(entries, 1):
+            self.assertTrue(data[int(entry[:10]):].startswith(b"%d 0 obj" % number))
+
+    def test_bulk_export_zip_and_merged_pdf(self):
+        import zipfile
+        from io import BytesIO
+        from .invoices import iter_merged_pdf, iter_zip
+        from .utils.pdf import order_pdf_context, render_order_pdf
+
+        book = make_book()
+        orders = [self.make_order(book, notes=f"order {i}") for i in range(5)]
+        queryset = Order.objects.filter(pk__in=[o.pk for o in orders])
+
+        # workers=2 -> ProcessPoolExecutor; batch_size=2 -> 3 batches, order preserved
+        archive = zipfile.ZipFile(BytesIO(b"".join(iter_zip(queryset, workers=2, batch_size=2))))
+        self.assertEqual(archive.namelist(), [f"order_{o.pk}.pdf" for o in orders])
+        self.assertEqual(archive.read(f"order_{orders[3].pk}.pdf"), render_order_pdf(order_pdf_context(orders[3])))
+
+        merged = b"".join(iter_merged_pdf(queryset, workers=0, batch_size=2))
+        self.assertIn(b"/Count 5", merged)
+        self.assertLess(merged.index(b"(order 1) Tj"), merged.index(b"(order 4) Tj"))
+
+    def test_order_pdf_download_renders_once_for_owner_only(self):
+        from . import tasks
+
+        order = self.make_order()
+        url = reverse("order_pdf", args=[order.pk])
+        User.objects.create_user("other", "other@example.com", "pass")
+        self.client.login(username="other", password="pass")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        User.objects.create_user("asha", "Asha@example.com", "pass")
+        self.client.login(username="asha", password="pass")
+        with mock.patch("library.utils.pdf.render_order_html_pdf", return_value=b"%PDF-html") as render:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 202)
+            self.client.get(url)   # coalesce: abhi bhi ek hi pending job
+            jobs = Job.objects.filter(name="library.tasks.render_order_html_pdf")
+            self.assertEqual(jobs.count(), 1)
+            tasks.render_order_html_pdf(**jobs.get().payload)
+
+            response = self.client.get(url)
+            self.assertEqual(b"".join(response.streaming_content), b"%PDF-html")
+            self.assertIn('attachment; filename="order_', response["Content-Disposition"])
+            with self.settings(ORDER_PDF_SENDFILE="x-accel-redirect"):
+                response = self.client.get(url)
+            self.assertTrue(response["X-Accel-Redirect"].startswith("/protected-media/order_pdfs/"))
+        self.assertEqual(render.call_count, 1)
+
+    def test_order_pdf_email_is_queued(self):
+        from django.core import mail
+        from . import tasks
+
+        order = self.make_order()
+        User.objects.create_user("asha", "asha@example.com", "pass")
+        self.client.login(username="asha", password="pass")
+        url = reverse("order_pdf_email", args=[order.pk])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertRedirects(self.client.post(url), reverse("book_list"), fetch_redirect_response=False)
+        self.assertEqual(len(mail.outbox), 0)
+
+        job = Job.objects.get(name="library.tasks.send_order_pdf_email")
+        with mock.patch("library.utils.pdf.render_order_html_pdf", side_effect=OSError("no pango")):
+            tasks.send_order_pdf_email(**job.payload)
+        # weasyprint nahi chala -> built-in renderer ki PDF
+        self.assertEqual(mail.outbox[0].to, ["asha@example.com"])
+        self.assertTrue(mail.outbox[0].attachments[0][1].startswith(b"%PDF-1.4"))
+
+    def test_admin_action_streams_invoices(self):
+        order = self.make_order()
+        User.objects.create_superuser("boss", "boss@example.com", "pass")
+        self.client.login(username="boss", password="pass")
+        with self.settings(INVOICE_EXPORT_WORKERS=0):
+            response = self.client.post("/admin/library/order/", {
+                "action": "export_invoices_pdf", "_selected_action": [order.pk],
+            })
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF-1.4"))
+
+
+class PooledMailTests(TestCase):
+    def setUp(self):
+        from . import mail
+        mail.close_all()
+        self.addCleanup(mail.close_all)
+
+    def message(self, subject="Hi", to="asha@example.com"):
+        from django.core.mail import EmailMessage
+        return EmailMessage(subject, "body", "library@example.com", [to])
+
+    def test_connection_is_reused_and_duplicates_dropped(self):
+        from django.core import mail as django_mail
+        from django.core.mail import get_connection
+        from . import mail
+
+        with mock.patch("library.mail.get_connection", wraps=get_connection) as connect:
+            self.assertEqual(mail.send_messages([self.message(), self.message(), self.message("Other")]), 2)
+            mail.send(self.message(to="ravi@example.com"))
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual([m.subject for m in django_mail.outbox], ["Hi", "Other", "Hi"])
+
+    def test_stale_pooled_connection_is_replaced_before_sending(self):
+        import smtplib
+        from django.core import mail as django_mail
+        from django.core.mail import get_connection
+        from . import mail
+
+        mail.send(self.message())
+        # Server ne idle connection kaat diya: NOOP fail
+        mail._pool[0].backend.connection = mock.Mock(noop=mock.Mock(side_effect=smtplib.SMTPServerDisconnected()))
+        with mock.patch("library.mail.get_connection", wraps=get_connection) as connect:
+            self.assertEqual(mail.send(self.message("Again")), 1)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual([m.subject for m in django_mail.outbox], ["Hi", "Again"])
+
+    def test_drop_while_sending_is_not_resent(self):
+        import smtplib
+        from . import mail
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+                        side_effect=smtplib.SMTPServerDisconnected()) as send:
+            with self.assertRaises(smtplib.SMTPServerDisconnected):
+                mail.send_messages([self.message(), self.message("Other")])
+        self.assertEqual(send.call_count, 1)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+                        side_effect=[smtplib.SMTPServerDisconnected(), 1]) as send:
+            errors = mail.deliver([self.message(), self.message("Other")])
+        self.assertIsInstance(errors[0], smtplib.SMTPServerDisconnected)
+        self.assertIsNone(errors[1])
+        self.assertEqual([call.args[0][0].subject for call in send.call_args_list], ["Hi", "Other"])
+
+
+class _TwilioStub(BaseHTTPRequestHandler):
+    """Local stand-in for api.twilio.com's Messages endpoint."""
+
+    def do_POST(self):
+        from urllib.parse import parse_qs
+
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        self.server.requests.append((self.path, {k: v[0] for k, v in form.items()}))
+        body = json.dumps({"sid": f"SM{len(self.server.requests)}", "status": "queued"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class WhatsAppTests(TestCase):
+    def setUp(self):
+        import threading
+        from http.server import ThreadingHTTPServer
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _TwilioStub)
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.requests = server.requests
+        overrides = self.settings(
+            TWILIO_ACCOUNT_SID="ACtest", TWILIO_AUTH_TOKEN="secret",
+            TWILIO_WHATSAPP_FROM="whatsapp:+14155238886",
+            TWILIO_API_BASE=f"http://127.0.0.1:{server.server_port}",
+            TWILIO_MESSAGES_PER_SECOND=100,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_order_message_reuses_the_process_client(self):
+        from . import tasks, whatsapp
+
+        order = Order.objects.create(book=make_book(), name="Asha", email="a@example.com",
+                                     phone="98765 43210", address="Delhi")
+        tasks.send_order_whatsapp(order.id, pdf_url="https://example.com/o.pdf")
+        client = whatsapp.client()
+        tasks.send_order_whatsapp(order.id)
+        self.assertIs(whatsapp.client(), client)
+
+        path, form = self.requests[0]
+        self.assertEqual(path, "/2010-04-01/Accounts/ACtest/Messages.json")
+        self.assertEqual(form["To"], "whatsapp:+919876543210")
+        self.assertIn("PDF: https://example.com/o.pdf", form["Body"])
+        self.assertEqual(len(self.requests), 2)
+
+    def test_async_bulk_send(self):
+        from . import whatsapp
+
+        messages = [(f"whatsapp:+9198765000{i:02d}", f"msg {i}") for i in range(12)]
+        sids = whatsapp.send_many(messages, concurrency=4)
+        self.assertEqual(len(sids), 12)
+        self.assertTrue(all(isinstance(sid, str) and sid.startswith("SM") for sid in sids))
+        self.assertEqual(sorted(form["Body"] for _, form in self.requests), sorted(m[1] for m in messages))
+
+    def test_rate_limiter_spaces_out_callers(self):
+        from .whatsapp import RateLimiter
+
+        limiter = RateLimiter(rate=20, burst=2)
+        delays = [limiter.reserve() for _ in range(5)]
+        self.assertEqual(delays[:2], [0.0, 0.0])
+        self.assertAlmostEqual(delays[2], 0.05, places=2)
+        self.assertAlmostEqual(delays[4], 0.15, places=2)
+
+
+class NewsletterCampaignTests(TestCase):
+    def setUp(self):
+        from . import mail
+        from .models import NewsletterSubscriber
+
+        mail.close_all()
+        self.addCleanup(mail.close_all)
+        NewsletterSubscriber.objects.bulk_create(
+            NewsletterSubscriber(email=f"reader{i}@example.com") for i in range(7)
+        )
+
+    def test_campaign_renders_once_and_records_every_recipient(self):
+        from django.core import mail as django_mail
+        from .models import Campaign, CampaignDelivery
+        from . import newsletter
+
+        campaign = Campaign.objects.create(subject="New arrivals", body="<p>Godaan is back</p>")
+        with self.settings(NEWSLETTER_CHUNK_SIZE=3, EMAIL_BATCH_SIZE=2), \
+                mock.patch("library.newsletter.render_to_string", wraps=newsletter.render_to_string) as render:
+            self.assertTrue(newsletter.send_campaign(campaign))
+        self.assertEqual(render.call_count, 1)
+
+        self.assertEqual(len(django_mail.outbox), 7)
+        self.assertIn("Godaan is back", django_mail.outbox[0].alternatives[0][0])
+        self.assertEqual(CampaignDelivery.objects.filter(status=CampaignDelivery.SENT).count(), 7)
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count), (Campaign.SENT, 7))
+
+    def test_failed_recipient_is_recorded_and_crash_resumes_from_cursor(self):
+        import smtplib
+        from django.core import mail as django_mail
+        from django.core.mail.backends.locmem import EmailBackend
+        from .models import Campaign, CampaignDelivery, NewsletterSubscriber
+        from . import newsletter
+
+        real_send, real_chunk = EmailBackend.send_messages, newsletter._send_chunk
+
+        def refuse_reader1(backend, messages):
+            if messages[0].to == ["reader1@example.com"]:
+                raise smtplib.SMTPRecipientsRefused({"reader1@example.com": (550, b"no such user")})
+            return real_send(backend, messages)
+
+        def crash_on_second_chunk(*args):
+            if crash_on_second_chunk.calls == 1:
+                raise RuntimeError("worker killed")
+            crash_on_second_chunk.calls += 1
+            return real_chunk(*args)
+        crash_on_second_chunk.calls = 0
+
+        campaign = Campaign.objects.create(subject="Hi", body="<p>x</p>")
+        with self.settings(NEWSLETTER_CHUNK_SIZE=3), \
+                mock.patch.object(EmailBackend, "send_messages", refuse_reader1):
+            with mock.patch("library.newsletter._send_chunk", crash_on_second_chunk), \
+                    self.assertRaises(RuntimeError):
+                newsletter.send_campaign(campaign)
+            campaign.refresh_from_db()
+            self.assertEqual(campaign.status, Campaign.SENDING)
+            self.assertEqual(campaign.cursor, NewsletterSubscriber.objects.order_by("pk")[2].pk)
+            self.assertEqual((campaign.sent_count, campaign.failed_count), (2, 1))   # sirf pehla chunk
+            self.assertEqual(campaign.last_error, "worker killed")
+
+            self.assertTrue(newsletter.send_campaign(campaign))
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.sent_count, campaign.failed_count), (Campaign.SENT, 6, 1))
+        failed = CampaignDelivery.objects.get(status=CampaignDelivery.FAILED)
+        self.assertEqual(failed.email, "reader1@example.com")
+        self.assertIn("no such user", failed.error)
+        self.assertEqual(CampaignDelivery.objects.count(), 7)
+        self.assertEqual(len(django_mail.outbox), 6)   # koi dobara nahi gaya
+
+    def test_second_run_does_not_send_while_the_lease_is_held(self):
+        from django.core import mail as django_mail
+        from .models import Campaign, Job
+        from . import newsletter, tasks
+
+        campaign = Campaign.objects.create(subject="Hi", body="<p>x</p>", status=Campaign.SENDING)
+        Campaign.objects.filter(pk=campaign.pk).update(locked_at=timezone.now(), lock_token="other-worker")
+        self.assertIsNone(newsletter.send_campaign(campaign))
+        tasks.send_campaign(campaign.id)
+        self.assertEqual(len(django_mail.outbox), 0)
+        self.assertFalse(Job.objects.exists())   # busy run khud ko requeue nahi karta
+
+        # Lease holder mar gaya: expire hone ke baad agla run le leta hai
+        Campaign.objects.filter(pk=campaign.pk).update(locked_at=timezone.now() - timedelta(minutes=10))
+        self.assertTrue(newsletter.send_campaign(campaign))
+        self.assertEqual(len(django_mail.outbox), 7)
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.locked_at, campaign.lock_token), (Campaign.SENT, None, ""))
+
+    def test_admin_action_skips_campaigns_already_sending(self):
+        from .models import Campaign, Job
+
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        draft = Campaign.objects.create(subject="New", body="x")
+        sending = Campaign.objects.create(subject="Old", body="x", status=Campaign.SENDING)
+        self.client.post(reverse("admin:library_campaign_changelist"),
+                         {"action": "send_now", "_selected_action": [draft.pk, sending.pk]})
+        self.assertEqual([job.payload["campaign_id"] for job in Job.objects.all()], [draft.pk])
+
+    def test_requeue_coalesces_with_a_pending_job(self):
+        from .models import Campaign, Job
+        from . import tasks
+
+        campaign = Campaign.objects.create(subject="Hi", body="<p>x</p>")
+        tasks.enqueue("library.tasks.send_campaign", campaign_id=campaign.pk)
+        with self.settings(NEWSLETTER_CHUNK_SIZE=1, NEWSLETTER_JOB_SECONDS=1e-9):
+            tasks.send_campaign(campaign.pk)   # ek chunk, phir budget khatam
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+        self.assertEqual(Campaign.objects.get(pk=campaign.pk).sent_count, 1)
+
+
+class StatsApiTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        make_book("Godaan", "Premchand")
+        make_book("Gaban", "Premchand", genre="Classic")
+
+    def test_aggregates_are_cached_until_the_catalogue_changes(self):
+        url = reverse("api_top_authors")
+        response = self.client.get(url)
+        self.assertEqual(response.json(), {"labels": ["Premchand"], "counts": [2]})
+        self.assertIn("max-age=60", response["Cache-Control"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, response.content)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        make_book("Nirmala", "Premchand")
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["counts"], [3])
+        genres = self.client.get(reverse("api_books_by_genre")).json()
+        self.assertEqual(dict(zip(genres["labels"], genres["counts"])), {"Fiction": 2, "Classic": 1})
+
+    def test_counters_follow_user_changes_but_not_logins(self):
+        url = reverse("counters")
+        first = self.client.get(url)
+        self.assertEqual(first.json()["total_books"], 2)
+
+        user = User.objects.create_user("asha", password="pass")
+        second = self.client.get(url)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.json()["active_users"], first.json()["active_users"] + 1)
+
+        self.client.login(username="asha", password="pass")   # last_login update
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"]).status_code, 304)
+        user.delete()
+        self.assertEqual(self.client.get(url).json()["active_users"], first.json()["active_users"])
+
+
+class RecentWidgetsTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        make_book("Godaan", "Premchand")
+        self.client.force_login(User.objects.create_user("reader", password="pw"))
+
+    def catalogue_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q["sql"] for q in ctx.captured_queries
+                          if "library_book" in q["sql"] or "library_author" in q["sql"]]
+
+    def test_widget_is_cached_per_catalogue_version(self):
+        response, queries = self.catalogue_queries(reverse("change_password"))
+        self.assertContains(response, "Godaan")
+        self.assertEqual(len(queries), 2)
+
+        # Doosre page par bhi wahi fragment - koi Book/Author query nahi
+        response, queries = self.catalogue_queries(reverse("home"))
+        self.assertContains(response, "Premchand")
+        self.assertEqual(queries, [])
+
+        make_book("Gaban", "Premchand")
+        response, queries = self.catalogue_queries(reverse("change_password"))
+        self.assertContains(response, "Gaban")
+        self.assertEqual(len(queries), 2)
+
+    def test_context_processor_is_lazy(self):
+        from django.test import RequestFactory
+        from .context_processors import recent_books_and_authors
+
+        with self.assertNumQueries(0):
+            context = recent_books_and_authors(RequestFactory().get("/"))
+        with self.assertNumQueries(2):
+            self.assertEqual([b.title for b in context["recent_books"]], ["Godaan"])
+            self.assertEqual([a.name for a in context["recent_authors"]], ["Premchand"])
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tiered-test"},
+})
+class TieredCacheTests(TestCase):
+    def worker(self, name, **options):
+        """Ek gunicorn worker ka default cache - apna local tier, shared tier common."""
+        from .cache_backends import TieredCache
+        return TieredCache(name, {"OPTIONS": {"SHARED": "shared", "LOCAL_TIMEOUT": 5, **options}})
+
+    def test_workers_share_tier_two_and_local_copies_expire(self):
+        import time
+        from django.core.cache import caches
+
+        caches["shared"].clear()
+        a, b = self.worker("a"), self.worker("b")
+        a.set("version", 1, None)
+        self.assertEqual(b.get("version"), 1)
+
+        a.set("version", 2, None)
+        self.assertEqual(a.get("version"), 2)
+        self.assertEqual(b.get("version"), 1)   # b ki local copy, LOCAL_TIMEOUT tak
+        with mock.patch("time.time", return_value=time.time() + 6):
+            self.assertEqual(b.get("version"), 2)
+        self.assertEqual(caches["shared"].get("version"), 2)
+
+        self.assertFalse(b.add("version", 3))
+        self.assertTrue(b.add("fresh", 1))
+        a.delete("fresh")
+        self.assertIsNone(caches["shared"].get("fresh"))
+
+    def test_local_tier_is_bounded_lru(self):
+        cache = self.worker("lru", LOCAL_MAX_ENTRIES=3)
+        for i in range(10):
+            cache.set(f"k{i}", i)
+        self.assertLessEqual(len(cache.local._cache), 3)
+        self.assertEqual(cache.get("k0"), 0)   # local se gaya, shared me hai
+
+    async def test_async_api_uses_both_tiers(self):
+        from django.core.cache import caches
+
+        await caches["shared"].aclear()
+        a, b = self.worker("async-a"), self.worker("async-b")
+        await a.aset("version", 1, None)
+        self.assertEqual(await b.aget("version"), 1)
+        self.assertEqual(b.local.get("version"), 1)   # shared se aaya, local me bhara
+        self.assertEqual(await b.aget_or_set("fresh", 7), 7)
+        self.assertFalse(await a.aadd("fresh", 8))
+        self.assertEqual(await b.aget_many(["version", "fresh", "nope"]), {"version": 1, "fresh": 7})
+
+    async def test_concurrent_misses_compute_once(self):
+        import asyncio
+        from .cache import aget_or_compute
+
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "body"
+
+        bodies = await asyncio.gather(*(aget_or_compute("library:test:stampede", compute, 60) for _ in range(20)))
+        self.assertEqual(bodies, ["body"] * 20)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(await aget_or_compute("library:test:stampede", compute, 60), "body")
+        self.assertEqual(len(calls), 1)
+
+
+class ViewCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.book = make_book("Godaan", "Premchand")
+        self.user = User.objects.create_user("reader", password="pw")
+        self.client.force_login(self.user)
+        self.client.get(reverse("author_list"))   # csrf cookie mil jaaye
+
+    def test_author_list_cached_per_user_until_catalogue_changes(self):
+        url = reverse("author_list")
+        self.assertEqual(self.client.get(url)["X-Cache"], "miss")
+        with self.assertNumQueries(3):   # session + user + validator aggregate
+            response = self.client.get(url)
+        self.assertEqual(response["X-Cache"], "hit")
+        self.assertContains(response, "reader")
+
+        other = self.client_class()
+        other.force_login(User.objects.create_user("second", password="pw"))
+        response = other.get(url)
+        self.assertNotContains(response, "reader")
+        self.assertContains(response, "second")
+
+        body = reverse("author_list_body")
+        self.assertNotContains(self.client.get(body), "Prasad")
+        Author.objects.create(name="Prasad")
+        self.assertContains(self.client.get(body), "Prasad")
+
+    def test_like_bumps_book_tag(self):
+        url = reverse("book_detail", args=[self.book.pk])
+        self.client.get(url)
+        self.assertContains(self.client.get(url), "Like")
+        self.client.post(reverse("like_book", args=[self.book.pk]))
+        response = self.client.get(url)
+        self.assertNotEqual(response.get("X-Cache"), "hit")
+        self.assertContains(response, "Unlike")
+        self.assertEqual(self.client.get(reverse("books_by_author", args=[self.book.author_id]))
+                         .context["liked_ids"], [self.book.pk])
+
+    def test_pending_messages_skip_the_cache(self):
+        from django.contrib import messages
+        from django.contrib.messages.storage.fallback import FallbackStorage
+        from django.test import RequestFactory
+        from .views import author_list
+
+        request = RequestFactory().get(reverse("author_list"))
+        request.user, request.session = self.user, self.client.session
+        request._messages = FallbackStorage(request)
+        messages.success(request, "Saved")
+        self.assertNotIn("X-Cache", author_list(request))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.book = make_book("Godaan", "Premchand")
+        self.user = User.objects.create_user("reader", password="pw")
+
+    def test_public_fragment_validators_and_headers(self):
+        url = reverse("book_body", args=[self.book.pk])
+        response = self.client.get(url)   # login nahi chahiye
+        self.assertContains(response, "Godaan")
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertNotIn("csrftoken", response.cookies)
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+        self.assertIn("public", cached["Cache-Control"])
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304)
+
+        # Author ka naam badla -> book body bhi badli
+        Author.objects.filter(pk=self.book.author_id).update(name="Munshi Premchand", updated_at=timezone.now())
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertContains(fresh, "Munshi Premchand")
+
+        self.assertEqual(self.client.get(reverse("book_body", args=[9999])).status_code, 404)
+
+    def test_author_books_fragment_tracks_deletes_and_likes(self):
+        url = reverse("author_books_body", args=[self.book.author_id])
+        other = make_book("Gaban", "Premchand")
+        etag = self.client.get(url)["ETag"]
+        other.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, "Gaban")
+
+        etag = response["ETag"]
+        self.user.liked_books.add(self.book)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "1 Likes")
+
+    def test_shell_pages_are_private_and_per_user(self):
+        self.client.force_login(self.user)
+        url = reverse("book_detail", args=[self.book.pk])
+        self.client.get(url)   # csrf cookie
+        response = self.client.get(url)
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        self.user.liked_books.add(self.book)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertContains(response, "Unlike")
+
+        other = self.client_class()
+        other.force_login(User.objects.create_user("second", password="pw"))
+        self.assertEqual(other.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_superuser_buttons_are_css_gated(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse("author_list")), ".admin-only { display: none; }")
+        self.assertContains(self.client.get(reverse("author_list_body")), "admin-only")
+        User.objects.create_superuser("boss", "boss@example.com", "pw")
+        self.client.login(username="boss", password="pw")
+        self.assertNotContains(self.client.get(reverse("author_list")), ".admin-only { display: none; }")
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.book = make_book("Godaan", "Premchand", price="200.00")
+        self.other = make_book("Gaban", "Premchand", price="150.50")
+        self.today = timezone.localdate()
+        User.objects.create_superuser("boss", "boss@example.com", "pass")
+        self.client.login(username="boss", password="pass")
+
+    def order(self, book, days_ago, quantity=1, status="confirmed"):
+        order = Order.objects.create(book=book, name="A", email="a@example.com", phone="9",
+                                     address="Delhi", quantity=quantity, status=status)
+        created = timezone.now() - timedelta(days=days_ago)
+        Order.objects.filter(pk=order.pk).update(created_at=created)
+        order.created_at = created
+        return order
+
+    def test_rollup_and_bucketed_apis(self):
+        from .sales import rollup
+
+        old = self.order(self.book, 40, quantity=2)
+        self.order(self.book, 40)
+        self.order(self.other, 3, quantity=4)
+        self.order(self.book, 3, quantity=5, status="cancelled")
+        rollup()
+
+        daily = self.client.get(reverse("api_sales"), {"period": "day"}).json()
+        self.assertEqual(daily["orders"], [2, 1])   # cancelled default me nahi
+        self.assertEqual(daily["revenue"], [600.0, 602.0])
+        monthly = self.client.get(reverse("api_sales"), {"period": "month", "days": 365}).json()
+        self.assertEqual(sum(monthly["quantity"]), 7)
+
+        top = self.client.get(reverse("api_sales_top_books")).json()
+        self.assertEqual(top["labels"], ["Gaban", "Godaan"])
+        status = self.client.get(reverse("api_sales_status")).json()
+        self.assertEqual(dict(zip(status["labels"], status["orders"])), {"confirmed": 3, "cancelled": 1})
+
+        # Incremental: sirf cursor ke din se; purane order ka status badla to cursor peeche
+        response = self.client.get(reverse("api_sales_top_books"))
+        self.order(self.other, 0, quantity=1)
+        old.status = "cancelled"
+        old.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            written, since_day = rollup()
+        self.assertEqual(since_day, timezone.localtime(old.created_at).date())
+        self.assertNotEqual(self.client.get(reverse("api_sales_top_books"))["ETag"], response["ETag"])
+        top = self.client.get(reverse("api_sales_top_books")).json()
+        self.assertEqual(dict(zip(top["labels"], top["quantity"])), {"Gaban": 5, "Godaan": 1})
+
+        written, since_day = rollup()
+        self.assertEqual(since_day, self.today)
+        self.assertEqual(DailyBookSales.objects.filter(day=self.today).count(), 1)
+
+    def test_price_edit_does_not_rewrite_past_revenue(self):
+        from .sales import rollup
+
+        self.order(self.book, 2, quantity=2)
+        Book.objects.filter(pk=self.book.pk).update(price="999.00")
+        rollup(rebuild=True)
+        self.assertEqual(DailyBookSales.objects.get().revenue, Decimal("400.00"))
+
+    def test_sales_apis_are_admin_only_and_revalidate(self):
+        from .sales import rollup
+
+        self.order(self.book, 1)
+        rollup()
+        url = reverse("api_sales")
+        first = self.client.get(url)
+        self.assertIn("private", first["Cache-Control"])
+        with self.assertNumQueries(2):   # session + user; rollup table nahi
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        for params in ({"period": "year"}, {"from": "2024-13-01"}, {"days": "abc"},
+                       {"from": "2024-02-01", "to": "2024-01-01"}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertTrue(response.content, params)   # reason bhi
+        self.assertEqual(self.client.get(reverse("api_sales_top_books"), {"to": "kal"}).status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        from . import routers
+        self.routers = routers
+        self.router = routers.ReplicaRouter()
+        routers.unpin()
+        self.addCleanup(routers.unpin)
+
+    def test_catalogue_reads_use_replica_until_a_write(self):
+        self.assertEqual(self.router.db_for_read(Book), "replica")
+        self.assertEqual(self.router.db_for_read(DailyBookSales), "replica")
+        self.assertEqual(self.router.db_for_read(Order), "default")
+        self.assertEqual(self.router.db_for_read(User), "default")
+        with mock.patch.object(connections["default"], "in_atomic_block", True):
+            self.assertEqual(self.router.db_for_read(Book), "default")
+
+        self.assertEqual(self.router.db_for_write(Book), "default")
+        self.assertEqual(self.router.db_for_read(Book), "default")   # apna likha turant dikhe
+        self.assertFalse(self.router.allow_migrate("replica", "library"))
+        self.assertTrue(self.router.allow_migrate("default", "library"))
+
+    @override_settings(REPLICA_PIN_SECONDS=5)
+    def test_pin_cookie_follows_a_write(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        def view(request):
+            if request.method == "POST":
+                self.router.db_for_write(Book)
+            return HttpResponse(self.router.db_for_read(Book))
+
+        middleware = self.routers.ReplicaPinMiddleware(view)
+        self.assertEqual(middleware(RequestFactory().get("/")).content, b"replica")
+        posted = middleware(RequestFactory().post("/"))
+        self.assertEqual(posted.cookies[self.routers.PIN_COOKIE]["max-age"], 5)
+
+        request = RequestFactory().get("/")
+        request.COOKIES[self.routers.PIN_COOKIE] = "1"
+        response = middleware(request)
+        self.assertEqual(response.content, b"default")
+        self.assertNotIn(self.routers.PIN_COOKIE, response.cookies)
+        self.assertEqual(middleware(RequestFactory().get("/")).content, b"replica")
@@ -1,53 +1,35 @@
 from django.urls import path
 from . import views
 
-from twilio.rest import Client
-from django.conf import settings
-
-def send_whatsapp(order, pdf_bytes):
-    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
-    # Save PDF temporarily
-    import tempfile
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
-        f.write(pdf_bytes)
-        f_path = f.name
-
-    # Twilio Sandbox supports media as URL, so for local dev use ngrok or send text only
-    # Here we send a simple text notification
-    client.messages.create(
-        from_=settings.TWILIO_WHATSAPP_FROM,
-        to=f"whatsapp:{order.phone}",  # Make sure number has +91
-        body=f"Hi {order.name}, your order #{order.id} for '{order.book.title}' is confirmed!"
-    )
-
-    # Optional: remove temp file
-    import os
-    os.remove(f_path)
-
 
 urlpatterns = [
     # Authors
     path("authors/", views.author_list, name="author_list"),
+    path("authors/body/", views.author_list_body, name="author_list_body"),
     path("authors/add/", views.author_create, name="author_create"),
     path("authors/<int:pk>/edit/", views.author_update, name="author_update"),
     path("authors/<int:pk>/delete/", views.author_delete, name="author_delete"),
     path("buy_now/<int:pk>/", views.buy_now, name="buy_now"),
-    path('order/<int:order_id>/pdf/', views.send_order_pdf_email, name='order_pdf'),
-    path('order/<int:order_id>/pdf/', views.order_pdf_view, name='order_pdf'),
+    path('order/<int:order_id>/pdf/', views.order_pdf_download, name='order_pdf'),
+    path('order/<int:order_id>/pdf/email/', views.order_pdf_email, name='order_pdf_email'),
     path('change-password/', views.change_password_view, name='change_password'),
      path('api/books-by-genre/', views.api_books_by_genre, name='api_books_by_genre'),  # ✅ important
      path("authors/<int:author_id>/books/", views.books_by_author, name="books_by_author"),
+     path("authors/<int:author_id>/books/body/", views.author_books_body, name="author_books_body"),
     #  path("test-pdf/", views.test_pdf, name="test_pdf"),
 
     # Books
     path("book_list/", views.book_list, name="book_list"),
+    path("book_list/page/", views.book_list_page, name="book_list_page"),
+    path("book/<int:pk>/modal/", views.book_modal, name="book_modal"),
     path("books/add/", views.book_create, name="book_create"),
     path("books/<int:pk>/edit/", views.book_update, name="book_update"),
     path("books/<int:pk>/delete/", views.book_delete, name="book_delete"),
     path("books/<int:book_id>/like/", views.like_book, name="like_book"),
     path("book/<int:pk>/", views.book_detail, name="book_detail"),
+    path("book/<int:pk>/body/", views.book_body, name="book_body"),
     path('books/csv_upload/', views.csvs_upload_books, name='csvs_upload_books'),
+    path('books/csv_upload/<int:pk>/', views.csv_import_status, name='csv_import_status'),
     path("books/search_api/", views.api_search_books, name="api_search_books"),
     path("books/search/", views.book_list, name="book_search"),
     path("counters/", views.counters, name="counters"),
@@ -57,4 +39,7 @@ urlpatterns = [
     path("settings/", views.settings_view, name="settings"),
     path("dashboard/", views.dashboard, name="dashboard"),
     path("api/top-authors/", views.api_top_authors, name="api_top_authors"),
+    path("api/sales/", views.api_sales, name="api_sales"),
+    path("api/sales/top-books/", views.api_sales_top_books, name="api_sales_top_books"),
+    path("api/sales/status/", views.api_sales_status, name="api_sales_status"),
 ]
@@ -1,4 +1,2 @@
 # library/utils/__init__.py
-from .send_email import send_order_email
-from .send_whatsapp import send_whatsapp
 from .google_sheet import save_to_google_sheet
@@ -1,25 +1,71 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+"""
+Orders -> Google Sheet sync.
+
+Client aur worksheet handle process me ek baar bante hain (cache), orders
+buffer me jama hote hain aur `GOOGLE_SHEET_BATCH_SIZE` rows ek hi
+`append_rows` call me jaati hain. Har bheja gaya order `Order.sheet_synced_at`
+se mark hota hai, isliye resync sirf baaki orders bhejta hai - woh order bhi
+jo chhote id ke saath bade id ke sync hone ke baad commit hua (max(id)
+high-water mark use chhod deta tha).
+Interval wala batching job queue karta hai: order signal sync job ko
+`GOOGLE_SHEET_FLUSH_INTERVAL` seconds baad schedule karta hai aur beech ke
+saare orders usi ek job me chale jaate hain.
+"""
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+HEADERS = [
+    "ID", "Book Title", "Name", "Email", "Phone",
+    "Address", "Quantity", "Notes", "Status", "Created At"
+]
+
+_lock = threading.RLock()
+_client = None
+_sheet = None
+_sync = None
+
+
+def _authorize():
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_name(settings.GOOGLE_SHEET_CREDENTIALS_FILE, SCOPE)
+    return gspread.authorize(creds)
+
+
+def get_client():
+    """Authorized gspread client, built once per process."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = _authorize()
+        return _client
+
 
 def get_sheet():
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds_path = "library/utils/credentials.json"
-    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_path, scope)
-    client = gspread.authorize(creds)
+    """First worksheet of the orders spreadsheet, opened once per process."""
+    global _sheet
+    with _lock:
+        if _sheet is None:
+            _sheet = get_client().open_by_key(settings.GOOGLE_SHEET_ID).sheet1
+        return _sheet
 
-    sheet_id = "1yINKvqlLRjSM5R0_VMuZ9jYaCxYNc9XVgHFWFEyVXs4"
-    sheet = client.open_by_key(sheet_id).sheet1
-    return sheet
 
+def set_client(client):
+    """Swap the gspread client (e.g. a fake in tests) and drop cached handles."""
+    global _client, _sheet, _sync
+    with _lock:
+        _client, _sheet, _sync = client, None, None
 
-def save_to_google_sheet(order):
-    """Push single order to Google Sheet."""
-    sheet = get_sheet()
 
-    row = [
+def order_row(order):
+    return [
         order.id,
         order.book.title if order.book else "",
         order.name,
@@ -31,26 +77,98 @@ def save_to_google_sheet(order):
         order.status,
         str(order.created_at)
     ]
-    sheet.append_row(row)
 
 
-def push_all_orders_to_sheet():
-    """Push all orders from DB to Google Sheet (with headings)."""
-    # Import Order **inside function** to avoid circular import
-    from library.models import Order
+class OrderSheetSync:
+    """Buffers order rows and appends them to the sheet in batches."""
 
-    sheet = get_sheet()
-    sheet.clear()  # optional, purane incorrect data clear karne ke liye
+    def __init__(self, sheet=None, batch_size=None):
+        self._sheet = sheet
+        self.batch_size = batch_size or settings.GOOGLE_SHEET_BATCH_SIZE
+        self.buffer = []
+        self._lock = threading.Lock()
+        self._sync_lock = threading.RLock()
+
+    @property
+    def sheet(self):
+        return self._sheet or get_sheet()
+
+    def add(self, order):
+        """Buffer one order; flushes once the batch is full."""
+        with self._lock:
+            self.buffer.append(order_row(order))
+            full = len(self.buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Append everything buffered in one request and mark those orders as synced."""
+        from library.models import Order
+
+        with self._lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return 0
+        try:
+            self.sheet.append_rows(rows, value_input_option="USER_ENTERED")
+        except Exception:
+            with self._lock:
+                self.buffer[:0] = rows   # agli flush me dobara try
+            raise
+        Order.objects.filter(id__in=[row[0] for row in rows]).update(sheet_synced_at=timezone.now())
+        return len(rows)
+
+    def sync_new_orders(self):
+        """Send every order not yet on the sheet. Returns rows sent."""
+        from library.models import Order
+
+        # Ek process me ek hi sync chale, warna same delta do baar jaayega
+        with self._sync_lock:
+            sent = self.flush()
+            pending = Order.objects.select_related("book").filter(sheet_synced_at__isnull=True).order_by("id")
+            last = 0
+            # id par pages: flush beech me rows mark karta hai, khula cursor unhi rows par nahi rakhte
+            while True:
+                batch = list(pending.filter(id__gt=last)[:self.batch_size])
+                if not batch:
+                    break
+                for order in batch:
+                    self.add(order)
+                    sent += 1
+                last = batch[-1].id
+            self.flush()
+            return sent
+
+    def resync(self):
+        """Clear the sheet and rewrite headers plus every order."""
+        from library.models import Order
+
+        with self._sync_lock:
+            with self._lock:
+                self.buffer = []
+            self.sheet.clear()
+            self.sheet.append_rows([HEADERS])
+            Order.objects.filter(sheet_synced_at__isnull=False).update(sheet_synced_at=None)
+        return self.sync_new_orders()
+
+
+def sheet_sync():
+    """Process-wide OrderSheetSync instance."""
+    global _sync
+    with _lock:
+        if _sync is None:
+            _sync = OrderSheetSync()
+        return _sync
 
-    headers = [
-        "ID", "Book Title", "Name", "Email", "Phone",
-        "Address", "Quantity", "Notes", "Status", "Created At"
-    ]
-    sheet.append_row(headers)
 
-    orders = Order.objects.all()
-    for order in orders:
-        save_to_google_sheet(order)
+def save_to_google_sheet(order=None):
+    """Push every not-yet-synced order (including `order`) in one batch."""
+    return sheet_sync().sync_new_orders()
 
-    print(f"✅ Total {orders.count()} orders added to Google Sheet.")
 
+def push_all_orders_to_sheet(full=False):
+    """Push orders from DB to Google Sheet - only the delta unless `full`."""
+    sync = sheet_sync()
+    count = sync.resync() if full else sync.sync_new_orders()
+    print(f"✅ Total {count} orders added to Google Sheet.")
+    return count
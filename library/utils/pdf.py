@@ -1,26 +1,316 @@
 # library/utils/pdf.py
+"""
+Order summary PDF - the one renderer used by emails, WhatsApp and downloads.
+
+Page ka static hissa (title, rules, labels, footer, fonts) process me ek hi
+baar PDF bytes me ban jaata hai: fonts aur frame ek Form XObject hain jise
+har page `/Frame Do` se reuse karta hai. Har order ke liye sirf values ka
+chhota content stream likha jaata hai - reportlab canvas per order nahi.
+
+Rendered PDF `order_pdfs/order_<id>-<content hash>.pdf` par ek baar save
+hota hai; order badle to hash badalta hai, warna wahi file reuse hoti hai.
+
+`OrderPdfWriter` kai orders ko ek multi-page PDF me stream kar sakta hai
+(har order ek page, frame file me sirf ek baar).
+
+`order_html_pdf` customer download/email ke liye `library/order_pdf.html`
+ko WeasyPrint se render karta hai - mehenga hai, isliye wo bhi content hash
+waale naam par ek hi baar banta hai (aur weasyprint na chale to upar waala
+renderer use hota hai).
+"""
+import hashlib
+import json
+import logging
+import textwrap
 from io import BytesIO
-from reportlab.pdfgen import canvas
+
+from django.conf import settings
 from django.core.files.base import ContentFile
 
-def _make_order_pdf(order):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer)
-    c.drawString(100, 750, f"Order ID: {order.id}")
-    c.drawString(100, 730, f"Name: {order.name}")
-    c.drawString(100, 710, f"Book: {order.book.title if order.book else ''}")
-    c.drawString(100, 690, f"Quantity: {order.quantity}")
-    c.save()
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-    return pdf_bytes
-
-def generate_and_save_pdf(order):
-    pdf_bytes = _make_order_pdf(order)
-    filename = f"order_{order.id}.pdf"
-    # Agar aapko media folder me save karna hai:
-    from django.core.files.storage import default_storage
-    path = f"whatsapp_orders/{filename}"
-    default_storage.save(path, ContentFile(pdf_bytes))
-    # Return a URL (for example, using django's default storage url)
-    return default_storage.url(path)
+logger = logging.getLogger(__name__)
+
+LAYOUT_VERSION = "1"   # layout badlo to ye badlo - purani cached files stale ho jaayengi
+HTML_LAYOUT_VERSION = "1"   # library/order_pdf.html badlo to ye badlo
+PDF_DIR = "order_pdfs"
+
+WIDTH, HEIGHT = 595.2756, 841.8898   # A4 in points
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Helvetica-Oblique"}
+
+ORDER_ROWS = [
+    ("Order ID", "order_id"), ("Date", "date"), ("Book", "book"), ("Author", "author"),
+    ("Price", "price"), ("Quantity", "quantity"), ("Total", "total"),
+]
+BUYER_ROWS = [("Name", "name"), ("Email", "email"), ("Phone", "phone")]
+ROW_HEIGHT = 22
+LINE_HEIGHT = 18
+WRAP = 90
+
+
+# ---------- PDF primitives ----------
+
+def _text(value):
+    """PDF literal string in WinAnsi (Helvetica) - ₹ becomes 'Rs.', unknown chars '?'."""
+    value = str(value).replace("₹", "Rs. ")
+    value = "".join(ch if ch >= " " else " " for ch in value)
+    raw = value.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    return " ".join(f"{int(hex_color[i:i + 2], 16) / 255:.3f}" for i in (0, 2, 4))
+
+
+def _draw_text(font, size, x, y, value):
+    return b"BT /%s %d Tf %.2f %.2f Td %s Tj ET\n" % (font.encode(), size, x, y, _text(value))
+
+
+def _line(x1, y1, x2, y2, color, width):
+    return f"{_rgb(color)} RG {width} w {x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S\n".encode()
+
+
+def _fill(color):
+    return f"{_rgb(color)} rg\n".encode()
+
+
+def _centered(font, size, y, value):
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    width = stringWidth(str(value), FONTS[font], size)
+    return _draw_text(font, size, (WIDTH - width) / 2, y, value)
+
+
+def _stream_object(number, body, extra=b""):
+    return b"%d 0 obj\n<< %s/Length %d >>\nstream\n%s\nendstream\nendobj\n" % (number, extra, len(body), body)
+
+
+# ---------- Template (built once per process) ----------
+
+class OrderPdfTemplate:
+    """Static objects + frame bytes and the y positions of every stamped field."""
+
+    def __init__(self):
+        ops = [
+            _fill("#2C3E50"), _centered("F2", 20, HEIGHT - 60, "Book Order Summary"),
+            _line(50, HEIGHT - 70, WIDTH - 50, HEIGHT - 70, "#2980B9", 2),
+            _fill("#000000"),
+        ]
+        self.positions = {}
+        y = HEIGHT - 110
+        for label, key in ORDER_ROWS:
+            ops.append(_draw_text("F2", 12, 60, y, f"{label}:"))
+            self.positions[key] = y
+            y -= ROW_HEIGHT
+        y -= 10
+        ops += [_fill("#34495E"), _draw_text("F2", 14, 50, y, "Buyer Information")]
+        y -= 8
+        ops.append(_line(50, y, WIDTH - 50, y, "#BDC3C7", 1))
+        y -= 25
+        ops.append(_fill("#000000"))
+        for label, key in BUYER_ROWS:
+            ops.append(_draw_text("F2", 12, 60, y, f"{label}:"))
+            self.positions[key] = y
+            y -= ROW_HEIGHT
+        y -= 10
+        ops.append(_draw_text("F2", 12, 60, y, "Address:"))
+        self.address_y = y - LINE_HEIGHT
+        ops += [
+            _line(50, 100, WIDTH - 50, 100, "#95A5A6", 0.5),
+            _fill("#7F8C8D"), _centered("F3", 10, 80, "Thank you for ordering with Library System"),
+        ]
+        frame = b"q\n" + b"".join(ops) + b"Q\n"
+
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), 5 + i) for i, name in enumerate(FONTS))
+        objects = [
+            b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n",
+            b"3 0 obj\n<< /Font << %s >> /XObject << /Frame 4 0 R >> >>\nendobj\n" % fonts,
+            _stream_object(4, frame, b"/Type /XObject /Subtype /Form /BBox [0 0 %.4f %.4f] /Resources << /Font << %s >> >> "
+                           % (WIDTH, HEIGHT, fonts)),
+        ] + [
+            b"%d 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>\nendobj\n"
+            % (5 + i, base.encode())
+            for i, base in enumerate(FONTS.values())
+        ]
+        self.prefix = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self.offsets = {}
+        for number, obj in zip([1, 3, 4, 5, 6, 7], objects):
+            self.offsets[number] = len(self.prefix)
+            self.prefix += obj
+        self.first_free = 8
+        self.page_extra = b"/MediaBox [0 0 %.4f %.4f] /Resources 3 0 R" % (WIDTH, HEIGHT)
+
+    def stamp(self, context):
+        """Content stream for one order: the frame plus its field values."""
+        ops = [b"/Frame Do\n"]
+        for key, y in self.positions.items():
+            ops.append(_draw_text("F1", 12, 200, y, context[key]))
+        y = self.address_y
+        for line in textwrap.wrap(context["address"], width=WRAP):
+            ops.append(_draw_text("F1", 12, 200, y, line))
+            y -= LINE_HEIGHT
+        if context["notes"]:
+            y -= 15
+            ops.append(_draw_text("F2", 12, 60, y, "Notes:"))
+            y -= LINE_HEIGHT
+            for line in textwrap.wrap(context["notes"], width=WRAP):
+                ops.append(_draw_text("F1", 12, 200, y, line))
+                y -= LINE_HEIGHT
+        return b"".join(ops)
+
+
+_template = None
+
+
+def get_template():
+    global _template
+    if _template is None:
+        _template = OrderPdfTemplate()
+    return _template
+
+
+class OrderPdfWriter:
+    """
+    Writes orders as pages of one PDF straight into `out` (file, socket,
+    zip entry...). Memory me sirf object offsets rehte hain.
+    """
+
+    def __init__(self, out):
+        self.template = get_template()
+        self.out = out
+        self.out.write(self.template.prefix)
+        self.position = len(self.template.prefix)
+        self.offsets = dict(self.template.offsets)
+        self.next_number = self.template.first_free
+        self.pages = []
+
+    def _write(self, number, data):
+        self.offsets[number] = self.position
+        self.out.write(data)
+        self.position += len(data)
+
+    def add_order(self, context):
+        self.add_page(self.template.stamp(context))
+
+    def add_page(self, stream):
+        """Append a page from an already stamped content stream (see OrderPdfTemplate.stamp)."""
+        content, page = self.next_number, self.next_number + 1
+        self.next_number += 2
+        self._write(content, _stream_object(content, stream))
+        self._write(page, b"%d 0 obj\n<< /Type /Page /Parent 2 0 R %s /Contents %d 0 R >>\nendobj\n"
+                    % (page, self.template.page_extra, content))
+        self.pages.append(page)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page for page in self.pages)
+        self._write(2, b"2 0 obj\n<< /Type /Pages /Kids [%s] /Count %d >>\nendobj\n" % (kids, len(self.pages)))
+        size = self.next_number
+        xref = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+        xref += [b"%010d 00000 n \n" % self.offsets[n] for n in range(1, size)]
+        xref.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, self.position))
+        self.out.write(b"".join(xref))
+
+
+# ---------- Orders ----------
+
+def order_pdf_context(order):
+    """Every value printed on the PDF, as plain strings (picklable, hashable)."""
+    book = order.book
+    return {
+        "order_id": str(order.id),
+        "date": order.created_at.strftime("%d-%m-%Y %H:%M") if order.created_at else "",
+        "book": book.title,
+        "author": book.author.name,
+        "price": f"₹{book.price}",
+        "quantity": str(order.quantity),
+        "total": f"₹{order.quantity * book.price}",
+        "name": order.name,
+        "email": order.email,
+        "phone": order.phone,
+        "address": order.address or "",
+        "notes": order.notes or "",
+    }
+
+
+def content_hash(context, version=LAYOUT_VERSION):
+    payload = json.dumps(context, sort_keys=True) + version
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def render_order_pdf(context):
+    """PDF bytes for one order context."""
+    out = BytesIO()
+    writer = OrderPdfWriter(out)
+    writer.add_order(context)
+    writer.close()
+    return out.getvalue()
+
+
+def order_pdf_name(order, context=None):
+    context = context or order_pdf_context(order)
+    return f"{PDF_DIR}/order_{order.id}-{content_hash(context)[:16]}.pdf"
+
+
+def order_pdf(order):
+    """(storage name, bytes) of the order's PDF; rendered and stored only if missing."""
+    from library.storage import overwrite_storage
+
+    storage = overwrite_storage()
+    context = order_pdf_context(order)
+    name = order_pdf_name(order, context)
+    if storage.exists(name):
+        with storage.open(name, "rb") as f:
+            return name, f.read()
+    pdf_bytes = render_order_pdf(context)
+    storage.save(name, ContentFile(pdf_bytes))
+    return name, pdf_bytes
+
+
+def order_pdf_url(name):
+    """Absolute URL of a stored PDF (WhatsApp needs a public link)."""
+    from library.storage import overwrite_storage
+    return f"{settings.SITE_URL}{overwrite_storage().url(name)}"
+
+
+# ---------- HTML template PDF (WeasyPrint) ----------
+
+def order_html_pdf_name(order, context=None):
+    context = context or order_pdf_context(order)
+    return f"{PDF_DIR}/order_{order.id}-html-{content_hash(context, 'html' + HTML_LAYOUT_VERSION)[:16]}.pdf"
+
+
+def render_order_html_pdf(order):
+    from django.template.loader import render_to_string
+    # Import yahin: weasyprint heavy hai aur system libs (pango) maangta hai
+    from weasyprint import HTML
+
+    html = render_to_string("library/order_pdf.html", {"order": order})
+    return HTML(string=html, base_url=str(settings.BASE_DIR)).write_pdf()
+
+
+def cached_order_html_pdf(order):
+    """Storage name of the PDF for the order's current data if already rendered, else None."""
+    from library.storage import overwrite_storage
+
+    name = order_html_pdf_name(order)
+    return name if overwrite_storage().exists(name) else None
+
+
+def order_html_pdf(order):
+    """
+    Storage name of the order's HTML-template PDF, rendered only if missing.
+    Without a working weasyprint the built-in renderer's PDF is stored under
+    the same name, so callers never see the difference.
+    """
+    from library.storage import overwrite_storage
+
+    storage = overwrite_storage()
+    name = order_html_pdf_name(order)
+    if storage.exists(name):
+        return name
+    try:
+        pdf_bytes = render_order_html_pdf(order)
+    except (ImportError, OSError) as e:
+        logger.warning("weasyprint unavailable (%s), using the built-in order PDF", e)
+        pdf_bytes = order_pdf(order)[1]
+    storage.save(name, ContentFile(pdf_bytes))
+    return name
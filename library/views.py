@@ -2,41 +2,166 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import login, logout
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import FileResponse, Http404, JsonResponse, HttpResponse, HttpResponseBadRequest
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
+from django.views.decorators.http import condition, require_POST
+from django.db.models import Count, Max, Q
 from django.conf import settings
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 from django.core.files import File
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from asgiref.sync import sync_to_async
 
 import pandas as pd
-import os
+import hashlib
+import json
+import math
 from datetime import datetime
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-# from weasyprint import HTML
+from functools import wraps
 from googleapiclient.discovery import build
 
-from .models import Author, Book, Order, Testimonial
+from .models import Author, Book, ImportJob, Order, Testimonial
+from . import importers, sales, search, stats
+from .cache import acatalogue_version, aget_or_compute, cache_view, get_version
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .storage import overwrite_storage
+from .utils.pdf import cached_order_html_pdf
 from .forms import AuthorForm, BookForm, SignupForm, LoginForm, BuyNowForm
-# views.py
-from django.db.models import Count  # add this at the top
-
-from .utils import save_to_google_sheet, send_order_email, send_whatsapp
+from .utils import save_to_google_sheet
 
 
 # --------- Helper ----------
 def admin_required(user):
     return user.is_superuser
 
+# ---------- Catalogue fragments (public, edge-cacheable) ----------
+# Author list / book detail / author ki books ka woh hissa jo har user ke liye
+# same hai. Yeh views user/session ko chhoote bhi nahi - isliye `Vary: Cookie`
+# nahi lagta aur `Cache-Control: public` ke saath CDN/browser inhe rakh sakte
+# hain. ETag/Last-Modified Book/Author.updated_at (+ row count, deletes ke
+# liye) se, to max-age ke baad revalidation = ek chhoti query + 304.
+# Per-user hissa (like state, superuser buttons, csrf) shell page me rehta hai
+# jo fragment ko `data-fragment` se fetch karta hai (base.html).
+
+FRAGMENT_LAYOUT = 1   # fragment templates badlo to badhao - purane ETags bekaar
+
+
+def _fragment_state(request, state, kwargs):
+    """`state(**kwargs)` -> (last_modified or None, etag), once per request."""
+    if not hasattr(request, "_fragment_state"):
+        last_modified, parts = state(**kwargs)
+        etag = None
+        if last_modified is not None:
+            raw = f"{FRAGMENT_LAYOUT}|{last_modified.isoformat()}|{parts}"
+            etag = hashlib.sha1(raw.encode()).hexdigest()
+        request._fragment_state = (last_modified, etag)
+    return request._fragment_state
+
+
+def public_fragment(state):
+    """Public GET fragment: condition() validators from `state`; body cached under the same ETag."""
+    def decorator(view):
+        name = f"{view.__module__}.{view.__qualname__}"
+
+        def cached(request, *args, **kwargs):
+            etag = _fragment_state(request, state, kwargs)[1]
+            key = f"library:fragment:{name}:{etag}"
+            body = cache.get(key) if etag else None
+            if body is not None:
+                return HttpResponse(body)
+            response = view(request, *args, **kwargs)
+            if etag and response.status_code == 200:
+                cache.set(key, response.content, settings.VIEW_CACHE_TIMEOUT)
+            return response
+
+        validated = condition(
+            etag_func=lambda request, **kwargs: _fragment_state(request, state, kwargs)[1],
+            last_modified_func=lambda request, **kwargs: _fragment_state(request, state, kwargs)[0],
+        )(cached)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = validated(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(response, public=True, max_age=settings.CATALOGUE_FRAGMENT_MAX_AGE)
+            return response
+        return wrapper
+    return decorator
+
+
+def private_page(state, user_state):
+    """
+    Per-user shell page: ETag = fragment state + user + CSRF cookie + `user_state`
+    (like state, superuser) -> browser ko 304, `private, no-cache`.
+    """
+    def etag(request, **kwargs):
+        fragment_etag = _fragment_state(request, state, kwargs)[1]
+        if fragment_etag is None:
+            return None
+        who = (request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME), user_state(request, **kwargs))
+        return hashlib.sha1(f"{fragment_etag}|{who}".encode()).hexdigest()
+
+    def decorator(view):
+        validated = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = validated(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def _authors_state():
+    row = Author.objects.aggregate(last=Max("updated_at"), count=Count("id"))
+    return row["last"], row["count"]
+
+
+def _book_state(pk):
+    row = Book.objects.filter(pk=pk).values_list("updated_at", "author__updated_at").first()
+    return (max(row), pk) if row else (None, None)
+
+
+def _author_books_state(author_id):
+    author = Author.objects.filter(pk=author_id).values_list("updated_at", flat=True).first()
+    if author is None:
+        return None, None
+    books = Book.objects.filter(author_id=author_id).aggregate(last=Max("updated_at"), count=Count("id"))
+    return max(filter(None, [author, books["last"]])), (author_id, books["count"])
+
+
+def _liked_ids(request, author_id):
+    if not request.user.is_authenticated:
+        return []
+    return sorted(request.user.liked_books.filter(author_id=author_id).values_list("pk", flat=True))
+
+
+@public_fragment(_authors_state)
+def author_list_body(request):
+    authors = Author.objects.only("id", "name", "bio").order_by("name")
+    return render(request, "partials/author_rows.html", {"authors": authors})
+
+
+@public_fragment(_book_state)
+def book_body(request, pk):
+    book = get_object_or_404(Book.objects.select_related("author"), pk=pk)
+    return render(request, "partials/book_body.html", {"book": book})
+
+
+@public_fragment(_author_books_state)
+def author_books_body(request, author_id):
+    author = get_object_or_404(Author, pk=author_id)
+    return render(request, "partials/author_books.html", {"author": author, "books": author.books.all()})
+
+
 # ---------- Author ----------
 @login_required
+@private_page(_authors_state, lambda request: request.user.is_superuser)
+@cache_view("catalogue")
 def author_list(request):
-    authors = Author.objects.all().order_by('name')
-    return render(request, "author_list.html", {"authors": authors})
+    return render(request, "author_list.html")
 
 @login_required
 @user_passes_test(admin_required)
@@ -69,41 +194,81 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from .models import Book
 
-@login_required
-def book_list(request):
+BOOK_SORT_FIELDS = ('-published_date', 'title', 'author__name', 'price', '-price', '-like_count')
+
+def _book_list_page(request):
+    """Filtered, sorted page of books for book_list and its scroll fragment."""
     query = request.GET.get('q', '')  # search term
     author_id = request.GET.get('author')  # author filter
-    sort_field = request.GET.get('sort', '-published_date')  # sort field, default newest
+    # search par default "best match", warna newest
+    sort_field = request.GET.get('sort') or ('relevance' if query else '-published_date')
 
-    # Start with all books
-    books = Book.objects.select_related('author').all()
+    # Start with all books - like count column + liked-by-me EXISTS, ek hi query me
+    books = Book.objects.select_related('author').with_like_state(request.user)
 
-    # Apply search
-    if query:
-        books = books.filter(
-            Q(title__icontains=query) | Q(author__name__icontains=query)
-        )
+    # Author filter - search ho to ranked query ke andar, top-N cut se pehle
+    author_id = int(author_id) if author_id and author_id.isdigit() else None
 
-    # Apply author filter
-    if author_id:
+    # Apply search (full-text index, see library/search.py) - top SEARCH_MAX_RESULTS matches
+    capped = ranked = False
+    if query:
+        books, capped = search.ranked_books(books, query, author_id)
+        ranked = search.backend() is not None
+    elif author_id is not None:
         books = books.filter(author_id=author_id)
 
-    # Apply sorting
-    books = books.order_by(sort_field)
-
-    # Get all authors for filter dropdown
-    authors = Author.objects.all()
+    # Apply sorting + keyset pagination (sort value + id cursor)
+    if sort_field == 'relevance' and ranked:
+        books, next_cursor = search.relevance_page(books, request.GET.get('cursor'), settings.BOOKS_PER_PAGE)
+    else:
+        if sort_field not in BOOK_SORT_FIELDS:
+            sort_field = '-published_date'
+        books, next_cursor = keyset_page(books, sort_field, request.GET.get('cursor'), settings.BOOKS_PER_PAGE)
 
-    context = {
+    next_params = request.GET.copy()
+    next_params['cursor'] = next_cursor
+    return {
         "books": books,
         "query": query,
-        "authors": authors,
+        "sort": sort_field,
+        "search_capped": capped,
+        "search_max_results": settings.SEARCH_MAX_RESULTS,
+        "next_query": next_params.urlencode() if next_cursor else "",
+        "first_page": not request.GET.get('cursor'),
     }
+
+
+@login_required
+def book_list(request):
+    context = _book_list_page(request)
+    # Get all authors for filter dropdown
+    context["authors"] = Author.objects.only('id', 'name').order_by('name')
     return render(request, "book_list.html", context)
 
+
+@login_required
+def book_list_page(request):
+    """Next page of book cards as an HTML fragment (infinite scroll)."""
+    return render(request, "partials/book_cards.html", _book_list_page(request))
+
+
 @login_required
+@cache_view("catalogue", vary="role")
+def book_modal(request, pk):
+    """Image/details modal body, fetched only when a card is clicked."""
+    book = get_object_or_404(Book.objects.select_related('author'), pk=pk)
+    return render(request, "partials/book_modal.html", {"book": book})
+
+def _book_liked(request, pk):
+    return Book.likes.through.objects.filter(book_id=pk, user_id=request.user.pk).exists()
+
+
+@login_required
+@private_page(_book_state, _book_liked)
+@cache_view("catalogue", "book:{pk}")
 def book_detail(request, pk):
-    book = get_object_or_404(Book, pk=pk)
+    # Details public fragment (book_body) se; yahan sirf like button
+    book = get_object_or_404(Book.objects.only("id", "title", "like_count").with_like_state(request.user), pk=pk)
     return render(request, "library/book_detail.html", {"book": book})
 
 
@@ -137,7 +302,7 @@ def book_delete(request, pk):
 @login_required
 def like_book(request, book_id):
     book = get_object_or_404(Book, id=book_id)
-    if request.user in book.likes.all():
+    if book.likes.filter(pk=request.user.pk).exists():
         book.likes.remove(request.user)
     else:
         book.likes.add(request.user)
@@ -172,8 +337,7 @@ def logout_view(request):
 
 @login_required
 def home(request):
-    recent_books = Book.objects.order_by('-id')[:5]
-    recent_authors = Author.objects.order_by('-id')[:5]
+    # recent books/authors context processor se aate hain (library/context_processors.py)
     testimonials = Testimonial.objects.all()[:3]  # Show 3 testimonials
 
     # Newsletter form handling
@@ -185,8 +349,6 @@ def home(request):
         return redirect('home')
 
     return render(request, 'base.html', {
-        'recent_books': recent_books,
-        'recent_authors': recent_authors,
         'testimonials': testimonials,
     })
 
@@ -198,232 +360,204 @@ def csvs_upload_books(request):
         csv_file = request.FILES["csv_file"]
         print("Uploaded CSV file:", csv_file.name)
 
+        # Bada file: request me mat padho - ImportJob bana ke worker ko do
+        if csv_file.size > settings.CSV_IMPORT_STREAM_THRESHOLD:
+            import_job = importers.start_import(csv_file, request.user)
+            return redirect('csv_import_status', pk=import_job.pk)
+
         # Try multiple encodings and skip empty lines
         try:
-            df = pd.read_csv(csv_file, encoding='utf-8-sig').dropna(how='all')
-        except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(csv_file, encoding='ISO-8859-1').dropna(how='all')
-            except Exception as e:
-                return render(request, "csv_upload.html", {"error": f"Cannot read CSV file: {str(e)}"})
-        except pd.errors.EmptyDataError:
-            return render(request, "csv_upload.html", {"error": "CSV file has no data."})
+            df = importers.read_csv(csv_file)
+        except importers.CSVImportError as e:
+            return render(request, "csv_upload.html", {"error": str(e)})
 
         if df.empty:
             return render(request, "csv_upload.html", {"error": "CSV file is empty or has no valid rows."})
 
-        for index, row in df.iterrows():
-            # Author
-            author_name = row.get('author', 'Unknown Author')
-            author, _ = Author.objects.get_or_create(name=author_name)
-
-            # Convert published_date string to date object
-            published_date = None
-            date_str = row.get('published_date', None)
-            if pd.notna(date_str):
-                for fmt in ("%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y"):
-                    try:
-                        published_date = datetime.strptime(str(date_str).strip(), fmt).date()
-                        break
-                    except ValueError:
-                        continue
-
-            # Book instance
-            book = Book(
-                title=row.get('title', 'Untitled'),
-                author=author,
-                published_date=published_date,
-                price=row.get('price', 0),
-                description=row.get('description', '')
-            )
-
-            # Image handling
-            if 'image' in row and pd.notna(row['image']):
-                img_path = row['image']
-                img_full_path = os.path.join(settings.BASE_DIR, img_path)
-                if os.path.exists(img_full_path):
-                    with open(img_full_path, 'rb') as f:
-                        book.image.save(os.path.basename(img_path), File(f), save=False)
-
-            book.save()
+        result = importers.import_books(df)
+        if result.errors:
+            return render(request, "csv_upload.html", {"result": result})
 
+        messages.success(request, f"✅ {result.created} books added, {result.updated} updated, {result.unchanged} unchanged.")
         return redirect('book_list')
 
     return render(request, "csv_upload.html")
 
-@csrf_exempt
-def api_search_books(request):
-    query = request.GET.get("q", "")
-    books = Book.objects.filter(
-        Q(title__icontains=query) | Q(author__name__icontains=query)
-    )
-
-    data = []
-    for book in books:
-        data.append({
-            "id": book.id,
-            "title": book.title,
-            "author": book.author.name,
-            "published_date": book.published_date,
-            "price": book.price,
-            "description": book.description,
-            "image": book.image.url if book.image else None,
+
+@login_required
+@user_passes_test(admin_required)
+def csv_import_status(request, pk):
+    import_job = get_object_or_404(ImportJob, pk=pk)
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "id": import_job.id,
+            "status": import_job.status,
+            "rows_done": import_job.rows_done,
+            "created": import_job.created_count,
+            "updated": import_job.updated_count,
+            "unchanged": import_job.unchanged_count,
+            "errors": import_job.error_count,
+            "last_error": import_job.last_error,
         })
-    return JsonResponse({"results": data})
-
-# ---------- Order PDF Generation ----------
-def _make_order_pdf(order):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # --- Header / Title ---
-    p.setFont("Helvetica-Bold", 20)
-    p.setFillColor(colors.HexColor("#2C3E50"))
-    p.drawCentredString(width / 2, height - 60, "📚 Book Order Summary")
-
-    # Line under heading
-    p.setStrokeColor(colors.HexColor("#2980B9"))
-    p.setLineWidth(2)
-    p.line(50, height - 70, width - 50, height - 70)
-
-    y = height - 110
-    p.setFont("Helvetica", 12)
-    p.setFillColor(colors.black)
-
-    # Order Info
-    order_info = [
-        ("Order ID", order.id),
-        ("Date", order.created_at.strftime("%d-%m-%Y %H:%M")),
-        ("Book", order.book.title),
-        ("Author", order.book.author.name),
-        ("Price", f"₹{order.book.price}"),
-        ("Quantity", order.quantity),
-        ("Total", f"₹{order.quantity * order.book.price}"),
-    ]
-
-    # Table-style key-value pairs
-    for label, value in order_info:
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(60, y, f"{label}:")
-        p.setFont("Helvetica", 12)
-        p.drawString(200, y, str(value))
-        y -= 22
-
-    # Buyer Info
-    y -= 10
-    p.setFont("Helvetica-Bold", 14)
-    p.setFillColor(colors.HexColor("#34495E"))
-    p.drawString(50, y, "Buyer Information")
-    y -= 8
-    p.setStrokeColor(colors.HexColor("#BDC3C7"))
-    p.setLineWidth(1)
-    p.line(50, y, width - 50, y)
-    y -= 25
-
-    buyer_info = [
-        ("Name", order.name),
-        ("Email", order.email),
-        ("Phone", order.phone),
-    ]
-
-    for label, value in buyer_info:
-        p.setFont("Helvetica-Bold", 12)
-        p.setFillColor(colors.black)
-        p.drawString(60, y, f"{label}:")
-        p.setFont("Helvetica", 12)
-        p.drawString(200, y, str(value))
-        y -= 22
-
-    # Address
-    y -= 10
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(60, y, "Address:")
-    y -= 18
-    import textwrap
-    for line in textwrap.wrap(order.address, width=90):
-        p.setFont("Helvetica", 12)
-        p.drawString(200, y, line)
-        y -= 18
-
-    # Notes (if any)
-    if order.notes:
-        y -= 15
-        p.setFont("Helvetica-Bold", 12)
-        p.drawString(60, y, "Notes:")
-        y -= 18
-        for line in textwrap.wrap(order.notes, width=90):
-            p.setFont("Helvetica", 12)
-            p.drawString(200, y, line)
-            y -= 18
-
-    # Footer
-    y = 100
-    p.setStrokeColor(colors.HexColor("#95A5A6"))
-    p.setLineWidth(0.5)
-    p.line(50, y, width - 50, y)
-
-    p.setFont("Helvetica-Oblique", 10)
-    p.setFillColor(colors.HexColor("#7F8C8D"))
-    p.drawCentredString(width / 2, y - 20, "Thank you for ordering with Library System 📖")
-
-    p.showPage()
-    p.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
+    return render(request, "csv_import_status.html", {"import_job": import_job})
+
+# ---------- Search API ----------
+# `fields=` param -> .values() columns
+SEARCH_API_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "author": "author__name",
+    "genre": "genre",
+    "published_date": "published_date",
+    "price": "price",
+    "description": "description",
+    "image": "image",
+}
+SEARCH_API_DEFAULT_FIELDS = ["id", "title", "author", "published_date", "price", "description", "image"]
+SEARCH_API_PAGE_SIZE = 20
+SEARCH_API_MAX_PAGE_SIZE = 100
+
+
+def _search_api_params(request):
+    query = request.GET.get("q", "").strip()
+    fields = [f for f in request.GET.get("fields", "").split(",") if f in SEARCH_API_FIELDS]
+    try:
+        limit = int(request.GET.get("limit", SEARCH_API_PAGE_SIZE))
+    except ValueError:
+        limit = SEARCH_API_PAGE_SIZE
+    limit = max(1, min(limit, SEARCH_API_MAX_PAGE_SIZE))
+    return query, fields or SEARCH_API_DEFAULT_FIELDS, limit, request.GET.get("cursor", "")
+
+
+def _search_cursor(cursor, ranked):
+    """[id, rank] (ranked) ya [id] - int id, finite float rank; kuch aur ho to None (pehla page)."""
+    after = decode_cursor(cursor)
+    if not after or len(after) != (2 if ranked else 1) or type(after[0]) is not int:
+        return None
+    if ranked and not (type(after[1]) in (int, float) and math.isfinite(after[1])):
+        return None
+    return after
+
+
+def _search_api_page(query, fields, limit, cursor):
+    """One page of results as (rows, next_cursor) using keyset pagination."""
+    columns = [SEARCH_API_FIELDS[f] for f in fields]
+    books = Book.objects.all()
+
+    if query and search.backend() is not None:
+        # Cursor = [id, rank] of the last row
+        ranked = search.ranked_ids(query, limit + 1, after=_search_cursor(cursor, ranked=True))
+        page, more = ranked[:limit], len(ranked) > limit
+        by_id = {row["id"]: row for row in books.filter(pk__in=[pk for pk, _ in page]).values("id", *columns)}
+        rows = [by_id[pk] for pk, _ in page if pk in by_id]
+        next_cursor = encode_cursor(page[-1]) if more else None
+    else:
+        # Cursor = [id] of the last row
+        if query:
+            books = search.search_books(books, query)
+        after = _search_cursor(cursor, ranked=False)
+        if after:
+            books = books.filter(id__gt=after[0])
+        rows = list(books.order_by("id").values("id", *columns)[:limit + 1])
+        more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]["id"]]) if more else None
+
+    image_storage = Book._meta.get_field("image").storage
+    results = []
+    for row in rows:
+        item = {}
+        for field, column in zip(fields, columns):
+            value = row[column]
+            if field == "image":
+                value = image_storage.url(value) if value else None
+            elif field == "price":
+                value = str(value)
+            elif field == "published_date":
+                value = value.isoformat() if value else None
+            item[field] = value
+        results.append(item)
+    return results, next_cursor
+
+
+async def api_search_books(request):
+    """
+    Type-ahead search: ?q=&fields=id,title&limit=20&cursor=...
+
+    Responses carry an ETag/Last-Modified derived from the catalogue version,
+    so a repeated query gets a 304, and the JSON body is cached per query
+    until the next Book/Author write. Async view: a cached query never leaves
+    the event loop under uvicorn.
+    """
+    query, fields, limit, cursor = _search_api_params(request)
+    version = await acatalogue_version()
+    etag = hashlib.sha1(f"{version}|{query.lower()}|{','.join(fields)}|{limit}|{cursor}".encode()).hexdigest()
+
+    async def page():
+        # FTS ranking raw cursor par hai (async API nahi) - miss par thread me
+        results, next_cursor = await sync_to_async(_search_api_page)(query, fields, limit, cursor)
+        return json.dumps({"results": results, "next": next_cursor}, separators=(",", ":"))
+
+    # har baar revalidate, jawab mostly 304
+    return await _aversioned_json(
+        request, etag, version,
+        lambda: aget_or_compute(f"library:search:{etag}", page, settings.SEARCH_API_CACHE_TIMEOUT),
+        no_cache=True)
 
 # ---------- Buy Now ----------
 
 
-def order_pdf_view(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
-
-    # ✅ Render HTML inside the function
-    html_string = render_to_string('library/order_pdf.html', {'order': order})
+def _order_for_user(request, order_id):
+    """The order if it belongs to the logged-in user (matched by email) or user is admin; else 404."""
+    order = get_object_or_404(Order.objects.select_related("book__author"), pk=order_id)
+    email = (request.user.email or "").lower()
+    if not request.user.is_superuser and (not email or order.email.lower() != email):
+        raise Http404("Order not found")
+    return order
+
+
+def _pdf_response(name, filename):
+    """Stored PDF as an attachment; with ORDER_PDF_SENDFILE the web server sends the bytes."""
+    storage = overwrite_storage()
+    mode = settings.ORDER_PDF_SENDFILE
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type="application/pdf")
+        response["X-Accel-Redirect"] = settings.ORDER_PDF_ACCEL_PREFIX + name
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type="application/pdf")
+        response["X-Sendfile"] = storage.path(name)
+    else:
+        response = FileResponse(storage.open(name, "rb"), content_type="application/pdf")
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
-    # Generate PDF
-    pdf_file = HTML(string=html_string).write_pdf()
 
-    # Send PDF via email
-    email = EmailMessage(
-        subject=f"Your Order #{order.id}",
-        body="Please find your order attached.",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[order.email],
-    )
-    email.attach(f'order_{order.id}.pdf', pdf_file, 'application/pdf')
-    email.send()
+@login_required
+def order_pdf_download(request, order_id):
+    order = _order_for_user(request, order_id)
+    name = cached_order_html_pdf(order)
+    if name is None:
+        # Render worker me hota hai (ek hi baar); page khud refresh karke file utha lega
+        enqueue("library.tasks.render_order_html_pdf", coalesce=True, order_id=order.id)
+        response = render(request, "order_pdf_pending.html", {"order": order}, status=202)
+        response["Retry-After"] = "3"
+        return response
+    return _pdf_response(name, f"order_{order.id}.pdf")
 
-    # Return PDF as download
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="order_{order.id}.pdf"'
-    return response
 
-def send_order_pdf_email(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
-    
-    # Render HTML template
-    html = render_to_string('library/order_pdf.html', {'order': order})
-    pdf_file = HTML(string=html).write_pdf()
-
-    # Send email with PDF attachment
-    email = EmailMessage(
-        subject=f"Your Order #{order.id}",
-        body="Please find your order PDF attached.",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        to=[order.email],
-    )
-    email.attach(f'order_{order.id}.pdf', pdf_file, 'application/pdf')
-    email.send()
-    
-    messages.success(request, "Order confirmation email sent!")
-    return redirect('book_list')
+@login_required
+@require_POST
+def order_pdf_email(request, order_id):
+    order = _order_for_user(request, order_id)
+    enqueue("library.tasks.send_order_pdf_email", coalesce=True, order_id=order.id)
+    messages.success(request, f"Order PDF will be emailed to {order.email} shortly.")
+    return redirect("book_list")
 
 
-from .utils import send_whatsapp
-from django.core.mail import EmailMessage
+from django.db import transaction
 from django.contrib import messages
+from .jobs import enqueue
 
 def buy_now(request, pk):
     book = get_object_or_404(Book, pk=pk)
@@ -433,57 +567,12 @@ def buy_now(request, pk):
         if form.is_valid():
             order = form.save(commit=False)
             order.book = book
-            order.save()
-
-            # # Save to Google Sheet
-            # save_to_google_sheet(order)
-
-            # PDF bytes
-            pdf_bytes = _make_order_pdf(order)
-            filename = f"order_{order.id}.pdf"
-
-            # --- Admin email ---
-            subject_admin = f"New Book Order: {book.title} (#{order.id})"
-            body_admin = (
-                f"New order received.\n\n"
-                f"Order ID: {order.id}\n"
-                f"Book: {book.title}\n"
-                f"Buyer: {order.name}\n"
-                f"Email: {order.email}\n"
-                f"Phone: {order.phone}\n"
-                f"Qty: {order.quantity}\n"
-            )
-            email_admin = EmailMessage(
-                subject_admin,
-                body_admin,
-                settings.DEFAULT_FROM_EMAIL,
-                [settings.ORDER_NOTIFICATION_EMAIL],
-            )
-            email_admin.attach(filename, pdf_bytes, "application/pdf")
-            email_admin.send(fail_silently=True)
-
-            # --- User email ---
-            subject_user = "Your Book Order Confirmation"
-            body_user = (
-                f"Hi {order.name},\n\n"
-                f"Thanks for your order of '{book.title}'. "
-                "We've attached your order summary as PDF.\n\n"
-                "We'll contact you soon with shipping details.\n\n"
-                "Regards,\nLibrary Team"
-            )
-            email_user = EmailMessage(
-                subject_user,
-                body_user,
-                settings.DEFAULT_FROM_EMAIL,
-                [order.email],
-            )
-            email_user.attach(filename, pdf_bytes, "application/pdf")
-            email_user.send(fail_silently=True)
-
-            pdf_url = generate_and_save_pdf(order)   # return karega ngrok URL
-            send_whatsapp(order, pdf_url)
-
-            messages.success(request, "Order placed! Email & WhatsApp notification sent.")
+            # Order aur uske notification jobs ek hi transaction me commit
+            with transaction.atomic():
+                order.save()
+                enqueue("library.tasks.send_order_receipts", order_id=order.id)
+
+            messages.success(request, "Order placed! Email & WhatsApp confirmation is on its way.")
             return redirect("book_list")
     else:
         form = BuyNowForm()
@@ -493,23 +582,48 @@ def buy_now(request, pk):
 
 # library/views.py
 from django.http import JsonResponse
-from django.contrib.auth.models import User   # ✅ ye add karo
 from .models import Book, Author
 
 
 
-def counters(request):
-    total_books = Book.objects.count()
-    total_authors = Author.objects.count()
-    active_users = User.objects.filter(is_active=True).count()
-    data = {
-        "total_books": total_books,
-        "total_authors": total_authors,
-        "active_users": active_users,
+def _not_modified(request, etag, version):
+    return get_conditional_response(request, etag=quote_etag(etag), last_modified=version // 1000)
 
-        
-    }
-    return JsonResponse(data)
+
+def _json_response(etag, version, body):
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = quote_etag(etag)
+    response["Last-Modified"] = http_date(version // 1000)
+    return response
+
+
+def _versioned_json(request, etag, version, get_body, **cache_control):
+    """JSON from `get_body()` with ETag/Last-Modified from `version` (ms); 304 if unchanged."""
+    response = _not_modified(request, etag, version)
+    if response is None:
+        response = _json_response(etag, version, get_body())
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+async def _aversioned_json(request, etag, version, aget_body, **cache_control):
+    """_versioned_json for async views (`aget_body` is a coroutine function)."""
+    response = _not_modified(request, etag, version)
+    if response is None:
+        response = _json_response(etag, version, await aget_body())
+    patch_cache_control(response, **cache_control)
+    return response
+
+
+async def _stat_response(request, name):
+    """Cached stat JSON (library/stats.py), revalidated against its data version."""
+    tag, version = await stats.astat_version(name)
+    return await _aversioned_json(request, f"{name}-{tag}", version, lambda: stats.astat_json(name, tag),
+                                  public=True, max_age=settings.STATS_MAX_AGE)
+
+
+async def counters(request):
+    return await _stat_response(request, "counters")
 
 from .forms import ContactForm
 
@@ -541,16 +655,6 @@ def subscribe_newsletter(request):
             messages.error(request, "Please enter a valid email.")
         return redirect("home")  # apna homepage ya jis page par ho use redirect karo
 
-from .models import Book, Author
-
-def recent_books_and_authors(request):
-    recent_books = Book.objects.order_by('-id')[:5]  # last 5 books
-    recent_authors = Author.objects.order_by('-id')[:5]  # last 5 authors
-    return {
-        'recent_books': recent_books,
-        'recent_authors': recent_authors,
-    }
-
 login_required
 def profile_view(request):
     return render(request, "profile.html")
@@ -615,77 +719,103 @@ def dashboard(request):
 
 
 
-# Top Authors API
-def api_top_authors(request):
-    data = Book.objects.values("author__name").annotate(count=Count("id")).order_by("-count")[:8]
-    labels = [d["author__name"] for d in data]
-    counts = [d["count"] for d in data]
-    return JsonResponse({"labels": labels, "counts": counts})
+# Top Authors API (library/stats.py - cached per catalogue version)
+async def api_top_authors(request):
+    return await _stat_response(request, "top_authors")
 
 # Books by Genre API ✅
-def api_books_by_genre(request):
-    # Agar genre CharField hai
-    data = Book.objects.values("genre").annotate(count=Count("id")).order_by("-count")
-    labels = [d["genre"] for d in data]
-    counts = [d["count"] for d in data]
-    return JsonResponse({"labels": labels, "counts": counts})
-
-# Agar genre ForeignKey hai:
-# data = Book.objects.values("genre__name").annotate(count=Count("id")).order_by("-count")
-# labels = [d["genre__name"] for d in data]
+async def api_books_by_genre(request):
+    return await _stat_response(request, "books_by_genre")
+
+
+# ---------- Sales analytics (library/sales.py, DailyBookSales rollup) ----------
+
+def _sales_params(request):
+    """
+    (start, end, status) from ?days= or ?from=&to= (YYYY-MM-DD) and ?status=.
+    Kharab params par ValueError (reason ke saath) - view 400 deta hai.
+    """
+    try:
+        days = max(1, min(int(request.GET.get("days", settings.SALES_DEFAULT_DAYS)), 3660))
+    except ValueError:
+        raise ValueError("days must be a whole number")
+    try:
+        start = request.GET.get("from")
+        end = request.GET.get("to")
+        start = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+        end = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+    except ValueError:
+        raise ValueError("from/to must be dates as YYYY-MM-DD")
+    start, end = sales.date_range(days, start, end)
+    if start > end:
+        raise ValueError("from must not be after to")
+    return start, end, request.GET.get("status") or None
+
+
+def _sales_response(request, compute):
+    version = get_version(sales.SALES_VERSION_KEY)
+    key = hashlib.sha1(f"{request.path}?{request.GET.urlencode()}|{version}".encode()).hexdigest()
+
+    def body():
+        cache_key = f"library:sales:{key}"
+        cached = cache.get(cache_key)
+        if cached is None:
+            cached = json.dumps(compute(), separators=(",", ":"))
+            cache.set(cache_key, cached, settings.STATS_CACHE_TIMEOUT)
+        return cached
+
+    return _versioned_json(request, key, version, body, private=True, max_age=settings.STATS_MAX_AGE)
+
+
+@user_passes_test(admin_required)
+def api_sales(request):
+    period = request.GET.get("period", "day")
+    if period not in sales.PERIODS:
+        return HttpResponseBadRequest("period must be day, week or month")
+    try:
+        start, end, status = _sales_params(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return _sales_response(request, lambda: sales.sales_series(period, start, end, status))
+
+
+@user_passes_test(admin_required)
+def api_sales_top_books(request):
+    try:
+        start, end, status = _sales_params(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 10)), 100))
+    except ValueError:
+        limit = 10
+    return _sales_response(request, lambda: sales.top_books(start, end, limit, status))
+
+
+@user_passes_test(admin_required)
+def api_sales_status(request):
+    try:
+        start, end, _ = _sales_params(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    return _sales_response(request, lambda: sales.status_breakdown(start, end))
+
 # views.py
 from django.shortcuts import render, get_object_or_404
 from .models import Author, Book
 
+@private_page(_author_books_state, _liked_ids)
+@cache_view("catalogue", "author:{author_id}")
 def books_by_author(request, author_id):
-    author = get_object_or_404(Author, pk=author_id)
-    books = Book.objects.filter(author=author)
-
+    # Cards public fragment (author_books_body) se; yahan sirf mere liked ids
+    author = get_object_or_404(Author.objects.only("id", "name"), pk=author_id)
     return render(request, "books_by_author.html", {
         "author": author,
-        "books": books,
+        "liked_ids": _liked_ids(request, author_id),
     })
 
 
 
-import os
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from django.conf import settings
-
-def generate_and_save_pdf(order):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-    p.drawString(100, 750, f"Order ID: {order.id}")
-    p.drawString(100, 730, f"Book: {order.book.title}")
-    p.drawString(100, 710, f"Customer: {order.name}")
-    p.drawString(100, 690, f"Phone: {order.phone}")
-    p.drawString(100, 670, f"Address: {order.address}")
-    p.drawString(100, 650, "Thanks for your purchase!")
-    p.showPage()
-    p.save()
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-
-    folder = os.path.join(settings.MEDIA_ROOT, "whatsapp_orders")
-    os.makedirs(folder, exist_ok=True)
-    file_path = os.path.join(folder, f"order_{order.id}.pdf")
-
-    with open(file_path, "wb") as f:
-        f.write(pdf_bytes)
-
-    # ✅ Public URL return
-    pdf_url = f"{settings.SITE_URL}{settings.MEDIA_URL}whatsapp_orders/order_{order.id}.pdf"
-    return pdf_url
-
-
-# def test_pdf(request):
-#     pdf_url = generate_and_save_pdf(order_id=53)
-#     return FileResponse(open(settings.MEDIA_ROOT / "whatsapp_orders" / "order_53.pdf", "rb"),
-#                         as_attachment=True,
-#                         filename="order_53.pdf")
-
-
 # from library.utils import get_google_credentials
 
 
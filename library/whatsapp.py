@@ -0,0 +1,167 @@
+# library/whatsapp.py
+"""
+WhatsApp notifications via Twilio.
+
+Process me ek hi `twilio.rest.Client` banta hai (uska requests Session aur
+connection pool har message me reuse hota hai). Bulk sends ke liye
+`send_many` Twilio ka aiohttp client (`AsyncTwilioHttpClient`) use karta hai:
+messages concurrently jaate hain, ek aiohttp session par.
+
+Dono raaste ek hi `RateLimiter` se guzarte hain, jo `TWILIO_MESSAGES_PER_SECOND`
+sirf is process ke andar (threads + coroutines) laagu karta hai. Kai worker
+processes ho to har ek ko apna hissa do: quota / processes.
+`TWILIO_API_BASE` set karo to requests us URL par jaati hain (local stub).
+Twilio configured na ho to message sirf log hota hai.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Per-process token bucket shared by threads and coroutines (doosre
+    processes ke sends ise nahi dikhte). Har caller ek token reserve karta
+    hai aur jitna "udhaar" hai utna so jaata hai, isliye concurrent callers
+    apne aap line me lag jaate hain.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token; returns how many seconds the caller must wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+_client = None
+_limiter = None
+_lock = threading.Lock()
+
+
+def is_configured():
+    return bool(settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_WHATSAPP_FROM)
+
+
+def _make_client(http_client=None):
+    from twilio.rest import Client
+
+    client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+    if settings.TWILIO_API_BASE:
+        client.api.base_url = settings.TWILIO_API_BASE.rstrip("/")
+    return client
+
+
+def client():
+    """Process-wide Twilio client."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = _make_client()
+        return _client
+
+
+def limiter():
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = RateLimiter(settings.TWILIO_MESSAGES_PER_SECOND)
+        return _limiter
+
+
+def reset():
+    """Forget the cached client/limiter (settings change, tests)."""
+    global _client, _limiter
+    with _lock:
+        _client = _limiter = None
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    if setting.startswith(("TWILIO_", "WHATSAPP_")):
+        reset()
+
+
+def whatsapp_number(phone):
+    """'98765 43210' -> 'whatsapp:+919876543210'; numbers with +country code are kept."""
+    phone = phone.strip()
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    if phone.startswith("+"):
+        return f"whatsapp:+{digits}"
+    return f"whatsapp:{settings.WHATSAPP_DEFAULT_COUNTRY_CODE}{digits[-10:]}"
+
+
+def order_message(order, pdf_url=None):
+    """(to, body) for an order confirmation."""
+    body = f"Hello {order.name}, your order #{order.id} for '{order.book.title}' has been received."
+    if pdf_url:
+        body += f" PDF: {pdf_url}"
+    return whatsapp_number(order.phone), body
+
+
+def send(to, body):
+    """Send one message on the shared client. Returns the Twilio message sid (None if not configured)."""
+    if not is_configured():
+        logger.info("WhatsApp (not configured) to %s: %s", to, body)
+        return None
+    limiter().wait()
+    return client().messages.create(from_=settings.TWILIO_WHATSAPP_FROM, to=to, body=body).sid
+
+
+async def send_many_async(messages, concurrency=None):
+    """
+    Send [(to, body), ...] concurrently on one aiohttp session. Returns a list
+    in the same order with the message sid or the exception for that message.
+    """
+    if not is_configured():
+        return [send(to, body) for to, body in messages]
+
+    from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+    async_client = _make_client(http_client=AsyncTwilioHttpClient())
+    semaphore = asyncio.Semaphore(concurrency or settings.TWILIO_ASYNC_CONCURRENCY)
+    rate = limiter()
+
+    async def send_one(to, body):
+        async with semaphore:
+            await rate.wait_async()
+            message = await async_client.messages.create_async(
+                from_=settings.TWILIO_WHATSAPP_FROM, to=to, body=body,
+            )
+            return message.sid
+
+    try:
+        return await asyncio.gather(*(send_one(to, body) for to, body in messages), return_exceptions=True)
+    finally:
+        await async_client.http_client.close()
+
+
+def send_many(messages, concurrency=None):
+    """Blocking wrapper around send_many_async (job workers, commands)."""
+    return asyncio.run(send_many_async(messages, concurrency))
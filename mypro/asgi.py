@@ -3,6 +3,12 @@ ASGI config for mypro project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+    uvicorn mypro.asgi:application --workers 4
+
+The JSON API views (search type-ahead, counters, charts) are async and every
+middleware is async-capable, so under uvicorn those requests stay on the
+event loop; sync views run in Django's thread pool as usual.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +18,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mypro.settings')
+# ASGI par persistent DB connections leak hote hain (har request ka apna thread) - settings.py dekho
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()